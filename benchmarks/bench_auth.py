@@ -0,0 +1,223 @@
+"""Auth hot-path microbenchmarks.
+
+Drives the pieces of check_token_authentication one by one, the whole
+dependency chain and a real authenticated route through httpx.AsyncClient,
+reporting p50/p99 latency and database queries per request.
+
+Needs the test database, like the api tests:
+    poe bench_auth                       # print results
+    poe bench_auth --save-baseline       # store benchmarks/results/auth_baseline.json
+    poe bench_auth --compare             # print results next to the baseline
+"""
+import argparse
+import asyncio
+import datetime
+import json
+import os
+import random
+import statistics
+import time
+
+import jwt
+from fastapi.security import HTTPAuthorizationCredentials
+from httpx import AsyncClient
+from sqlalchemy import delete, event
+
+from updateservice.app import app
+from updateservice.connection_db import async_session, engine
+from updateservice.models.application import Application
+from updateservice.models.package import Package
+from updateservice.models.token import Token
+from updateservice.models.user_teams import Team, User
+from updateservice.repositories.tokens_repo import CheckTokenRepo, RevocationEpochRepo
+from updateservice.repositories.user_repo import UserLoginRepo, last_login_buffer
+from updateservice.utils.token_authentication import (
+    CheckTokenStatus,
+    UpdateUserLogin,
+    check_token_authentication,
+    decode_token,
+    jwt_secret,
+)
+from updateservice.utils.token_cache import decoded_token_cache, token_status_cache
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), "results", "auth_baseline.json")
+
+
+class QueryCounter:
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, *args, **kwargs):
+        self.count += 1
+
+
+def clear_caches():
+    decoded_token_cache.clear()
+    token_status_cache.clear()
+
+
+async def create_fixtures():
+    fixture_id = random.randint(1_000_000, 9_999_999)
+    async with async_session() as session:
+        team = Team(id=fixture_id, name=f"bench-{fixture_id}")
+        user = User(
+            id=fixture_id, email=f"bench-{fixture_id}", full_name=f"bench-{fixture_id}"
+        )
+        application = Application(
+            id=fixture_id, name=f"bench-{fixture_id}", team_id=fixture_id
+        )
+        package = Package(id=fixture_id, application_id=fixture_id, version="1.0.0")
+        exp = datetime.datetime.utcnow() + datetime.timedelta(hours=1)
+        encoded_jwt = jwt.encode(
+            {"user_id": fixture_id, "exp": exp}, jwt_secret, algorithm="HS256"
+        )
+        token = Token(user_id=fixture_id, token=encoded_jwt, expires_at=exp)
+        session.add_all([team, user])
+        await session.flush()
+        session.add_all([application, token])
+        await session.flush()
+        session.add(package)
+        await session.commit()
+    return fixture_id, encoded_jwt
+
+
+async def drop_fixtures(fixture_id: int):
+    async with async_session() as session:
+        await session.execute(delete(Package).filter(Package.id == fixture_id))
+        await session.execute(delete(Token).filter(Token.user_id == fixture_id))
+        await session.execute(delete(Application).filter(Application.id == fixture_id))
+        await session.execute(delete(User).filter(User.id == fixture_id))
+        await session.execute(delete(Team).filter(Team.id == fixture_id))
+        await session.commit()
+
+
+def build_scenarios(fixture_id: int, token: str, client: AsyncClient):
+    credentials = HTTPAuthorizationCredentials(scheme="Bearer", credentials=token)
+    package_url = f"/v1/applications/{fixture_id}/packages/{fixture_id}"
+    headers = {"Authorization": f"Bearer {token}"}
+
+    async def decode(cold: bool):
+        if cold:
+            decoded_token_cache.clear()
+        decode_token(token)
+
+    async def token_status(cold: bool):
+        if cold:
+            token_status_cache.clear()
+        async with async_session() as session:
+            await CheckTokenRepo(session).token_status(fixture_id, token, False)
+
+    async def last_login(cold: bool):
+        await UserLoginRepo().update_last_login(fixture_id)
+        if cold:
+            await last_login_buffer.flush()
+
+    async def dependency_construction(cold: bool):
+        async with async_session() as session:
+            UpdateUserLogin(UserLoginRepo(session))
+            CheckTokenStatus(CheckTokenRepo(session))
+            RevocationEpochRepo(session)
+
+    async def dependency_chain(cold: bool):
+        if cold:
+            clear_caches()
+        async with async_session() as session:
+            await check_token_authentication(
+                credentials,
+                UpdateUserLogin(UserLoginRepo(session)),
+                CheckTokenStatus(CheckTokenRepo(session)),
+                RevocationEpochRepo(session),
+            )
+
+    async def authenticated_route(cold: bool):
+        if cold:
+            clear_caches()
+        response = await client.get(package_url, headers=headers)
+        assert response.status_code == 200, response.text
+
+    return {
+        "decode_token": decode,
+        "token_status": token_status,
+        "last_login": last_login,
+        "dependency_construction": dependency_construction,
+        "check_token_authentication": dependency_chain,
+        "GET package details": authenticated_route,
+    }
+
+
+async def measure(scenario, cold: bool, rounds: int, counter: QueryCounter):
+    for _ in range(min(rounds, 20)):
+        await scenario(cold)
+    latencies = []
+    counter.count = 0
+    for _ in range(rounds):
+        started = time.perf_counter_ns()
+        await scenario(cold)
+        latencies.append((time.perf_counter_ns() - started) / 1000)
+    percentiles = statistics.quantiles(latencies, n=100)
+    return {
+        "p50_us": round(percentiles[49], 2),
+        "p99_us": round(percentiles[98], 2),
+        "queries_per_request": round(counter.count / rounds, 2),
+    }
+
+
+async def run(rounds: int):
+    engine.sync_engine.echo = False
+    counter = QueryCounter()
+    event.listen(engine.sync_engine, "before_cursor_execute", counter)
+    fixture_id, token = await create_fixtures()
+    results = {}
+    try:
+        async with AsyncClient(app=app, base_url="http://0.0.0.0:8080") as client:
+            for name, scenario in build_scenarios(fixture_id, token, client).items():
+                for cache_state, cold in (("cold", True), ("warm", False)):
+                    key = f"{name} ({cache_state})"
+                    results[key] = await measure(scenario, cold, rounds, counter)
+    finally:
+        await last_login_buffer.flush()
+        await drop_fixtures(fixture_id)
+        event.remove(engine.sync_engine, "before_cursor_execute", counter)
+        await engine.dispose()
+    return results
+
+
+def print_results(results: dict, baseline: dict = None):
+    print(f"{'scenario':<45}{'p50 us':>10}{'p99 us':>10}{'queries':>9}")
+    for name, result in results.items():
+        line = (
+            f"{name:<45}{result['p50_us']:>10.1f}{result['p99_us']:>10.1f}"
+            f"{result['queries_per_request']:>9.2f}"
+        )
+        if baseline and name in baseline:
+            before = baseline[name]
+            line += (
+                f"   baseline p50 {before['p50_us']:.1f}"
+                f" p99 {before['p99_us']:.1f}"
+                f" queries {before['queries_per_request']:.2f}"
+            )
+        print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rounds", type=int, default=500)
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--compare", action="store_true")
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args.rounds))
+    baseline = None
+    if args.compare and os.path.exists(BASELINE_PATH):
+        with open(BASELINE_PATH) as f:
+            baseline = json.load(f)
+    print_results(results, baseline)
+    if args.save_baseline:
+        os.makedirs(os.path.dirname(BASELINE_PATH), exist_ok=True)
+        with open(BASELINE_PATH, "w") as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+        print(f"Baseline saved to {BASELINE_PATH}")
+
+
+if __name__ == "__main__":
+    main()
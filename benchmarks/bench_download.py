@@ -0,0 +1,114 @@
+"""Package download throughput benchmarks.
+
+Serves one large file through the response used by download_a_file before
+(Starlette FileResponse), the chunked SendfileResponse fallback and the
+SendfileResponse zero-copy path, reporting MB/s and event loop CPU time.
+
+The ASGI server is simulated in process: body chunks are written to
+/dev/null and zero-copy messages are served with os.sendfile, as a server
+implementing the http.response.zerocopysend extension would.
+
+    poe bench_download                   # 256 MiB file, 5 rounds
+    poe bench_download --size-mb 1024 --rounds 3
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+
+from fastapi.responses import FileResponse
+
+from updateservice.utils.file_responses import SendfileResponse
+
+
+class DevNullServer:
+    def __init__(self, extensions: dict):
+        self.extensions = extensions
+        self.fd = os.open(os.devnull, os.O_WRONLY)
+        self.sent = 0
+
+    async def send(self, message):
+        if message["type"] == "http.response.body":
+            self.sent += os.write(self.fd, message.get("body", b""))
+        elif message["type"] == "http.response.zerocopysend":
+            in_fd = message["file"].fileno()
+            offset, remaining = message["offset"], message["count"]
+            while remaining > 0:
+                written = os.sendfile(self.fd, in_fd, offset, remaining)
+                if written == 0:
+                    break
+                offset += written
+                remaining -= written
+                self.sent += written
+
+    async def serve(self, response):
+        scope = {"type": "http", "method": "GET", "extensions": self.extensions}
+        await response(scope, None, self.send)
+
+    def close(self):
+        os.close(self.fd)
+
+
+def build_scenarios(location: str):
+    return {
+        "FileResponse (current download_a_file)": (
+            lambda: FileResponse(location, filename="firmware.bin"),
+            {},
+        ),
+        "SendfileResponse (chunked fallback)": (
+            lambda: SendfileResponse(location, filename="firmware.bin"),
+            {},
+        ),
+        "SendfileResponse (zerocopysend)": (
+            lambda: SendfileResponse(location, filename="firmware.bin"),
+            {"http.response.zerocopysend": {}},
+        ),
+    }
+
+
+async def measure(build_response, extensions: dict, size: int, rounds: int):
+    walls, cpus = [], []
+    for _ in range(rounds):
+        server = DevNullServer(extensions)
+        wall_started, cpu_started = time.perf_counter(), time.process_time()
+        await server.serve(build_response())
+        walls.append(time.perf_counter() - wall_started)
+        cpus.append(time.process_time() - cpu_started)
+        server.close()
+        assert server.sent == size, f"sent {server.sent} of {size} bytes"
+    wall = statistics.median(walls)
+    return {
+        "mb_per_s": round(size / wall / 1024 / 1024, 1),
+        "cpu_ms": round(statistics.median(cpus) * 1000, 1),
+    }
+
+
+async def run(size_mb: int, rounds: int):
+    size = size_mb * 1024 * 1024
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        location = os.path.join(directory, "firmware.bin")
+        with open(location, "wb") as f:
+            for _ in range(size_mb):
+                f.write(os.urandom(1024 * 1024))
+        for name, (build_response, extensions) in build_scenarios(location).items():
+            results[name] = await measure(build_response, extensions, size, rounds)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size-mb", type=int, default=256)
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args.size_mb, args.rounds))
+    print(f"{'scenario':<45}{'MB/s':>10}{'cpu ms':>10}")
+    for name, result in results.items():
+        print(f"{name:<45}{result['mb_per_s']:>10.1f}{result['cpu_ms']:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
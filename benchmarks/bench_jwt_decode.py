@@ -0,0 +1,32 @@
+"""Per-request JWT verification cost with and without the decoded token cache.
+
+Run with: poetry run python -m benchmarks.bench_jwt_decode
+"""
+import datetime
+import timeit
+
+import jwt
+
+from updateservice.utils.token_authentication import decode_token, jwt_secret
+from updateservice.utils.token_cache import decoded_token_cache
+
+ROUNDS = 100_000
+
+
+def main():
+    exp = datetime.datetime.utcnow() + datetime.timedelta(hours=1)
+    token = jwt.encode({"user_id": 1, "exp": exp}, jwt_secret, algorithm="HS256")
+
+    uncached = timeit.timeit(
+        lambda: jwt.decode(token, jwt_secret, algorithms="HS256"), number=ROUNDS
+    )
+    decoded_token_cache.clear()
+    cached = timeit.timeit(lambda: decode_token(token), number=ROUNDS)
+
+    print(f"jwt.decode:   {uncached / ROUNDS * 1e6:8.2f} us/request")
+    print(f"decode_token: {cached / ROUNDS * 1e6:8.2f} us/request")
+    print(f"cache stats:  {decoded_token_cache.stats()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -11,8 +11,12 @@ from updateservice.models import (
     application,
     application_group,
     backup,
+    blob,
+    blob_variant,
+    delta,
     package,
     token,
+    upload_session,
     user_teams,
 )
 
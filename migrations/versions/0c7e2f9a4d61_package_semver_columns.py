@@ -0,0 +1,39 @@
+"""package semver columns
+
+Revision ID: 0c7e2f9a4d61
+Revises: f2a9d6c1b847
+Create Date: 2026-10-18 17:58:44.291736
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0c7e2f9a4d61'
+down_revision = 'f2a9d6c1b847'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('packages', sa.Column('major', sa.Integer(), nullable=True))
+    op.add_column('packages', sa.Column('minor', sa.Integer(), nullable=True))
+    op.add_column('packages', sa.Column('patch', sa.Integer(), nullable=True))
+    op.execute(
+        r"""
+        UPDATE packages
+        SET major = split_part(version, '.', 1)::integer,
+            minor = split_part(version, '.', 2)::integer,
+            patch = split_part(version, '.', 3)::integer
+        WHERE version ~ '^\d{1,9}\.\d{1,9}\.\d{1,9}$'
+        """
+    )
+    op.create_index('ix_packages_application_semver', 'packages', ['application_id', 'major', 'minor', 'patch'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_packages_application_semver', table_name='packages')
+    op.drop_column('packages', 'patch')
+    op.drop_column('packages', 'minor')
+    op.drop_column('packages', 'major')
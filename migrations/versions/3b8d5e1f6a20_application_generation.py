@@ -0,0 +1,24 @@
+"""application generation counter
+
+Revision ID: 3b8d5e1f6a20
+Revises: 0c7e2f9a4d61
+Create Date: 2026-10-18 19:12:07.583014
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3b8d5e1f6a20'
+down_revision = '0c7e2f9a4d61'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('applications', sa.Column('generation', sa.Integer(), server_default='0', nullable=False))
+
+
+def downgrade() -> None:
+    op.drop_column('applications', 'generation')
@@ -0,0 +1,46 @@
+"""token expires_at
+
+Revision ID: 5e8f0b6c2d94
+Revises: d47b2a9e0c13
+Create Date: 2026-10-18 11:26:05.937120
+
+"""
+from datetime import datetime
+
+from alembic import op
+import jwt
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5e8f0b6c2d94'
+down_revision = 'd47b2a9e0c13'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('tokens', sa.Column('expires_at', sa.TIMESTAMP(), nullable=True))
+    op.create_index(op.f('ix_tokens_expires_at'), 'tokens', ['expires_at'], unique=False)
+
+    # the exp claim only lives inside the JWT, read it back for existing rows
+    tokens = sa.table('tokens', sa.column('id'), sa.column('token'), sa.column('expires_at'))
+    connection = op.get_bind()
+    rows = connection.execute(sa.select(tokens.c.id, tokens.c.token)).fetchall()
+    for token_id, token in rows:
+        try:
+            claims = jwt.decode(token, options={"verify_signature": False})
+        except jwt.PyJWTError:
+            continue
+        if claims.get('exp') is None:
+            continue
+        connection.execute(
+            tokens.update()
+            .where(tokens.c.id == token_id)
+            .values(expires_at=datetime.utcfromtimestamp(claims['exp']))
+        )
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_tokens_expires_at'), table_name='tokens')
+    op.drop_column('tokens', 'expires_at')
@@ -0,0 +1,38 @@
+"""resumable upload sessions
+
+Revision ID: 7a3d9c4e1f58
+Revises: 5e8f0b6c2d94
+Create Date: 2026-10-18 13:41:52.660318
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7a3d9c4e1f58'
+down_revision = '5e8f0b6c2d94'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.alter_column('packages', 'size', existing_type=sa.Integer(), type_=sa.BigInteger(), existing_nullable=True)
+    op.create_table('upload_sessions',
+    sa.Column('id', sa.VARCHAR(length=32), nullable=False),
+    sa.Column('package_id', sa.Integer(), nullable=True),
+    sa.Column('filename', sa.VARCHAR(length=255), nullable=False),
+    sa.Column('size', sa.BigInteger(), nullable=True),
+    sa.Column('offset', sa.BigInteger(), nullable=False),
+    sa.Column('created_at', sa.TIMESTAMP(), nullable=True),
+    sa.Column('updated_at', sa.TIMESTAMP(), nullable=True),
+    sa.ForeignKeyConstraint(['package_id'], ['packages.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_upload_sessions_package_id'), 'upload_sessions', ['package_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_upload_sessions_package_id'), table_name='upload_sessions')
+    op.drop_table('upload_sessions')
+    op.alter_column('packages', 'size', existing_type=sa.BigInteger(), type_=sa.Integer(), existing_nullable=True)
@@ -0,0 +1,32 @@
+"""token revocation epochs
+
+Revision ID: 9c1e5f3a7b21
+Revises: 4aba3278cea1
+Create Date: 2026-10-18 09:12:41.513204
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9c1e5f3a7b21'
+down_revision = '4aba3278cea1'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('users', sa.Column('token_epoch', sa.Integer(), server_default='0', nullable=False))
+    op.add_column('users', sa.Column('token_epoch_updated_at', sa.TIMESTAMP(), nullable=True))
+    op.create_index(op.f('ix_users_token_epoch_updated_at'), 'users', ['token_epoch_updated_at'], unique=False)
+    op.add_column('tokens', sa.Column('jti', sa.VARCHAR(length=36), nullable=True))
+    op.create_unique_constraint('tokens_jti_key', 'tokens', ['jti'])
+
+
+def downgrade() -> None:
+    op.drop_constraint('tokens_jti_key', 'tokens', type_='unique')
+    op.drop_column('tokens', 'jti')
+    op.drop_index(op.f('ix_users_token_epoch_updated_at'), table_name='users')
+    op.drop_column('users', 'token_epoch_updated_at')
+    op.drop_column('users', 'token_epoch')
@@ -0,0 +1,28 @@
+"""upload session expiry
+
+Revision ID: a4c7e2d9f310
+Revises: 3b8d5e1f6a20
+Create Date: 2026-10-18 21:06:44.271935
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a4c7e2d9f310'
+down_revision = '3b8d5e1f6a20'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('upload_sessions', sa.Column('expires_at', sa.TIMESTAMP(), nullable=True))
+    op.create_index(op.f('ix_upload_sessions_expires_at'), 'upload_sessions', ['expires_at'], unique=False)
+    # sessions opened before expiry get the default lifetime from their last write
+    op.execute("UPDATE upload_sessions SET expires_at = COALESCE(updated_at, now()) + interval '1 day'")
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_upload_sessions_expires_at'), table_name='upload_sessions')
+    op.drop_column('upload_sessions', 'expires_at')
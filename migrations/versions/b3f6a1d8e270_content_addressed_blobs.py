@@ -0,0 +1,43 @@
+"""content addressed blobs
+
+Revision ID: b3f6a1d8e270
+Revises: 7a3d9c4e1f58
+Create Date: 2026-10-18 15:02:17.418903
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b3f6a1d8e270'
+down_revision = '7a3d9c4e1f58'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('blobs',
+    sa.Column('hash', sa.CHAR(length=64), nullable=False),
+    sa.Column('size', sa.BigInteger(), nullable=False),
+    sa.Column('ref_count', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.TIMESTAMP(), nullable=True),
+    sa.PrimaryKeyConstraint('hash')
+    )
+    op.create_index(op.f('ix_blobs_ref_count'), 'blobs', ['ref_count'], unique=False)
+    # packages uploaded before blobs hold one reference each, their files are
+    # stored under the blob keys by tasks.link_legacy_blobs_task
+    op.execute(
+        """
+        INSERT INTO blobs (hash, size, ref_count, created_at)
+        SELECT hash, COALESCE(MAX(size), 0), COUNT(*), now()
+        FROM packages
+        WHERE hash IS NOT NULL
+        GROUP BY hash
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_blobs_ref_count'), table_name='blobs')
+    op.drop_table('blobs')
@@ -0,0 +1,33 @@
+"""delta state
+
+Revision ID: c5d1f8a3b692
+Revises: a4c7e2d9f310
+Create Date: 2026-10-18 21:48:13.905127
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c5d1f8a3b692'
+down_revision = 'a4c7e2d9f310'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('deltas',
+    sa.Column('source_hash', sa.CHAR(length=64), nullable=False),
+    sa.Column('target_hash', sa.CHAR(length=64), nullable=False),
+    sa.Column('status', sa.VARCHAR(length=16), nullable=False),
+    sa.Column('size', sa.BigInteger(), nullable=True),
+    sa.Column('served_at', sa.TIMESTAMP(), nullable=True),
+    sa.Column('evicted_at', sa.TIMESTAMP(), nullable=True),
+    sa.Column('created_at', sa.TIMESTAMP(), nullable=True),
+    sa.PrimaryKeyConstraint('source_hash', 'target_hash')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('deltas')
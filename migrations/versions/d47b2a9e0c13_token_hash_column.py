@@ -0,0 +1,43 @@
+"""token hash column
+
+Revision ID: d47b2a9e0c13
+Revises: 9c1e5f3a7b21
+Create Date: 2026-10-18 10:03:17.284511
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd47b2a9e0c13'
+down_revision = '9c1e5f3a7b21'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('tokens', sa.Column('token_hash', sa.CHAR(length=64), nullable=True))
+    op.execute(
+        "UPDATE tokens SET token_hash = encode(sha256(convert_to(token, 'UTF8')), 'hex') "
+        "WHERE token IS NOT NULL"
+    )
+    # identical JWTs minted in the same second share a digest, keep the newest row
+    op.execute(
+        "DELETE FROM tokens t USING tokens newer "
+        "WHERE t.token_hash = newer.token_hash AND t.id < newer.id"
+    )
+    op.create_unique_constraint('tokens_token_hash_key', 'tokens', ['token_hash'])
+    op.create_index(
+        'ix_tokens_active_token_hash',
+        'tokens',
+        ['token_hash'],
+        unique=False,
+        postgresql_where=sa.text('deleted = false'),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_tokens_active_token_hash', table_name='tokens')
+    op.drop_constraint('tokens_token_hash_key', 'tokens', type_='unique')
+    op.drop_column('tokens', 'token_hash')
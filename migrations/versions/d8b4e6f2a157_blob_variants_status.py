@@ -0,0 +1,37 @@
+"""blob variants status
+
+Revision ID: d8b4e6f2a157
+Revises: c5d1f8a3b692
+Create Date: 2026-10-18 22:31:57.146082
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd8b4e6f2a157'
+down_revision = 'c5d1f8a3b692'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('blobs', sa.Column('variants_status', sa.VARCHAR(length=16), nullable=True))
+    op.add_column('blobs', sa.Column('variants_checked_at', sa.TIMESTAMP(), nullable=True))
+    op.create_index('ix_blobs_variants_pending', 'blobs', ['variants_checked_at'], unique=False, postgresql_where=sa.text('variants_status IS NULL'))
+    # identity rows only marked attempts, including failed ones, so those
+    # blobs are compressed again
+    op.execute("DELETE FROM blob_variants WHERE encoding = 'identity'")
+    op.execute(
+        """
+        UPDATE blobs SET variants_status = 'done', variants_checked_at = now()
+        WHERE EXISTS (SELECT 1 FROM blob_variants WHERE blob_variants.hash = blobs.hash)
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_blobs_variants_pending', table_name='blobs', postgresql_where=sa.text('variants_status IS NULL'))
+    op.drop_column('blobs', 'variants_checked_at')
+    op.drop_column('blobs', 'variants_status')
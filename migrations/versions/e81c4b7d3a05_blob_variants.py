@@ -0,0 +1,32 @@
+"""blob variants
+
+Revision ID: e81c4b7d3a05
+Revises: b3f6a1d8e270
+Create Date: 2026-10-18 16:24:39.107552
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e81c4b7d3a05'
+down_revision = 'b3f6a1d8e270'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('blob_variants',
+    sa.Column('hash', sa.CHAR(length=64), nullable=False),
+    sa.Column('encoding', sa.VARCHAR(length=16), nullable=False),
+    sa.Column('size', sa.BigInteger(), nullable=False),
+    sa.Column('variant_hash', sa.CHAR(length=64), nullable=False),
+    sa.Column('created_at', sa.TIMESTAMP(), nullable=True),
+    sa.ForeignKeyConstraint(['hash'], ['blobs.hash'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('hash', 'encoding')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('blob_variants')
@@ -0,0 +1,28 @@
+"""direct uploads
+
+Revision ID: f2a9d6c1b847
+Revises: e81c4b7d3a05
+Create Date: 2026-10-18 17:12:05.532871
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f2a9d6c1b847'
+down_revision = 'e81c4b7d3a05'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('upload_sessions', sa.Column('direct', sa.Boolean(), server_default='false', nullable=False))
+    op.add_column('upload_sessions', sa.Column('hash', sa.CHAR(length=64), nullable=True))
+    op.add_column('upload_sessions', sa.Column('status', sa.VARCHAR(length=16), server_default='open', nullable=False))
+
+
+def downgrade() -> None:
+    op.drop_column('upload_sessions', 'status')
+    op.drop_column('upload_sessions', 'hash')
+    op.drop_column('upload_sessions', 'direct')
@@ -26,6 +26,10 @@ from updateservice.models.schema_package import PackageCreate
 from updateservice.models.token import Token
 from updateservice.models.user_teams import Team, User
 from updateservice.settings import setting
+from updateservice.tests.fake_minio import FakeMinio
+from updateservice.utils import storage as storage_module
+from updateservice.utils.storage import S3Storage
+from updateservice.utils.version_index import version_index
 
 from ..app import app
 
@@ -50,15 +54,25 @@ async def db_async_session():
     try:
         yield session
         await session.execute(
-            "TRUNCATE teams, tokens, applications, packages, users, groups, applications_groups CASCADE"
+            "TRUNCATE teams, tokens, applications, packages, users, groups, applications_groups, blobs, deltas CASCADE"
         )
         await session.commit()
+        version_index.clear()
+        shutil.rmtree(f"{os.getcwd()}/Storage/manifests", ignore_errors=True)
     except Exception as e:
         raise e
     finally:
         await session.close()
 
 
+@pytest.fixture
+def object_storage(monkeypatch):
+    """Serve every module from an in-memory S3 backend for one test"""
+    object_storage = S3Storage(bucket="packages", url_ttl=3600, client=FakeMinio())
+    monkeypatch.setattr(storage_module, "storage", object_storage)
+    return object_storage
+
+
 def random_string():
     return "".join(random.choices(string.ascii_lowercase, k=10))
 
@@ -333,7 +347,7 @@ async def upload_temp_file(package_in_db):
 
     yield test_file_path, package_update
     cwd = os.getcwd()
-    shutil.rmtree(f"{cwd}/Storage/Package_{package_in_db.id}")
+    shutil.rmtree(f"{cwd}/Storage/blobs", ignore_errors=True)
     os.remove(test_file_path)
 
 
@@ -386,7 +400,7 @@ async def upload_download_in_db(db_async_session, application_in_db):
     await db_async_session.commit()
     os.remove(test_file_path)
     cwd = os.getcwd()
-    shutil.rmtree(f"{cwd}/Storage/Package_{package_update.id}")
+    shutil.rmtree(f"{cwd}/Storage/blobs", ignore_errors=True)
 
 
 @pytest_asyncio.fixture
@@ -462,3 +462,33 @@ async def test_get_application_404_app_id(http_client, token_in_db, application_
     assert response.json() == {
         "detail": "The application with the id requested does not exist"
     }
+
+
+@pytest.mark.asyncio
+async def test_get_application_304_until_patched(
+    http_client, token_in_db, application_in_db, update_application_obj
+):
+    app_url = (
+        f"/v1/teams/{application_in_db.team_id}/applications/{application_in_db.id}"
+    )
+    headers = {"Authorization": f"Bearer {token_in_db.token}"}
+    response = await http_client.get(app_url, headers=headers)
+    etag = response.headers["etag"]
+
+    response_cached = await http_client.get(
+        app_url, headers={**headers, "If-None-Match": etag}
+    )
+    await http_client.patch(
+        f"/v1/team/{application_in_db.team_id}/applications/{application_in_db.id}",
+        headers=headers,
+        json={"description": update_application_obj.description},
+    )
+    response_patched = await http_client.get(
+        app_url, headers={**headers, "If-None-Match": etag}
+    )
+
+    assert response_cached.status_code == 304
+    assert response_cached.headers["etag"] == etag
+    assert response_patched.status_code == 200
+    assert response_patched.headers["etag"] != etag
+    assert response_patched.json()["description"] == update_application_obj.description
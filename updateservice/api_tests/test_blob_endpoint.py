@@ -0,0 +1,126 @@
+import hashlib
+import os
+import shutil
+
+import pytest
+from sqlalchemy import select
+
+from updateservice.models.blob import Blob
+from updateservice.repositories.blob_repo import blob_location
+from updateservice.tasks import collect_blobs, link_legacy_blobs
+from updateservice.utils.storage import blob_key
+
+
+@pytest.mark.asyncio
+async def test_check_and_attach_blob_200(
+    http_client, db_async_session, token_in_db, package_in_db, package_in_db_2
+):
+    headers = {"Authorization": f"Bearer {token_in_db.token}"}
+    content = b"firmware published twice"
+    file_hash = hashlib.sha256(content).hexdigest()
+    check_url = f"/v1/blobs/{file_hash}?size={len(content)}"
+
+    response_missing = await http_client.get(check_url, headers=headers)
+    await http_client.post(
+        f"/v1/applications/{package_in_db.application_id}/packages/{package_in_db.id}/file",
+        headers=headers,
+        files={"file": ("firmware.bin", content)},
+    )
+    response_exists = await http_client.get(check_url, headers=headers)
+    response_wrong_size = await http_client.get(
+        f"/v1/blobs/{file_hash}?size={len(content) + 1}", headers=headers
+    )
+    response_attach = await http_client.post(
+        f"/v1/applications/{package_in_db_2.application_id}/packages/{package_in_db_2.id}/file/blob",
+        json={"filename": "firmware.bin", "size": len(content), "hash": file_hash},
+        headers=headers,
+    )
+    result = await db_async_session.execute(
+        select(Blob.ref_count).filter(Blob.hash == file_hash)
+    )
+    shutil.rmtree(f"{os.getcwd()}/Storage/blobs", ignore_errors=True)
+
+    assert response_missing.json() == {
+        "hash": file_hash,
+        "size": len(content),
+        "exists": False,
+    }
+    assert response_exists.json()["exists"] is True
+    assert response_wrong_size.json()["exists"] is False
+    assert response_attach.status_code == 200
+    assert response_attach.json()["hash"] == file_hash
+    assert response_attach.json()["file"] == "firmware.bin"
+    assert result.scalar() == 2
+
+
+@pytest.mark.asyncio
+async def test_attach_blob_404(http_client, token_in_db, package_in_db):
+    response = await http_client.post(
+        f"/v1/applications/{package_in_db.application_id}/packages/{package_in_db.id}/file/blob",
+        json={"filename": "firmware.bin", "size": 1, "hash": "0" * 64},
+        headers={"Authorization": f"Bearer {token_in_db.token}"},
+    )
+
+    assert response.status_code == 404
+    assert response.json() == {"detail": "No stored file matches this hash and size"}
+
+
+@pytest.mark.asyncio
+async def test_check_blob_422_hash(http_client, token_in_db):
+    response = await http_client.get(
+        "/v1/blobs/not-a-hash?size=1",
+        headers={"Authorization": f"Bearer {token_in_db.token}"},
+    )
+
+    assert response.status_code == 422
+
+
+@pytest.mark.asyncio
+async def test_collect_blobs_removes_orphaned_objects(
+    http_client, db_async_session, token_in_db, package_in_db, object_storage
+):
+    client = object_storage.client
+    await http_client.post(
+        f"/v1/applications/{package_in_db.application_id}/packages/{package_in_db.id}/file",
+        headers={"Authorization": f"Bearer {token_in_db.token}"},
+        files={"file": ("firmware.bin", b"referenced")},
+    )
+    # stored by a transaction that failed before committing its row
+    orphan_hash = hashlib.sha256(b"orphan").hexdigest()
+    client.put("packages", blob_key(orphan_hash), b"orphan")
+    client.put("packages", blob_key(orphan_hash, "gzip"), b"gz")
+
+    report = await collect_blobs()
+    result = await db_async_session.execute(select(Blob.hash))
+
+    assert report == {"removed": 1, "adopted": 1}
+    assert result.scalars().all() == [hashlib.sha256(b"referenced").hexdigest()]
+    assert list(client.objects) == [
+        ("packages", blob_key(hashlib.sha256(b"referenced").hexdigest()))
+    ]
+
+
+@pytest.mark.asyncio
+async def test_link_legacy_blobs(db_async_session, package_in_db):
+    content = b"uploaded before blobs"
+    file_hash = hashlib.sha256(content).hexdigest()
+    legacy_directory = f"{os.getcwd()}/Storage/Package_{package_in_db.id}"
+    os.makedirs(legacy_directory, exist_ok=True)
+    with open(f"{legacy_directory}/firmware.bin", "wb") as f:
+        f.write(content)
+    package_in_db.file = "firmware.bin"
+    package_in_db.hash = file_hash
+    package_in_db.size = len(content)
+    db_async_session.add(Blob(hash=file_hash, size=len(content), ref_count=1))
+    await db_async_session.commit()
+
+    report_first = await link_legacy_blobs()
+    report_second = await link_legacy_blobs()
+    with open(blob_location(file_hash), "rb") as f:
+        stored = f.read()
+    shutil.rmtree(legacy_directory, ignore_errors=True)
+    shutil.rmtree(f"{os.getcwd()}/Storage/blobs", ignore_errors=True)
+
+    assert report_first == {"linked": 1, "missing": 0}
+    assert report_second == {"linked": 0, "missing": 0}
+    assert stored == content
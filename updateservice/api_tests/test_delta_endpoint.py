@@ -0,0 +1,153 @@
+import os
+import shutil
+
+import pytest
+from sqlalchemy import select
+
+from updateservice.models.delta import Delta
+from updateservice.repositories.blob_repo import blob_location
+from updateservice.repositories.delta_repo import delta_served_buffer
+from updateservice.tasks import generate_deltas
+from updateservice.utils.delta import apply_delta
+from updateservice.utils.delta_cache import delta_cache
+from updateservice.utils.storage import blob_key
+
+
+async def upload_content(http_client, token_in_db, package, content):
+    response = await http_client.post(
+        f"/v1/applications/{package.application_id}/packages/{package.id}/file",
+        headers={"Authorization": f"Bearer {token_in_db.token}"},
+        files={"file": ("firmware.bin", content)},
+    )
+    return response.json()["hash"]
+
+
+@pytest.mark.asyncio
+async def test_download_delta_200(
+    http_client, token_in_db, package_in_db, package_in_db_2, tmp_path
+):
+    source_content = os.urandom(512 * 1024)
+    target_content = source_content[:1000] + b"patched" + source_content[1000:]
+    source_hash = await upload_content(
+        http_client, token_in_db, package_in_db, source_content
+    )
+    target_hash = await upload_content(
+        http_client, token_in_db, package_in_db_2, target_content
+    )
+    delta_url = (
+        f"/v1/applications/{package_in_db.application_id}/delta"
+        f"?from_version={package_in_db.version}&to_version={package_in_db_2.version}"
+    )
+
+    response_full = await http_client.get(
+        delta_url, headers={"Authorization": f"Bearer {token_in_db.token}"}
+    )
+    delta_cache.generate(
+        source_hash,
+        target_hash,
+        blob_location(source_hash),
+        blob_location(target_hash),
+    )
+    response_delta = await http_client.get(
+        delta_url, headers={"Authorization": f"Bearer {token_in_db.token}"}
+    )
+    shutil.rmtree(delta_cache.directory, ignore_errors=True)
+    delta_location = tmp_path / "firmware.delta"
+    delta_location.write_bytes(response_delta.content)
+    patched_location = tmp_path / "firmware.bin"
+    apply_delta(blob_location(source_hash), str(delta_location), str(patched_location))
+    shutil.rmtree(os.path.dirname(os.path.dirname(blob_location(source_hash))))
+
+    assert response_full.status_code == 200
+    assert response_full.headers["x-update-kind"] == "full"
+    assert response_full.content == target_content
+    assert response_delta.status_code == 200
+    assert response_delta.headers["x-update-kind"] == "delta"
+    assert response_delta.headers["x-target-hash"] == target_hash
+    assert len(response_delta.content) < len(target_content) // 10
+    assert patched_location.read_bytes() == target_content
+
+
+@pytest.mark.asyncio
+async def test_evicted_delta_is_generated_again_once_requested(
+    http_client,
+    db_async_session,
+    token_in_db,
+    package_in_db,
+    package_in_db_2,
+    monkeypatch,
+):
+    monkeypatch.setattr(delta_cache, "max_size", 0)
+    source_content = os.urandom(512 * 1024)
+    target_content = source_content[:1000] + b"patched" + source_content[1000:]
+    source_hash = await upload_content(
+        http_client, token_in_db, package_in_db, source_content
+    )
+    target_hash = await upload_content(
+        http_client, token_in_db, package_in_db_2, target_content
+    )
+    delta_url = (
+        f"/v1/applications/{package_in_db.application_id}/delta"
+        f"?from_version={package_in_db.version}&to_version={package_in_db_2.version}"
+    )
+
+    report_first = await generate_deltas()
+    report_unrequested = await generate_deltas()
+    await http_client.get(
+        delta_url, headers={"Authorization": f"Bearer {token_in_db.token}"}
+    )
+    await delta_served_buffer.flush()
+    report_requested = await generate_deltas()
+    result = await db_async_session.execute(
+        select(Delta).filter(
+            Delta.source_hash == source_hash, Delta.target_hash == target_hash
+        )
+    )
+    state = result.scalar()
+    shutil.rmtree(delta_cache.directory, ignore_errors=True)
+    shutil.rmtree(os.path.dirname(os.path.dirname(blob_location(source_hash))))
+
+    assert report_first == {"generated": 1, "evicted": 1, "removed": 0}
+    assert report_unrequested == {"generated": 0, "evicted": 0, "removed": 0}
+    assert report_requested == {"generated": 1, "evicted": 1, "removed": 0}
+    assert state.status == "evicted"
+    assert state.served_at is not None
+    assert delta_cache.get(source_hash, target_hash) is None
+
+
+@pytest.mark.asyncio
+async def test_download_delta_redirects_full_file_to_object_storage(
+    http_client, token_in_db, package_in_db, package_in_db_2, object_storage
+):
+    client = object_storage.client
+    await upload_content(http_client, token_in_db, package_in_db, b"source")
+    target_hash = await upload_content(
+        http_client, token_in_db, package_in_db_2, b"target"
+    )
+
+    response = await http_client.get(
+        f"/v1/applications/{package_in_db.application_id}/delta"
+        f"?from_version={package_in_db.version}&to_version={package_in_db_2.version}",
+        headers={"Authorization": f"Bearer {token_in_db.token}"},
+    )
+
+    assert response.status_code == 302
+    assert response.headers["location"].startswith(
+        f"http://objects/packages/{blob_key(target_hash)}"
+    )
+    assert response.headers["x-update-kind"] == "full"
+    assert response.headers["x-target-hash"] == target_hash
+
+
+@pytest.mark.asyncio
+async def test_download_delta_404_version(http_client, token_in_db, package_in_db):
+    response = await http_client.get(
+        f"/v1/applications/{package_in_db.application_id}/delta"
+        f"?from_version=0.0.0&to_version={package_in_db.version}",
+        headers={"Authorization": f"Bearer {token_in_db.token}"},
+    )
+
+    assert response.status_code == 404
+    assert response.json() == {
+        "detail": "The package with the version 0.0.0 does not exist"
+    }
@@ -0,0 +1,183 @@
+import hashlib
+import os
+import shutil
+
+import aiofiles
+import pytest
+from sqlalchemy import select
+
+from updateservice.models.blob import Blob
+from updateservice.models.blob_variant import BlobVariant
+from updateservice.tasks import compress_variants
+from updateservice.utils.storage import blob_key
+
+
+async def upload_file(http_client, token_in_db, package):
+    test_file_path, package_update = package
+    async with aiofiles.open(test_file_path, "rb") as f:
+        file_content = await f.read()
+    await http_client.post(
+        f"/v1/applications/{package_update.application_id}/packages/{package_update.id}/file",
+        headers={"Authorization": f"Bearer {token_in_db.token}"},
+        files={"file": ("test_file.txt", file_content)},
+    )
+    return file_content
+
+
+@pytest.mark.asyncio
+async def test_signed_download_200(http_client, token_in_db, upload_download_in_db):
+    _, package_update = upload_download_in_db
+    file_content = await upload_file(http_client, token_in_db, upload_download_in_db)
+
+    response_url = await http_client.post(
+        f"/v1/applications/{package_update.application_id}/packages/{package_update.id}/file/url",
+        headers={"Authorization": f"Bearer {token_in_db.token}"},
+    )
+    response_download = await http_client.get(response_url.json()["url"])
+
+    assert response_url.status_code == 201
+    assert response_download.status_code == 200
+    assert response_download.content == file_content
+
+
+@pytest.mark.asyncio
+async def test_signed_download_403_tampered(
+    http_client, token_in_db, upload_download_in_db
+):
+    _, package_update = upload_download_in_db
+    await upload_file(http_client, token_in_db, upload_download_in_db)
+
+    response_url = await http_client.post(
+        f"/v1/applications/{package_update.application_id}/packages/{package_update.id}/file/url",
+        headers={"Authorization": f"Bearer {token_in_db.token}"},
+    )
+    tampered_url = response_url.json()["url"].replace("expires=", "expires=9")
+    response_download = await http_client.get(tampered_url)
+
+    assert response_download.status_code == 403
+    assert response_download.json() == {"detail": "Download link is not valid"}
+
+
+@pytest.mark.asyncio
+async def test_signed_url_404_without_file(http_client, token_in_db, package_in_db):
+    response_url = await http_client.post(
+        f"/v1/applications/{package_in_db.application_id}/packages/{package_in_db.id}/file/url",
+        headers={"Authorization": f"Bearer {token_in_db.token}"},
+    )
+    assert response_url.status_code == 404
+    assert response_url.json() == {"detail": "File not found"}
+
+
+@pytest.mark.asyncio
+async def test_download_range_and_etag(http_client, token_in_db, upload_download_in_db):
+    _, package_update = upload_download_in_db
+    file_content = await upload_file(http_client, token_in_db, upload_download_in_db)
+    download_url = f"/v1/applications/{package_update.application_id}/packages/{package_update.id}/file"
+    headers = {"Authorization": f"Bearer {token_in_db.token}"}
+
+    response_full = await http_client.get(download_url, headers=headers)
+    etag = response_full.headers["etag"]
+    response_cached = await http_client.get(
+        download_url, headers={**headers, "If-None-Match": etag}
+    )
+    response_range = await http_client.get(
+        download_url, headers={**headers, "Range": "bytes=3-9"}
+    )
+
+    assert etag == f'"{package_update.hash}"'
+    assert response_cached.status_code == 304
+    assert response_range.status_code == 206
+    assert response_range.content == file_content[3:10]
+
+
+@pytest.mark.asyncio
+async def test_download_precompressed_variant(http_client, token_in_db, package_in_db):
+    content = b"compressible firmware " * 5000
+    headers = {"Authorization": f"Bearer {token_in_db.token}"}
+    file_url = f"/v1/applications/{package_in_db.application_id}/packages/{package_in_db.id}/file"
+    await http_client.post(
+        file_url, headers=headers, files={"file": ("firmware.bin", content)}
+    )
+
+    report = await compress_variants()
+    response_gzip = await http_client.get(
+        file_url, headers={**headers, "Accept-Encoding": "gzip"}
+    )
+    response_identity = await http_client.get(
+        file_url, headers={**headers, "Accept-Encoding": "identity"}
+    )
+    shutil.rmtree(f"{os.getcwd()}/Storage/blobs", ignore_errors=True)
+
+    assert report["compressed"] == 1
+    assert response_gzip.headers["content-encoding"] == "gzip"
+    assert int(response_gzip.headers["content-length"]) < len(content)
+    assert response_gzip.content == content
+    assert "content-encoding" not in response_identity.headers
+    assert response_identity.content == content
+    assert response_gzip.headers["etag"] != response_identity.headers["etag"]
+
+
+@pytest.mark.asyncio
+async def test_compress_variants_stores_only_smaller_variants(
+    http_client, token_in_db, package_in_db, object_storage
+):
+    content = os.urandom(64 * 1024)
+    await http_client.post(
+        f"/v1/applications/{package_in_db.application_id}/packages/{package_in_db.id}/file",
+        headers={"Authorization": f"Bearer {token_in_db.token}"},
+        files={"file": ("firmware.bin", content)},
+    )
+
+    report = await compress_variants()
+
+    assert report == {"compressed": 0, "skipped": 1, "failed": 0}
+    assert await compress_variants() == {"compressed": 0, "skipped": 0, "failed": 0}
+    assert [key for _, key in object_storage.client.objects] == [
+        blob_key(hashlib.sha256(content).hexdigest())
+    ]
+
+
+@pytest.mark.asyncio
+async def test_compress_variants_retries_missing_blobs(db_async_session):
+    db_async_session.add(Blob(hash="f" * 64, size=10, ref_count=1))
+    await db_async_session.commit()
+
+    report_first = await compress_variants()
+    report_second = await compress_variants()
+    result = await db_async_session.execute(
+        select(Blob.variants_status, Blob.variants_checked_at).filter(
+            Blob.hash == "f" * 64
+        )
+    )
+    status, checked_at = result.first()
+    variants = await db_async_session.execute(select(BlobVariant))
+
+    assert report_first == {"compressed": 0, "skipped": 0, "failed": 1}
+    assert report_second == {"compressed": 0, "skipped": 0, "failed": 1}
+    assert status is None
+    assert checked_at is not None
+    assert variants.scalars().all() == []
+
+
+@pytest.mark.asyncio
+async def test_download_redirects_to_object_storage(
+    http_client, token_in_db, package_in_db, object_storage
+):
+    client = object_storage.client
+    headers = {"Authorization": f"Bearer {token_in_db.token}"}
+    file_url = f"/v1/applications/{package_in_db.application_id}/packages/{package_in_db.id}/file"
+    response_upload = await http_client.post(
+        file_url, headers=headers, files={"file": ("firmware.bin", b"firmware")}
+    )
+    file_hash = response_upload.json()["hash"]
+
+    response_first = await http_client.get(file_url, headers=headers)
+    response_second = await http_client.get(file_url, headers=headers)
+
+    assert client.objects[("packages", blob_key(file_hash))].data == b"firmware"
+    assert response_first.status_code == 302
+    assert response_first.headers["location"].startswith(
+        f"http://objects/packages/{blob_key(file_hash)}"
+    )
+    assert response_second.headers["location"] == response_first.headers["location"]
+    assert client.presigned == 1
@@ -0,0 +1,90 @@
+import os
+
+import pytest
+
+from updateservice.models.package import Package
+from updateservice.utils.manifests import manifest_store
+
+
+@pytest.mark.asyncio
+async def test_manifests_follow_package_changes(
+    http_client, db_async_session, token_in_db, application_group_in_db
+):
+    application_id = application_group_in_db.application_id
+    group_id = application_group_in_db.group_id
+    headers = {"Authorization": f"Bearer {token_in_db.token}"}
+    released = Package(
+        application_id=application_id,
+        version="1.0.0",
+        hash="a" * 64,
+        size=10,
+        url=f"/v1/applications/{application_id}/packages/1/file",
+    )
+    db_async_session.add(released)
+    await db_async_session.commit()
+
+    response_create = await http_client.post(
+        f"/v1/applications/{application_id}/packages",
+        json={"version": "2.0.0", "description": "without a file yet"},
+        headers=headers,
+    )
+    response_app = await http_client.get(
+        f"/v1/applications/{application_id}/manifest", headers=headers
+    )
+    response_group = await http_client.get(
+        f"/v1/groups/{group_id}/manifest", headers=headers
+    )
+
+    assert response_create.status_code == 201
+    assert os.path.exists(manifest_store.application_location(application_id))
+    assert response_app.status_code == 200
+    assert response_app.headers["content-type"] == "application/json"
+    assert response_app.json()["latest"] == {
+        "id": released.id,
+        "version": "1.0.0",
+        "hash": "a" * 64,
+        "size": 10,
+        "url": released.url,
+    }
+    assert [package["version"] for package in response_app.json()["packages"]] == [
+        "1.0.0"
+    ]
+    assert response_group.json()["applications"] == [
+        {"application_id": application_id, "latest": response_app.json()["latest"]}
+    ]
+
+    await http_client.delete(
+        f"/v1/applications/{application_id}/packages/{released.id}", headers=headers
+    )
+    response_deleted = await http_client.get(
+        f"/v1/applications/{application_id}/manifest", headers=headers
+    )
+
+    assert response_deleted.json()["latest"] is None
+
+
+@pytest.mark.asyncio
+async def test_application_manifest_304(http_client, token_in_db, application_in_db):
+    manifest_url = f"/v1/applications/{application_in_db.id}/manifest"
+    headers = {"Authorization": f"Bearer {token_in_db.token}"}
+    response = await http_client.get(manifest_url, headers=headers)
+
+    response_cached = await http_client.get(
+        manifest_url, headers={**headers, "If-None-Match": response.headers["etag"]}
+    )
+
+    assert response.status_code == 200
+    assert response_cached.status_code == 304
+
+
+@pytest.mark.asyncio
+async def test_application_manifest_404(http_client, token_in_db):
+    response = await http_client.get(
+        "/v1/applications/0/manifest",
+        headers={"Authorization": f"Bearer {token_in_db.token}"},
+    )
+
+    assert response.status_code == 404
+    assert response.json() == {
+        "detail": "The application with the id requested does not exist"
+    }
@@ -1,6 +1,11 @@
+import os
+
 import aiofiles
 import pytest
+from sqlalchemy import select
 
+from updateservice.models.blob import Blob
+from updateservice.repositories.blob_repo import blob_location
 from updateservice.settings import setting
 
 max_int = setting["POSTGRES_MAX_INT"]
@@ -189,6 +194,42 @@ async def test_get_package_200(http_client, package_in_db, token_in_db):
     assert data["description"] == package_in_db.description
 
 
+@pytest.mark.asyncio
+async def test_get_package_304_until_changed(
+    http_client, package_in_db, package_in_db_2, token_in_db
+):
+    package_url = (
+        f"/v1/applications/{package_in_db.application_id}/packages/{package_in_db.id}"
+    )
+    list_url = (
+        f"/v1/applications/{package_in_db.application_id}/packages?page=1&size=20"
+    )
+    headers = {"Authorization": f"Bearer {token_in_db.token}"}
+    response_package = await http_client.get(package_url, headers=headers)
+    response_list = await http_client.get(list_url, headers=headers)
+    etag = response_package.headers["etag"]
+
+    response_package_cached = await http_client.get(
+        package_url, headers={**headers, "If-None-Match": etag}
+    )
+    response_list_cached = await http_client.get(
+        list_url, headers={**headers, "If-None-Match": response_list.headers["etag"]}
+    )
+    await http_client.delete(
+        f"/v1/applications/{package_in_db.application_id}/packages/{package_in_db_2.id}",
+        headers=headers,
+    )
+    response_package_changed = await http_client.get(
+        package_url, headers={**headers, "If-None-Match": etag}
+    )
+
+    assert response_package_cached.status_code == 304
+    assert response_package_cached.content == b""
+    assert response_list_cached.status_code == 304
+    assert response_package_changed.status_code == 200
+    assert response_package_changed.headers["etag"] != etag
+
+
 @pytest.mark.asyncio
 async def test_get_package_invalid_app_id_404(http_client, package_in_db, token_in_db):
     invalid_id = -7
@@ -338,6 +379,39 @@ async def test_upload_package_200(
     assert response.status_code == 200
 
 
+@pytest.mark.asyncio
+async def test_upload_package_deduplicates_content(
+    http_client,
+    db_async_session,
+    token_in_db,
+    upload_temp_file,
+    package_in_db,
+    package_in_db_2,
+):
+    test_file_path, package_update = upload_temp_file
+
+    async with aiofiles.open(test_file_path, "rb") as f:
+        file_content = await f.read()
+
+    for package in (package_in_db, package_in_db_2):
+        response = await http_client.post(
+            f"/v1/applications/{package.application_id}/packages/{package.id}/file",
+            headers={"Authorization": f"Bearer {token_in_db.token}"},
+            files={"file": ("test_file.txt", file_content)},
+        )
+        assert response.status_code == 200
+    result = await db_async_session.execute(
+        select(Blob).filter(Blob.hash == package_update.hash)
+    )
+    blob = result.scalar()
+
+    assert blob.ref_count == 2
+    assert blob.size == package_update.size
+    assert os.listdir(os.path.dirname(blob_location(package_update.hash))) == [
+        package_update.hash
+    ]
+
+
 @pytest.mark.asyncio
 async def test_upload_package_404_app_id(
     http_client, token_in_db, upload_temp_file_2, package_in_db
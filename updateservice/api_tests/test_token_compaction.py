@@ -0,0 +1,32 @@
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import select
+
+from updateservice.models.token import Token
+from updateservice.tasks import compact_tokens
+
+
+@pytest.mark.asyncio
+async def test_compact_tokens_removes_expired_tokens(db_async_session, user_in_db):
+    expired_token = Token(
+        user_id=user_in_db.id,
+        token="expired-token",
+        expires_at=datetime.utcnow() - timedelta(seconds=1),
+    )
+    valid_token = Token(
+        user_id=user_in_db.id,
+        token="valid-token",
+        expires_at=datetime.utcnow() + timedelta(hours=1),
+    )
+    db_async_session.add_all([expired_token, valid_token])
+    await db_async_session.commit()
+
+    report = await compact_tokens()
+
+    remaining = await db_async_session.execute(
+        select(Token.token).filter(Token.user_id == user_in_db.id)
+    )
+    assert report["removed"] >= 1
+    assert report["seconds"] >= 0
+    assert remaining.scalars().all() == ["valid-token"]
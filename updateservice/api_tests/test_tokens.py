@@ -62,3 +62,100 @@ async def test_delete_token_endpoint_invalid_token_404(http_client, token_in_db)
     assert response.json() == {
         "detail": "Could not find this token for the requested user"
     }
+
+
+@pytest.mark.asyncio
+async def test_deleted_token_is_rejected_after_cached_use(
+    http_client, token_in_db, package_in_db
+):
+    package_url = (
+        f"/v1/applications/{package_in_db.application_id}/packages/{package_in_db.id}"
+    )
+    headers = {"Authorization": f"Bearer {token_in_db.token}"}
+    response_before = await http_client.get(package_url, headers=headers)
+    response_delete = await http_client.delete(
+        f"/internal/v1/users/{token_in_db.user_id}/token/{token_in_db.token}",
+        headers={"accept": "application/json"},
+    )
+    response_after = await http_client.get(package_url, headers=headers)
+
+    assert response_before.status_code == 200
+    assert response_delete.status_code == 200
+    assert response_after.status_code == 401
+    assert response_after.json() == {"detail": "The token you have used was deleted"}
+
+
+@pytest.mark.asyncio
+async def test_revoke_user_tokens_endpoint_200(http_client, user_in_db, package_in_db):
+    response_token = await http_client.post(
+        f"/internal/v1/users/{user_in_db.id}/token",
+        headers={"accept": "application/json"},
+    )
+    token = response_token.json()["token"]["token"]
+    package_url = (
+        f"/v1/applications/{package_in_db.application_id}/packages/{package_in_db.id}"
+    )
+    headers = {"Authorization": f"Bearer {token}"}
+    response_before = await http_client.get(package_url, headers=headers)
+    response_revoke = await http_client.delete(
+        f"/internal/v1/users/{user_in_db.id}/tokens",
+        headers={"accept": "application/json"},
+    )
+    response_after = await http_client.get(package_url, headers=headers)
+
+    assert response_before.status_code == 200
+    assert response_revoke.status_code == 200
+    assert response_revoke.json() == "All tokens of the user have been revoked"
+    assert response_after.status_code == 401
+    assert response_after.json() == {"detail": "The token you have used was revoked"}
+
+
+@pytest.mark.asyncio
+async def test_revoke_user_tokens_endpoint_404(http_client):
+    invalid_id = -5
+    response = await http_client.delete(
+        f"/internal/v1/users/{invalid_id}/tokens",
+        headers={"accept": "application/json"},
+    )
+    assert response.status_code == 404
+    assert response.json() == {
+        "detail": "The user with the id requested does not exist"
+    }
+
+
+@pytest.mark.asyncio
+async def test_introspect_tokens_endpoint_200(http_client, token_in_db):
+    invalid_token = "IvalidToken"
+    response = await http_client.post(
+        "/internal/v1/tokens/introspect",
+        json={"tokens": [token_in_db.token, invalid_token]},
+    )
+
+    assert response.status_code == 200
+    active_token, inactive_token = response.json()
+    assert active_token["active"] is True
+    assert active_token["user_id"] == token_in_db.user_id
+    assert active_token["exp"] is not None
+    assert inactive_token == {"active": False, "user_id": None, "exp": None}
+
+
+@pytest.mark.asyncio
+async def test_introspect_deleted_token_is_inactive(http_client, token_in_db):
+    await http_client.delete(
+        f"/internal/v1/users/{token_in_db.user_id}/token/{token_in_db.token}",
+        headers={"accept": "application/json"},
+    )
+    response = await http_client.post(
+        "/internal/v1/tokens/introspect", json={"tokens": [token_in_db.token]}
+    )
+
+    assert response.status_code == 200
+    assert response.json() == [{"active": False, "user_id": None, "exp": None}]
+
+
+@pytest.mark.asyncio
+async def test_introspect_tokens_endpoint_422(http_client):
+    response = await http_client.post(
+        "/internal/v1/tokens/introspect", json={"tokens": []}
+    )
+    assert response.status_code == 422
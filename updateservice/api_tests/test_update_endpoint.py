@@ -0,0 +1,159 @@
+import pytest
+
+from updateservice.models.package import Package
+
+
+@pytest.fixture
+def versions_in_db(db_async_session, application_in_db):
+    async def add_versions(*versions, with_file=True):
+        packages = [
+            Package(
+                application_id=application_in_db.id,
+                version=version,
+                hash=f"{index:064x}" if with_file else None,
+                size=index,
+                url=f"/v1/applications/{application_in_db.id}/packages/{index}/file",
+            )
+            for index, version in enumerate(versions, start=1)
+        ]
+        db_async_session.add_all(packages)
+        await db_async_session.commit()
+        return packages
+
+    return add_versions
+
+
+@pytest.mark.asyncio
+async def test_check_for_update_200(
+    http_client, token_in_db, application_in_db, versions_in_db
+):
+    packages = await versions_in_db("1.2.0", "1.10.0", "1.9.5")
+    updates_url = f"/v1/applications/{application_in_db.id}/updates"
+    headers = {"Authorization": f"Bearer {token_in_db.token}"}
+
+    response_old = await http_client.get(
+        f"{updates_url}?current_version=1.2.0", headers=headers
+    )
+    response_current = await http_client.get(
+        f"{updates_url}?current_version=1.10.0", headers=headers
+    )
+
+    assert response_old.status_code == 200
+    assert response_old.json() == {
+        "application_id": application_in_db.id,
+        "current_version": "1.2.0",
+        "update_available": True,
+        "latest": {
+            "id": packages[1].id,
+            "version": "1.10.0",
+            "hash": packages[1].hash,
+            "size": packages[1].size,
+            "url": packages[1].url,
+        },
+    }
+    assert response_current.json()["update_available"] is False
+    assert response_current.json()["latest"] is None
+
+
+@pytest.mark.asyncio
+async def test_check_for_update_skips_packages_without_file(
+    http_client, token_in_db, application_in_db, versions_in_db
+):
+    await versions_in_db("2.0.0", with_file=False)
+
+    response = await http_client.get(
+        f"/v1/applications/{application_in_db.id}/updates?current_version=1.0.0",
+        headers={"Authorization": f"Bearer {token_in_db.token}"},
+    )
+
+    assert response.json()["update_available"] is False
+
+
+@pytest.mark.asyncio
+async def test_check_for_update_after_delete(
+    http_client, token_in_db, application_in_db, versions_in_db
+):
+    packages = await versions_in_db("1.0.0", "2.0.0")
+    updates_url = f"/v1/applications/{application_in_db.id}/updates"
+    headers = {"Authorization": f"Bearer {token_in_db.token}"}
+
+    response_before = await http_client.get(
+        f"{updates_url}?current_version=0.1.0", headers=headers
+    )
+    await http_client.delete(
+        f"/v1/applications/{application_in_db.id}/packages/{packages[1].id}",
+        headers=headers,
+    )
+    response_after = await http_client.get(
+        f"{updates_url}?current_version=0.1.0", headers=headers
+    )
+
+    assert response_before.json()["latest"]["version"] == "2.0.0"
+    assert response_after.json()["latest"]["version"] == "1.0.0"
+
+
+@pytest.mark.asyncio
+async def test_check_for_update_404_app_id(http_client, token_in_db):
+    response = await http_client.get(
+        "/v1/applications/0/updates?current_version=1.0.0",
+        headers={"Authorization": f"Bearer {token_in_db.token}"},
+    )
+
+    assert response.status_code == 404
+    assert response.json() == {
+        "detail": "The application with the id requested does not exist"
+    }
+
+
+@pytest.mark.asyncio
+async def test_check_for_update_422_version(http_client, token_in_db):
+    response = await http_client.get(
+        "/v1/applications/1/updates?current_version=latest",
+        headers={"Authorization": f"Bearer {token_in_db.token}"},
+    )
+
+    assert response.status_code == 422
+
+
+@pytest.mark.asyncio
+async def test_check_for_updates_batch_200(
+    http_client, token_in_db, application_in_db, versions_in_db
+):
+    packages = await versions_in_db("1.0.0", "2.0.0")
+
+    response = await http_client.post(
+        "/v1/updates",
+        json={
+            "checks": [
+                {"application_id": application_in_db.id, "current_version": "1.0.0"},
+                {"application_id": application_in_db.id, "current_version": "2.0.0"},
+                {"application_id": 0, "current_version": "1.0.0"},
+            ]
+        },
+        headers={"Authorization": f"Bearer {token_in_db.token}"},
+    )
+
+    assert response.status_code == 200
+    results = response.json()
+    assert results[0]["update_available"] is True
+    assert results[0]["latest"]["id"] == packages[1].id
+    assert results[1]["update_available"] is False
+    assert results[1]["application_found"] is True
+    assert results[2] == {
+        "application_id": 0,
+        "current_version": "1.0.0",
+        "update_available": False,
+        "latest": None,
+        "application_found": False,
+    }
+
+
+@pytest.mark.asyncio
+async def test_check_for_updates_batch_422_version(http_client, token_in_db):
+    response = await http_client.post(
+        "/v1/updates",
+        json={"checks": [{"application_id": 1, "current_version": "latest"}]},
+        headers={"Authorization": f"Bearer {token_in_db.token}"},
+    )
+
+    assert response.status_code == 422
@@ -0,0 +1,244 @@
+import hashlib
+import os
+import shutil
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import update
+
+from updateservice import tasks
+from updateservice.models.upload_session import UploadSession
+from updateservice.repositories import upload_session_repo
+from updateservice.utils.storage import blob_key, upload_key
+
+
+@pytest.mark.asyncio
+async def test_resumable_upload_200(http_client, token_in_db, package_in_db):
+    headers = {"Authorization": f"Bearer {token_in_db.token}"}
+    uploads_url = f"/v1/applications/{package_in_db.application_id}/packages/{package_in_db.id}/uploads"
+    content = b"first chunk|second chunk"
+
+    response_create = await http_client.post(
+        uploads_url,
+        json={"filename": "firmware.bin", "size": len(content)},
+        headers=headers,
+    )
+    upload_url = f"{uploads_url}/{response_create.json()['id']}"
+    response_first = await http_client.put(
+        f"{upload_url}?offset=0", content=content[:12], headers=headers
+    )
+    response_progress = await http_client.get(upload_url, headers=headers)
+    response_second = await http_client.put(
+        f"{upload_url}?offset=12", content=content[12:], headers=headers
+    )
+    response_finalize = await http_client.post(
+        f"{upload_url}/finalize", headers=headers
+    )
+    shutil.rmtree(f"{os.getcwd()}/Storage/blobs", ignore_errors=True)
+
+    assert response_create.status_code == 201
+    assert response_create.json()["offset"] == 0
+    assert response_first.status_code == 200
+    assert response_progress.json()["offset"] == 12
+    assert response_second.json()["offset"] == len(content)
+    assert response_finalize.status_code == 200
+    data = response_finalize.json()
+    assert data["file"] == "firmware.bin"
+    assert data["size"] == len(content)
+    assert data["hash"] == hashlib.sha256(content).hexdigest()
+
+
+@pytest.mark.asyncio
+async def test_resumable_upload_ignores_bytes_past_offset(
+    http_client, token_in_db, package_in_db
+):
+    headers = {"Authorization": f"Bearer {token_in_db.token}"}
+    uploads_url = f"/v1/applications/{package_in_db.application_id}/packages/{package_in_db.id}/uploads"
+    content = b"committed chunk"
+    response_create = await http_client.post(
+        uploads_url, json={"filename": "firmware.bin"}, headers=headers
+    )
+    upload_id = response_create.json()["id"]
+    await http_client.put(
+        f"{uploads_url}/{upload_id}?offset=0", content=content, headers=headers
+    )
+    # bytes of an interrupted chunk whose offset was never committed
+    with open(upload_session_repo.upload_part_location(upload_id), "ab") as f:
+        f.write(b"interrupted")
+
+    response_finalize = await http_client.post(
+        f"{uploads_url}/{upload_id}/finalize", headers=headers
+    )
+    shutil.rmtree(f"{os.getcwd()}/Storage/blobs", ignore_errors=True)
+
+    assert response_finalize.status_code == 200
+    assert response_finalize.json()["size"] == len(content)
+    assert response_finalize.json()["hash"] == hashlib.sha256(content).hexdigest()
+
+
+@pytest.mark.asyncio
+async def test_expired_upload_session_is_removed(
+    http_client, token_in_db, package_in_db, db_async_session
+):
+    headers = {"Authorization": f"Bearer {token_in_db.token}"}
+    uploads_url = f"/v1/applications/{package_in_db.application_id}/packages/{package_in_db.id}/uploads"
+    response_create = await http_client.post(
+        uploads_url, json={"filename": "firmware.bin"}, headers=headers
+    )
+    upload_id = response_create.json()["id"]
+    await http_client.put(
+        f"{uploads_url}/{upload_id}?offset=0", content=b"abandoned", headers=headers
+    )
+    await db_async_session.execute(
+        update(UploadSession)
+        .where(UploadSession.id == upload_id)
+        .values(expires_at=datetime.utcnow() - timedelta(seconds=1))
+    )
+    await db_async_session.commit()
+
+    report = await tasks.expire_upload_sessions()
+    response_status = await http_client.get(
+        f"{uploads_url}/{upload_id}", headers=headers
+    )
+
+    assert response_create.json()["expires_at"] is not None
+    assert report["removed"] >= 1
+    assert response_status.status_code == 404
+    assert not os.path.exists(upload_session_repo.upload_part_location(upload_id))
+
+
+@pytest.mark.asyncio
+async def test_resumable_upload_409_offset(http_client, token_in_db, package_in_db):
+    headers = {"Authorization": f"Bearer {token_in_db.token}"}
+    uploads_url = f"/v1/applications/{package_in_db.application_id}/packages/{package_in_db.id}/uploads"
+
+    response_create = await http_client.post(
+        uploads_url, json={"filename": "firmware.bin"}, headers=headers
+    )
+    response_chunk = await http_client.put(
+        f"{uploads_url}/{response_create.json()['id']}?offset=5",
+        content=b"chunk",
+        headers=headers,
+    )
+
+    assert response_chunk.status_code == 409
+    assert response_chunk.json() == {
+        "detail": "Upload offset does not match, expected offset 0"
+    }
+
+
+@pytest.mark.asyncio
+async def test_resumable_upload_400_incomplete(http_client, token_in_db, package_in_db):
+    headers = {"Authorization": f"Bearer {token_in_db.token}"}
+    uploads_url = f"/v1/applications/{package_in_db.application_id}/packages/{package_in_db.id}/uploads"
+
+    response_create = await http_client.post(
+        uploads_url, json={"filename": "firmware.bin", "size": 10}, headers=headers
+    )
+    response_finalize = await http_client.post(
+        f"{uploads_url}/{response_create.json()['id']}/finalize", headers=headers
+    )
+
+    assert response_finalize.status_code == 400
+    assert response_finalize.json() == {
+        "detail": "Upload does not match the declared size of 10 bytes"
+    }
+
+
+@pytest.mark.asyncio
+async def test_resumable_upload_404_upload_id(http_client, token_in_db, package_in_db):
+    response = await http_client.get(
+        f"/v1/applications/{package_in_db.application_id}/packages/{package_in_db.id}/uploads/invalid",
+        headers={"Authorization": f"Bearer {token_in_db.token}"},
+    )
+    assert response.status_code == 404
+    assert response.json() == {
+        "detail": "The upload session with the id requested does not exist"
+    }
+
+
+@pytest.mark.asyncio
+async def test_direct_upload_200(
+    http_client, token_in_db, package_in_db, object_storage
+):
+    client = object_storage.client
+    headers = {"Authorization": f"Bearer {token_in_db.token}"}
+    package_url = (
+        f"/v1/applications/{package_in_db.application_id}/packages/{package_in_db.id}"
+    )
+    content = b"firmware uploaded straight to the bucket"
+    file_hash = hashlib.sha256(content).hexdigest()
+
+    response_create = await http_client.post(
+        f"{package_url}/direct-uploads",
+        json={"filename": "firmware.bin", "size": len(content), "hash": file_hash},
+        headers=headers,
+    )
+    upload_id = response_create.json()["id"]
+    upload_url = f"{package_url}/direct-uploads/{upload_id}"
+    response_early = await http_client.post(f"{upload_url}/finalize", headers=headers)
+    client.put("packages", upload_key(upload_id), content)
+    response_finalize = await http_client.post(
+        f"{upload_url}/finalize", headers=headers
+    )
+    report = await tasks.verify_direct_uploads()
+    response_status = await http_client.get(upload_url, headers=headers)
+    response_package = await http_client.get(package_url, headers=headers)
+
+    assert response_create.status_code == 201
+    assert response_create.json()["url"].startswith("http://objects/packages/uploads/")
+    assert response_early.status_code == 409
+    assert response_finalize.status_code == 202
+    assert response_finalize.json()["status"] == "verifying"
+    assert report == {"verified": 1, "failed": 0}
+    assert response_status.json()["status"] == "completed"
+    assert response_package.json()["hash"] == file_hash
+    assert response_package.json()["size"] == len(content)
+    assert ("packages", blob_key(file_hash)) in client.objects
+    assert ("packages", upload_key(upload_id)) not in client.objects
+
+
+@pytest.mark.asyncio
+async def test_direct_upload_completes_after_interrupted_move(
+    http_client, token_in_db, package_in_db, object_storage
+):
+    client = object_storage.client
+    headers = {"Authorization": f"Bearer {token_in_db.token}"}
+    package_url = (
+        f"/v1/applications/{package_in_db.application_id}/packages/{package_in_db.id}"
+    )
+    content = b"firmware moved before the verification committed"
+    file_hash = hashlib.sha256(content).hexdigest()
+    response_create = await http_client.post(
+        f"{package_url}/direct-uploads",
+        json={"filename": "firmware.bin", "size": len(content), "hash": file_hash},
+        headers=headers,
+    )
+    upload_id = response_create.json()["id"]
+    client.put("packages", upload_key(upload_id), content)
+    await http_client.post(
+        f"{package_url}/direct-uploads/{upload_id}/finalize", headers=headers
+    )
+    client.objects[("packages", blob_key(file_hash))] = client.objects.pop(
+        ("packages", upload_key(upload_id))
+    )
+
+    report = await tasks.verify_direct_uploads()
+    response_package = await http_client.get(package_url, headers=headers)
+
+    assert report == {"verified": 1, "failed": 0}
+    assert response_package.json()["hash"] == file_hash
+
+
+@pytest.mark.asyncio
+async def test_direct_upload_409_local_storage(http_client, token_in_db, package_in_db):
+    response = await http_client.post(
+        f"/v1/applications/{package_in_db.application_id}/packages/{package_in_db.id}/direct-uploads",
+        json={"filename": "firmware.bin", "size": 1, "hash": "0" * 64},
+        headers={"Authorization": f"Bearer {token_in_db.token}"},
+    )
+
+    assert response.status_code == 409
+    assert response.json() == {
+        "detail": "Direct uploads need an object storage backend"
+    }
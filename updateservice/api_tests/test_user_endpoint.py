@@ -1,5 +1,6 @@
 import pytest
 
+from updateservice.repositories.user_repo import last_login_buffer
 from updateservice.settings import setting
 
 max_int = setting["POSTGRES_MAX_INT"]
@@ -140,3 +141,16 @@ async def test_search_user_404(http_client, user_in_db):
     )
     assert response.status_code == 404
     assert response.json() == {"detail": f"No users found for '{search}'"}
+
+
+@pytest.mark.asyncio
+async def test_last_login_is_flushed_in_batch(http_client, token_in_db, package_in_db):
+    await last_login_buffer.flush()
+    response = await http_client.get(
+        f"/v1/applications/{package_in_db.application_id}/packages/{package_in_db.id}",
+        headers={"Authorization": f"Bearer {token_in_db.token}"},
+    )
+    assert response.status_code == 200
+    assert len(last_login_buffer) == 1
+    assert await last_login_buffer.flush() == 1
+    assert len(last_login_buffer) == 0
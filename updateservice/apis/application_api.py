@@ -1,6 +1,6 @@
 from typing import List
 
-from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
 from sqlalchemy.exc import IntegrityError
 
 from updateservice.models.schema_application import (
@@ -11,6 +11,7 @@ from updateservice.models.schema_application import (
 )
 from updateservice.repositories.application_repo import ApplicationRepo
 from updateservice.settings import setting
+from updateservice.utils.etags import generation_etag, not_modified
 from updateservice.utils.exceptions import (
     ApplicationNotFoundError,
     InvalidIdError,
@@ -44,7 +45,7 @@ def pagination_offset(
 async def create_new_application(
     team_id: int,
     app: ApplicationCreate,
-    db_session: ApplicationRepo = Depends(ApplicationRepo),
+    db_session: ApplicationRepo = Depends(ApplicationRepo.dependency),
 ):
     try:
         created_application = await db_session.create_application(team_id, app)
@@ -67,7 +68,7 @@ async def applications_list(
     page: int,
     size: int,
     search: str = None,
-    db_session: ApplicationRepo = Depends(ApplicationRepo),
+    db_session: ApplicationRepo = Depends(ApplicationRepo.dependency),
     offset: int = Depends(pagination_offset),
 ):
     try:
@@ -94,7 +95,7 @@ async def update_application_details(
     team_id: int,
     application_id: int,
     app: ApplicationPatch,
-    db_session: ApplicationRepo = Depends(ApplicationRepo),
+    db_session: ApplicationRepo = Depends(ApplicationRepo.dependency),
 ):
     if not app.dict(exclude_unset=True):
         raise HTTPException(
@@ -117,8 +118,18 @@ async def update_application_details(
 async def get_application_details(
     team_id: int,
     application_id: int,
-    db_session: ApplicationRepo = Depends(ApplicationRepo),
+    request: Request,
+    response: Response,
+    db_session: ApplicationRepo = Depends(ApplicationRepo.dependency),
 ):
+    # read before the application so a concurrent write only makes the tag stale
+    generation = await db_session.get_generation(application_id, team_id)
+    if generation is not None:
+        etag = generation_etag(application_id, generation)
+        cached = not_modified(request, etag)
+        if cached is not None:
+            return cached
+        response.headers["etag"] = etag
     try:
         get_application, groups_ids = await db_session.get_app(team_id, application_id)
     except InvalidIdError as e:
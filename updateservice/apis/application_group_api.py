@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query, status
 from sqlalchemy.exc import IntegrityError
 
 from updateservice.models.schema_application_group import (
@@ -10,6 +10,7 @@ from updateservice.repositories.application_group_repo import (
     ApplicationGroupRepo,
     GroupRepo,
 )
+from updateservice.repositories.manifest_repo import ManifestRepo
 from updateservice.utils.exceptions import (
     AlreadyAssignedError,
     ApplicationAssignedError,
@@ -24,7 +25,7 @@ router = APIRouter()
     "/v1/groups", response_model=GroupBase, status_code=status.HTTP_201_CREATED
 )
 async def create_new_group(
-    group: GroupCreate, db_session: GroupRepo = Depends(GroupRepo)
+    group: GroupCreate, db_session: GroupRepo = Depends(GroupRepo.dependency)
 ):
 
     try:
@@ -44,7 +45,8 @@ async def create_new_group(
 async def assign_application_to_group(
     application_id: int,
     group_id: int,
-    db_session: ApplicationGroupRepo = Depends(ApplicationGroupRepo),
+    background_tasks: BackgroundTasks,
+    db_session: ApplicationGroupRepo = Depends(ApplicationGroupRepo.dependency),
 ):
     try:
         assign_app_group = await db_session.create_application_group(
@@ -54,6 +56,7 @@ async def assign_application_to_group(
         raise HTTPException(status_code=404, detail=e.message)
     except AlreadyAssignedError as e:
         raise HTTPException(status_code=400, detail=e.message)
+    background_tasks.add_task(ManifestRepo().refresh_group, group_id)
     return assign_app_group
 
 
@@ -63,7 +66,8 @@ async def assign_application_to_group(
 )
 async def delete_a_group(
     group_id: int,
-    db_session: GroupRepo = Depends(GroupRepo),
+    background_tasks: BackgroundTasks,
+    db_session: GroupRepo = Depends(GroupRepo.dependency),
 ):
     try:
         group_deleted = await db_session.delete_group(group_id)
@@ -71,6 +75,7 @@ async def delete_a_group(
         raise HTTPException(status_code=404, detail=e.message)
     except ApplicationAssignedError as e:
         raise HTTPException(status_code=400, detail=e.message)
+    background_tasks.add_task(ManifestRepo().remove_group, group_id)
     return group_deleted
 
 
@@ -78,7 +83,8 @@ async def delete_a_group(
 async def unassign_application_from_group(
     application_id: int,
     group_id: int,
-    db_session: ApplicationGroupRepo = Depends(ApplicationGroupRepo),
+    background_tasks: BackgroundTasks,
+    db_session: ApplicationGroupRepo = Depends(ApplicationGroupRepo.dependency),
 ):
     try:
         unassigned_app = await db_session.unassign_application(application_id, group_id)
@@ -86,4 +92,5 @@ async def unassign_application_from_group(
         raise HTTPException(status_code=404, detail=e.message)
     except NotAssignedError as e:
         raise HTTPException(status_code=404, detail=e.message)
+    background_tasks.add_task(ManifestRepo().refresh_group, group_id)
     return unassigned_app
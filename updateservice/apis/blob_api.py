@@ -0,0 +1,20 @@
+from fastapi import APIRouter, Depends, Path, Query, status
+
+from updateservice.models.schema_blob import BlobStatus
+from updateservice.repositories.blob_repo import BlobRepo
+
+router = APIRouter()
+
+
+@router.get(
+    "/v1/blobs/{file_hash}",
+    response_model=BlobStatus,
+    status_code=status.HTTP_200_OK,
+)
+async def check_blob(
+    file_hash: str = Path(..., regex="^[0-9a-f]{64}$"),
+    size: int = Query(..., ge=0, description="Size of the file in bytes"),
+    db_session: BlobRepo = Depends(BlobRepo.dependency),
+):
+    blob_exists = await db_session.check_blob(file_hash, size)
+    return BlobStatus(hash=file_hash, size=size, exists=blob_exists)
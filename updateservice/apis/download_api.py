@@ -0,0 +1,54 @@
+import time
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from fastapi.responses import RedirectResponse
+
+from updateservice.repositories.package_repo import DownloadPackageRepo
+from updateservice.utils.exceptions import InvalidIdError
+from updateservice.utils.file_responses import package_file_response
+from updateservice.utils.signed_urls import verify_download_signature
+from updateservice.utils.storage import get_storage
+
+router = APIRouter()
+
+
+@router.get(
+    "/v1/downloads/applications/{application_id}/packages/{package_id}/file",
+    status_code=status.HTTP_200_OK,
+)
+async def download_signed_file(
+    application_id: int,
+    package_id: int,
+    request: Request,
+    hash: str = Query(...),
+    expires: int = Query(...),
+    signature: str = Query(...),
+    db_session: DownloadPackageRepo = Depends(DownloadPackageRepo.dependency),
+):
+    if not verify_download_signature(
+        application_id, package_id, hash, expires, signature
+    ):
+        raise HTTPException(status_code=403, detail="Download link is not valid")
+    if expires < time.time():
+        raise HTTPException(status_code=403, detail="Download link has expired")
+    accept_encoding = request.headers.get("accept-encoding")
+    try:
+        if get_storage().redirects:
+            url = await db_session.download_url(
+                application_id, package_id, accept_encoding, hash
+            )
+            if url is not None:
+                await db_session.release()
+                return RedirectResponse(
+                    url, status_code=302, headers={"vary": "accept-encoding"}
+                )
+        location, download_file, file_hash = await db_session.download_package(
+            application_id, package_id, hash
+        )
+    except InvalidIdError as e:
+        raise HTTPException(status_code=404, detail=e.message)
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    variant = await db_session.select_variant(file_hash, accept_encoding)
+    await db_session.release()
+    return package_file_response(request, location, download_file, file_hash, variant)
@@ -0,0 +1,56 @@
+import os
+
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from fastapi.responses import FileResponse
+
+from updateservice.repositories.manifest_repo import ManifestRepo
+from updateservice.utils.etags import not_modified
+from updateservice.utils.exceptions import InvalidIdError
+from updateservice.utils.manifests import manifest_store
+
+router = APIRouter()
+
+
+def manifest_response(request: Request, location: str):
+    stat_result = os.stat(location)
+    etag = f'"{stat_result.st_mtime_ns:x}-{stat_result.st_size:x}"'
+    cached = not_modified(request, etag)
+    if cached is not None:
+        return cached
+    return FileResponse(location, media_type="application/json", headers={"etag": etag})
+
+
+@router.get(
+    "/v1/applications/{application_id}/manifest",
+    status_code=status.HTTP_200_OK,
+)
+async def get_application_manifest(
+    application_id: int,
+    request: Request,
+    db_session: ManifestRepo = Depends(ManifestRepo.dependency),
+):
+    location = manifest_store.application_location(application_id)
+    if not os.path.exists(location):
+        try:
+            await db_session.refresh_application(application_id)
+        except InvalidIdError as e:
+            raise HTTPException(status_code=404, detail=e.message)
+    return manifest_response(request, location)
+
+
+@router.get(
+    "/v1/groups/{group_id}/manifest",
+    status_code=status.HTTP_200_OK,
+)
+async def get_group_manifest(
+    group_id: int,
+    request: Request,
+    db_session: ManifestRepo = Depends(ManifestRepo.dependency),
+):
+    location = manifest_store.group_location(group_id)
+    if not os.path.exists(location):
+        try:
+            await db_session.refresh_group(group_id)
+        except InvalidIdError as e:
+            raise HTTPException(status_code=404, detail=e.message)
+    return manifest_response(request, location)
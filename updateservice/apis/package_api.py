@@ -1,17 +1,46 @@
+from datetime import datetime
 from typing import List
 
-from fastapi import APIRouter, Depends, File, HTTPException, Query, UploadFile, status
-from fastapi.responses import FileResponse
+from fastapi import (
+    APIRouter,
+    BackgroundTasks,
+    Depends,
+    File,
+    HTTPException,
+    Query,
+    Request,
+    Response,
+    UploadFile,
+    status,
+)
+from fastapi.responses import RedirectResponse
 
-from updateservice.models.schema_package import PackageBase, PackageCreate, PackageList
+from updateservice.models.schema_blob import BlobAttach
+from updateservice.models.schema_package import (
+    PackageBase,
+    PackageCreate,
+    PackageList,
+    SignedDownloadUrl,
+)
 from updateservice.repositories.application_repo import ApplicationRepo
+from updateservice.repositories.delta_repo import DeltaRepo
+from updateservice.repositories.manifest_repo import ManifestRepo
 from updateservice.repositories.package_repo import (
+    AttachBlobRepo,
     DownloadPackageRepo,
     PackageRepo,
     UpdatePackageRepo,
 )
 from updateservice.settings import setting
-from updateservice.utils.exceptions import InvalidIdError
+from updateservice.utils.etags import generation_etag, not_modified
+from updateservice.utils.exceptions import (
+    BlobNotFoundError,
+    InvalidAppIdError,
+    InvalidIdError,
+)
+from updateservice.utils.file_responses import package_file_response
+from updateservice.utils.signed_urls import sign_download_url
+from updateservice.utils.storage import get_storage
 
 router = APIRouter()
 
@@ -40,12 +69,14 @@ def pagination_offset(
 async def create_new_package(
     application_id: int,
     package: PackageCreate,
-    db_session: PackageRepo = Depends(PackageRepo),
+    background_tasks: BackgroundTasks,
+    db_session: PackageRepo = Depends(PackageRepo.dependency),
 ):
     try:
         created_package = await db_session.create_package(application_id, package)
     except InvalidIdError as e:
         raise HTTPException(status_code=404, detail=e.message)
+    background_tasks.add_task(ManifestRepo().refresh_application, application_id)
     return created_package
 
 
@@ -54,12 +85,16 @@ async def create_new_package(
     status_code=status.HTTP_200_OK,
 )
 async def delete_a_package(
-    application_id: int, package_id: int, db_session: PackageRepo = Depends(PackageRepo)
+    application_id: int,
+    package_id: int,
+    background_tasks: BackgroundTasks,
+    db_session: PackageRepo = Depends(PackageRepo.dependency),
 ):
     try:
         deleted_package = await db_session.delete_package(application_id, package_id)
     except InvalidIdError as e:
         raise HTTPException(status_code=404, detail=e.message)
+    background_tasks.add_task(ManifestRepo().refresh_application, application_id)
     return deleted_package
 
 
@@ -69,8 +104,21 @@ async def delete_a_package(
     status_code=status.HTTP_200_OK,
 )
 async def get_package_details(
-    application_id: int, package_id: int, db_session: PackageRepo = Depends(PackageRepo)
+    application_id: int,
+    package_id: int,
+    request: Request,
+    response: Response,
+    db_session: PackageRepo = Depends(PackageRepo.dependency),
+    app_generation: ApplicationRepo = Depends(ApplicationRepo.dependency),
 ):
+    # read before the package so a concurrent write only makes the tag stale
+    generation = await app_generation.get_generation(application_id)
+    if generation is not None:
+        etag = generation_etag(application_id, generation)
+        cached = not_modified(request, etag)
+        if cached is not None:
+            return cached
+        response.headers["etag"] = etag
     try:
         the_package = await db_session.get_package(application_id, package_id)
     except InvalidIdError as e:
@@ -87,14 +135,23 @@ async def list_of_packages(
     application_id: int,
     page: int,
     size: int,
-    db_session: PackageRepo = Depends(PackageRepo),
-    app_exists: ApplicationRepo = Depends(ApplicationRepo),
+    request: Request,
+    response: Response,
+    db_session: PackageRepo = Depends(PackageRepo.dependency),
+    app_generation: ApplicationRepo = Depends(ApplicationRepo.dependency),
     offset: int = Depends(pagination_offset),
 ):
     try:
-        await app_exists.check_app_exists(application_id)
+        generation = await app_generation.get_generation(application_id)
+        if generation is None:
+            raise InvalidAppIdError
     except InvalidIdError as e:
         raise HTTPException(status_code=404, detail=e.message)
+    etag = generation_etag(application_id, generation)
+    cached = not_modified(request, etag)
+    if cached is not None:
+        return cached
+    response.headers["etag"] = etag
     try:
         packages_list = await db_session.list_packages(
             application_id, limit=size, offset=offset
@@ -116,8 +173,9 @@ async def list_of_packages(
 async def upload_a_file(
     application_id: int,
     package_id: int,
+    background_tasks: BackgroundTasks,
     file: UploadFile = File(...),
-    db_session: UpdatePackageRepo = Depends(UpdatePackageRepo),
+    db_session: UpdatePackageRepo = Depends(UpdatePackageRepo.dependency),
 ):
     try:
         updated_package = await db_session.update_package(
@@ -125,6 +183,29 @@ async def upload_a_file(
         )
     except InvalidIdError as e:
         raise HTTPException(status_code=404, detail=e.message)
+    background_tasks.add_task(ManifestRepo().refresh_application, application_id)
+    return updated_package
+
+
+@router.post(
+    "/v1/applications/{application_id}/packages/{package_id}/file/blob",
+    response_model=PackageBase,
+    status_code=status.HTTP_200_OK,
+)
+async def attach_a_blob(
+    application_id: int,
+    package_id: int,
+    blob: BlobAttach,
+    background_tasks: BackgroundTasks,
+    db_session: AttachBlobRepo = Depends(AttachBlobRepo.dependency),
+):
+    try:
+        updated_package = await db_session.attach_package_blob(
+            application_id, package_id, blob
+        )
+    except (InvalidIdError, BlobNotFoundError) as e:
+        raise HTTPException(status_code=404, detail=e.message)
+    background_tasks.add_task(ManifestRepo().refresh_application, application_id)
     return updated_package
 
 
@@ -135,14 +216,90 @@ async def upload_a_file(
 async def download_a_file(
     application_id: int,
     package_id: int,
-    db_session: DownloadPackageRepo = Depends(DownloadPackageRepo),
+    request: Request,
+    db_session: DownloadPackageRepo = Depends(DownloadPackageRepo.dependency),
 ):
+    accept_encoding = request.headers.get("accept-encoding")
     try:
-        location, download_file = await db_session.download_package(
+        if get_storage().redirects:
+            url = await db_session.download_url(
+                application_id, package_id, accept_encoding
+            )
+            if url is not None:
+                await db_session.release()
+                return RedirectResponse(
+                    url, status_code=302, headers={"vary": "accept-encoding"}
+                )
+        location, download_file, file_hash = await db_session.download_package(
             application_id, package_id
         )
     except InvalidIdError as e:
         raise HTTPException(status_code=404, detail=e.message)
     except FileNotFoundError as e:
         raise HTTPException(status_code=404, detail=str(e))
-    return FileResponse(location, filename=download_file)
+    variant = await db_session.select_variant(file_hash, accept_encoding)
+    await db_session.release()
+    return package_file_response(request, location, download_file, file_hash, variant)
+
+
+@router.get(
+    "/v1/applications/{application_id}/delta",
+    status_code=status.HTTP_200_OK,
+)
+async def download_a_delta(
+    application_id: int,
+    request: Request,
+    from_version: str = Query(..., description="Version installed on the device"),
+    to_version: str = Query(..., description="Version to update to"),
+    db_session: DeltaRepo = Depends(DeltaRepo.dependency),
+):
+    try:
+        (
+            location,
+            download_file,
+            file_hash,
+            source_hash,
+            delta_location,
+            url,
+        ) = await db_session.download_delta(application_id, from_version, to_version)
+    except InvalidIdError as e:
+        raise HTTPException(status_code=404, detail=e.message)
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    await db_session.release()
+    if url is not None:
+        response = RedirectResponse(url, status_code=302)
+        response.headers["x-update-kind"] = "full"
+    elif delta_location is None:
+        response = package_file_response(request, location, download_file, file_hash)
+        response.headers["x-update-kind"] = "full"
+    else:
+        response = package_file_response(
+            request,
+            delta_location,
+            f"{download_file}.delta",
+            f"{source_hash}_{file_hash}",
+        )
+        response.headers["x-update-kind"] = "delta"
+    response.headers["x-target-hash"] = file_hash
+    return response
+
+
+@router.post(
+    "/v1/applications/{application_id}/packages/{package_id}/file/url",
+    response_model=SignedDownloadUrl,
+    status_code=status.HTTP_201_CREATED,
+)
+async def create_download_url(
+    application_id: int,
+    package_id: int,
+    db_session: PackageRepo = Depends(PackageRepo.dependency),
+):
+    try:
+        the_package = await db_session.get_package(application_id, package_id)
+    except InvalidIdError as e:
+        raise HTTPException(status_code=404, detail=e.message)
+    if the_package.hash is None:
+        raise HTTPException(status_code=404, detail="File not found")
+    url, expires = sign_download_url(application_id, package_id, the_package.hash)
+    return SignedDownloadUrl(url=url, expires_at=datetime.utcfromtimestamp(expires))
@@ -30,7 +30,7 @@ def pagination_offset(
     "/internal/v1/teams", response_model=TeamBase, status_code=status.HTTP_201_CREATED
 )
 async def create_new_team(
-    newteam: TeamCreate, db_session: TeamRepo = Depends(TeamRepo)
+    newteam: TeamCreate, db_session: TeamRepo = Depends(TeamRepo.dependency)
 ):
     try:
         created_team = await db_session.create_team(newteam)
@@ -46,7 +46,7 @@ async def get_list_of_teams(
     page: int,
     size: int,
     offset: int = Depends(pagination_offset),
-    get_team_repo: GetTeamRepo = Depends(GetTeamRepo),
+    get_team_repo: GetTeamRepo = Depends(GetTeamRepo.dependency),
 ):
     list_of_all_teams = await get_team_repo.get_all_teams(limit=size, offset=offset)
     if not list_of_all_teams and page >= 1:
@@ -60,7 +60,9 @@ async def get_list_of_teams(
     status_code=status.HTTP_200_OK,
 )
 async def update_a_team_by_id(
-    team_id: int, team: TeamUpdate, update_team_repo: PutTeamRepo = Depends(PutTeamRepo)
+    team_id: int,
+    team: TeamUpdate,
+    update_team_repo: PutTeamRepo = Depends(PutTeamRepo.dependency),
 ):
     try:
         the_updated_team = await update_team_repo.update_team(team_id, team)
@@ -1,8 +1,20 @@
+from typing import List
+
 from fastapi import APIRouter, Depends, HTTPException, status
 
-from updateservice.models.schema_tokens import TokenBase, TokenPayload
-from updateservice.repositories.tokens_repo import DeleteTokenRepo, TokenRepo
+from updateservice.models.schema_tokens import (
+    TokenBase,
+    TokenIntrospectRequest,
+    TokenIntrospectResult,
+    TokenPayload,
+)
+from updateservice.repositories.tokens_repo import (
+    DeleteTokenRepo,
+    RevokeUserTokensRepo,
+    TokenRepo,
+)
 from updateservice.utils.exceptions import InvalidIdError, UserTokenNotFound
+from updateservice.utils.token_authentication import TokenIntrospection
 
 router = APIRouter()
 
@@ -14,7 +26,7 @@ router = APIRouter()
 )
 async def create_new_token(
     user_id: int,
-    db_session: TokenRepo = Depends(TokenRepo),
+    db_session: TokenRepo = Depends(TokenRepo.dependency),
 ):
     try:
 
@@ -36,7 +48,9 @@ async def create_new_token(
     status_code=status.HTTP_200_OK,
 )
 async def delete_user_token(
-    user_id: int, token: str, db_session: DeleteTokenRepo = Depends(DeleteTokenRepo)
+    user_id: int,
+    token: str,
+    db_session: DeleteTokenRepo = Depends(DeleteTokenRepo.dependency),
 ):
     try:
         delete_the_token = await db_session.delete_token(user_id, token)
@@ -45,3 +59,30 @@ async def delete_user_token(
     except UserTokenNotFound as e:
         raise HTTPException(status_code=404, detail=e.message)
     return delete_the_token
+
+
+@router.delete(
+    "/internal/v1/users/{user_id}/tokens",
+    status_code=status.HTTP_200_OK,
+)
+async def revoke_user_tokens(
+    user_id: int,
+    db_session: RevokeUserTokensRepo = Depends(RevokeUserTokensRepo.dependency),
+):
+    try:
+        revoked_tokens = await db_session.revoke_user_tokens(user_id)
+    except InvalidIdError as e:
+        raise HTTPException(status_code=404, detail=e.message)
+    return revoked_tokens
+
+
+@router.post(
+    "/internal/v1/tokens/introspect",
+    response_model=List[TokenIntrospectResult],
+    status_code=status.HTTP_200_OK,
+)
+async def introspect_tokens(
+    request: TokenIntrospectRequest,
+    introspection: TokenIntrospection = Depends(TokenIntrospection),
+):
+    return await introspection.introspect_tokens(request.tokens)
@@ -0,0 +1,62 @@
+from typing import List
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+
+from updateservice.models.schema_package import (
+    UpdateCheck,
+    UpdateCheckBatch,
+    UpdateCheckResult,
+)
+from updateservice.repositories.update_check_repo import UpdateCheckRepo
+from updateservice.utils.exceptions import InvalidIdError
+from updateservice.utils.versions import version_pattern
+
+router = APIRouter()
+
+
+@router.get(
+    "/v1/applications/{application_id}/updates",
+    response_model=UpdateCheck,
+    status_code=status.HTTP_200_OK,
+)
+async def check_for_update(
+    application_id: int,
+    current_version: str = Query(
+        ...,
+        regex=version_pattern.pattern,
+        description="Version installed on the device",
+    ),
+    db_session: UpdateCheckRepo = Depends(UpdateCheckRepo.dependency),
+):
+    try:
+        latest = await db_session.latest_package(application_id, current_version)
+    except InvalidIdError as e:
+        raise HTTPException(status_code=404, detail=e.message)
+    return UpdateCheck(
+        application_id=application_id,
+        current_version=current_version,
+        update_available=latest is not None,
+        latest=latest,
+    )
+
+
+@router.post(
+    "/v1/updates",
+    response_model=List[UpdateCheckResult],
+    status_code=status.HTTP_200_OK,
+)
+async def check_for_updates(
+    request: UpdateCheckBatch,
+    db_session: UpdateCheckRepo = Depends(UpdateCheckRepo.dependency),
+):
+    results = await db_session.latest_packages(request.checks)
+    return [
+        UpdateCheckResult(
+            application_id=check.application_id,
+            current_version=check.current_version,
+            update_available=latest is not None,
+            latest=latest,
+            application_found=found,
+        )
+        for check, (found, latest) in zip(request.checks, results)
+    ]
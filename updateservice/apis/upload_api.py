@@ -0,0 +1,189 @@
+from datetime import datetime
+
+from fastapi import (
+    APIRouter,
+    BackgroundTasks,
+    Depends,
+    HTTPException,
+    Query,
+    Request,
+    status,
+)
+
+from updateservice.models.schema_package import PackageBase
+from updateservice.models.schema_upload_session import (
+    DirectUploadBase,
+    DirectUploadCreate,
+    DirectUploadUrl,
+    UploadSessionBase,
+    UploadSessionCreate,
+)
+from updateservice.repositories.manifest_repo import ManifestRepo
+from updateservice.repositories.upload_session_repo import UploadSessionRepo
+from updateservice.utils.exceptions import (
+    DirectUploadUnavailableError,
+    InvalidIdError,
+    UploadNotReceivedError,
+    UploadOffsetError,
+    UploadSizeError,
+)
+
+router = APIRouter()
+
+
+@router.post(
+    "/v1/applications/{application_id}/packages/{package_id}/uploads",
+    response_model=UploadSessionBase,
+    status_code=status.HTTP_201_CREATED,
+)
+async def create_upload_session(
+    application_id: int,
+    package_id: int,
+    upload: UploadSessionCreate,
+    db_session: UploadSessionRepo = Depends(UploadSessionRepo.dependency),
+):
+    try:
+        created_upload = await db_session.create_upload(
+            application_id, package_id, upload
+        )
+    except InvalidIdError as e:
+        raise HTTPException(status_code=404, detail=e.message)
+    return created_upload
+
+
+@router.get(
+    "/v1/applications/{application_id}/packages/{package_id}/uploads/{upload_id}",
+    response_model=UploadSessionBase,
+    status_code=status.HTTP_200_OK,
+)
+async def get_upload_session(
+    application_id: int,
+    package_id: int,
+    upload_id: str,
+    db_session: UploadSessionRepo = Depends(UploadSessionRepo.dependency),
+):
+    try:
+        the_upload = await db_session.get_upload(application_id, package_id, upload_id)
+    except InvalidIdError as e:
+        raise HTTPException(status_code=404, detail=e.message)
+    return the_upload
+
+
+@router.put(
+    "/v1/applications/{application_id}/packages/{package_id}/uploads/{upload_id}",
+    response_model=UploadSessionBase,
+    status_code=status.HTTP_200_OK,
+)
+async def upload_chunk(
+    application_id: int,
+    package_id: int,
+    upload_id: str,
+    request: Request,
+    offset: int = Query(..., ge=0, description="Byte offset of the chunk"),
+    db_session: UploadSessionRepo = Depends(UploadSessionRepo.dependency),
+):
+    try:
+        the_upload = await db_session.write_chunk(
+            application_id, package_id, upload_id, offset, request.stream()
+        )
+    except InvalidIdError as e:
+        raise HTTPException(status_code=404, detail=e.message)
+    except UploadOffsetError as e:
+        raise HTTPException(status_code=409, detail=e.message)
+    except UploadSizeError as e:
+        raise HTTPException(status_code=400, detail=e.message)
+    return the_upload
+
+
+@router.post(
+    "/v1/applications/{application_id}/packages/{package_id}/uploads/{upload_id}/finalize",
+    response_model=PackageBase,
+    status_code=status.HTTP_200_OK,
+)
+async def finalize_upload_session(
+    application_id: int,
+    package_id: int,
+    upload_id: str,
+    background_tasks: BackgroundTasks,
+    db_session: UploadSessionRepo = Depends(UploadSessionRepo.dependency),
+):
+    try:
+        updated_package = await db_session.finalize_upload(
+            application_id, package_id, upload_id
+        )
+    except InvalidIdError as e:
+        raise HTTPException(status_code=404, detail=e.message)
+    except UploadSizeError as e:
+        raise HTTPException(status_code=400, detail=e.message)
+    background_tasks.add_task(ManifestRepo().refresh_application, application_id)
+    return updated_package
+
+
+@router.post(
+    "/v1/applications/{application_id}/packages/{package_id}/direct-uploads",
+    response_model=DirectUploadUrl,
+    status_code=status.HTTP_201_CREATED,
+)
+async def create_direct_upload(
+    application_id: int,
+    package_id: int,
+    upload: DirectUploadCreate,
+    db_session: UploadSessionRepo = Depends(UploadSessionRepo.dependency),
+):
+    try:
+        created_upload, url, expires = await db_session.create_direct_upload(
+            application_id, package_id, upload
+        )
+    except InvalidIdError as e:
+        raise HTTPException(status_code=404, detail=e.message)
+    except DirectUploadUnavailableError as e:
+        raise HTTPException(status_code=409, detail=e.message)
+    return DirectUploadUrl(
+        **DirectUploadBase.from_orm(created_upload).dict(),
+        url=url,
+        expires_at=datetime.utcfromtimestamp(expires),
+    )
+
+
+@router.get(
+    "/v1/applications/{application_id}/packages/{package_id}/direct-uploads/{upload_id}",
+    response_model=DirectUploadBase,
+    status_code=status.HTTP_200_OK,
+)
+async def get_direct_upload(
+    application_id: int,
+    package_id: int,
+    upload_id: str,
+    db_session: UploadSessionRepo = Depends(UploadSessionRepo.dependency),
+):
+    try:
+        the_upload = await db_session.get_direct_upload(
+            application_id, package_id, upload_id
+        )
+    except InvalidIdError as e:
+        raise HTTPException(status_code=404, detail=e.message)
+    return the_upload
+
+
+@router.post(
+    "/v1/applications/{application_id}/packages/{package_id}/direct-uploads/{upload_id}/finalize",
+    response_model=DirectUploadBase,
+    status_code=status.HTTP_202_ACCEPTED,
+)
+async def finalize_direct_upload(
+    application_id: int,
+    package_id: int,
+    upload_id: str,
+    db_session: UploadSessionRepo = Depends(UploadSessionRepo.dependency),
+):
+    try:
+        the_upload = await db_session.finalize_direct_upload(
+            application_id, package_id, upload_id
+        )
+    except InvalidIdError as e:
+        raise HTTPException(status_code=404, detail=e.message)
+    except UploadNotReceivedError as e:
+        raise HTTPException(status_code=409, detail=e.message)
+    except UploadSizeError as e:
+        raise HTTPException(status_code=400, detail=e.message)
+    return the_upload
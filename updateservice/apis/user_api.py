@@ -31,7 +31,7 @@ def pagination_offset(
     "/internal/v1/users", response_model=UserBase, status_code=status.HTTP_201_CREATED
 )
 async def create_new_user(
-    newuser: UserCreate, db_session: UserRepo = Depends(UserRepo)
+    newuser: UserCreate, db_session: UserRepo = Depends(UserRepo.dependency)
 ):
     try:
         created_user = await db_session.create_user(newuser)
@@ -50,7 +50,7 @@ async def get_list_of_users(
     size: int,
     search: str = None,
     offset: int = Depends(pagination_offset),
-    db_session: UserRepo = Depends(UserRepo),
+    db_session: UserRepo = Depends(UserRepo.dependency),
 ):
     try:
         list_of_all_teams = await db_session.get_list_users(
@@ -1,15 +1,23 @@
 from fastapi import Depends, FastAPI
 
+from updateservice.repositories.delta_repo import delta_served_buffer
+from updateservice.repositories.user_repo import last_login_buffer
+from updateservice.settings import setting
 from updateservice.utils.token_authentication import check_token_authentication
 
 from .apis import (
     application_api,
     application_group_api,
+    blob_api,
+    download_api,
     health_api,
     hello_api,
+    manifest_api,
     package_api,
     team_api,
     tokens_api,
+    update_api,
+    upload_api,
     user_api,
 )
 
@@ -29,6 +37,39 @@ def _register_api_handlers(app: FastAPI) -> FastAPI:
     app.include_router(
         application_group_api.router, dependencies=[Depends(check_token_authentication)]
     )
+    app.include_router(
+        upload_api.router, dependencies=[Depends(check_token_authentication)]
+    )
+    app.include_router(
+        blob_api.router, dependencies=[Depends(check_token_authentication)]
+    )
+    app.include_router(
+        update_api.router, dependencies=[Depends(check_token_authentication)]
+    )
+    app.include_router(
+        manifest_api.router, dependencies=[Depends(check_token_authentication)]
+    )
+    app.include_router(download_api.router)
+    return app
+
+
+def _register_event_handlers(app: FastAPI) -> FastAPI:
+    @app.on_event("startup")
+    async def start_last_login_buffer():
+        last_login_buffer.start(setting["last_login_flush_interval"])
+
+    @app.on_event("shutdown")
+    async def stop_last_login_buffer():
+        await last_login_buffer.stop()
+
+    @app.on_event("startup")
+    async def start_delta_served_buffer():
+        delta_served_buffer.start(setting["delta_served_flush_interval"])
+
+    @app.on_event("shutdown")
+    async def stop_delta_served_buffer():
+        await delta_served_buffer.stop()
+
     return app
 
 
@@ -36,6 +77,7 @@ def create_app() -> FastAPI:
     """Create and return FastAPI application."""
     app = FastAPI()
     app = _register_api_handlers(app)
+    app = _register_event_handlers(app)
     return app
 
 
@@ -9,4 +9,28 @@ app.conf.beat_schedule = {
         'task': 'tasks.backup_task',
         'schedule': timedelta(seconds=30),
     },
+    'compact-tokens': {
+        'task': 'tasks.compact_tokens_task',
+        'schedule': timedelta(seconds=setting["token_compaction_interval"]),
+    },
+    'collect-blobs': {
+        'task': 'tasks.collect_blobs_task',
+        'schedule': timedelta(seconds=setting["blob_collection_interval"]),
+    },
+    'generate-deltas': {
+        'task': 'tasks.generate_deltas_task',
+        'schedule': timedelta(seconds=setting["delta_generation_interval"]),
+    },
+    'compress-variants': {
+        'task': 'tasks.compress_variants_task',
+        'schedule': timedelta(seconds=setting["variant_compression_interval"]),
+    },
+    'verify-direct-uploads': {
+        'task': 'tasks.verify_direct_uploads_task',
+        'schedule': timedelta(seconds=setting["direct_upload_verify_interval"]),
+    },
+    'expire-upload-sessions': {
+        'task': 'tasks.expire_upload_sessions_task',
+        'schedule': timedelta(seconds=setting["upload_session_cleanup_interval"]),
+    },
 }
\ No newline at end of file
@@ -25,3 +25,8 @@ async def init_models():
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.drop_all)
         await conn.run_sync(Base.metadata.create_all)
+
+
+async def get_db_session():
+    async with async_session() as session:
+        yield session
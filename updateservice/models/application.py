@@ -12,6 +12,8 @@ class Application(Base):
     team_id = Column(Integer, ForeignKey("teams.id"))
     name = Column(VARCHAR(255), unique=True, nullable=False)
     description = Column(VARCHAR(255), nullable=True)
+    # bumped on every write to the application or its packages, drives ETags
+    generation = Column(Integer, nullable=False, default=0, server_default="0")
     created_at = Column(TIMESTAMP, default=datetime.utcnow())
     updated_at = Column(TIMESTAMP, default=datetime.now(), onupdate=datetime.now())
 
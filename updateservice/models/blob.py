@@ -0,0 +1,25 @@
+from datetime import datetime
+
+from sqlalchemy import CHAR, TIMESTAMP, VARCHAR, BigInteger, Column, Index, Integer
+
+from updateservice.connection_db import Base
+
+
+class Blob(Base):
+    __tablename__ = "blobs"
+    hash = Column(CHAR(64), primary_key=True)
+    size = Column(BigInteger, nullable=False)
+    ref_count = Column(Integer, nullable=False, default=0, index=True)
+    created_at = Column(TIMESTAMP, default=datetime.utcnow)
+    # "done" once compress_variants stored every variant smaller than the blob
+    variants_status = Column(VARCHAR(16), nullable=True)
+    # last attempt, failed blobs are retried after the others
+    variants_checked_at = Column(TIMESTAMP, nullable=True)
+
+    __table_args__ = (
+        Index(
+            "ix_blobs_variants_pending",
+            variants_checked_at,
+            postgresql_where=variants_status.is_(None),
+        ),
+    )
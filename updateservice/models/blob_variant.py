@@ -0,0 +1,16 @@
+from datetime import datetime
+
+from sqlalchemy import CHAR, TIMESTAMP, VARCHAR, BigInteger, Column, ForeignKey
+
+from updateservice.connection_db import Base
+
+
+class BlobVariant(Base):
+    __tablename__ = "blob_variants"
+    hash = Column(
+        CHAR(64), ForeignKey("blobs.hash", ondelete="CASCADE"), primary_key=True
+    )
+    encoding = Column(VARCHAR(16), primary_key=True)
+    size = Column(BigInteger, nullable=False)
+    variant_hash = Column(CHAR(64), nullable=False)
+    created_at = Column(TIMESTAMP, default=datetime.utcnow)
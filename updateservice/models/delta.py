@@ -0,0 +1,17 @@
+from datetime import datetime
+
+from sqlalchemy import CHAR, TIMESTAMP, VARCHAR, BigInteger, Column
+
+from updateservice.connection_db import Base
+
+
+class Delta(Base):
+    __tablename__ = "deltas"
+    source_hash = Column(CHAR(64), primary_key=True)
+    target_hash = Column(CHAR(64), primary_key=True)
+    # stored, full when the delta is not smaller than the target, or evicted
+    status = Column(VARCHAR(16), nullable=False)
+    size = Column(BigInteger, nullable=True)
+    served_at = Column(TIMESTAMP, nullable=True)
+    evicted_at = Column(TIMESTAMP, nullable=True)
+    created_at = Column(TIMESTAMP, default=datetime.utcnow)
@@ -1,9 +1,19 @@
 from datetime import datetime
 
-from sqlalchemy import TIMESTAMP, VARCHAR, Column, ForeignKey, Integer, String
-from sqlalchemy.orm import backref, relationship
+from sqlalchemy import (
+    TIMESTAMP,
+    VARCHAR,
+    BigInteger,
+    Column,
+    ForeignKey,
+    Index,
+    Integer,
+    String,
+)
+from sqlalchemy.orm import backref, relationship, validates
 
 from updateservice.connection_db import Base
+from updateservice.utils.versions import parse_version
 
 
 class Package(Base):
@@ -11,11 +21,14 @@ class Package(Base):
     id = Column(Integer, primary_key=True)
     application_id = Column(Integer, ForeignKey("applications.id"))
     version = Column(String, nullable=False)
+    major = Column(Integer, nullable=True)
+    minor = Column(Integer, nullable=True)
+    patch = Column(Integer, nullable=True)
     description = Column(VARCHAR(255), nullable=True)
     file = Column(VARCHAR(255), nullable=True)
     url = Column(VARCHAR(1000), unique=True, nullable=True)
     hash = Column(VARCHAR(255), nullable=True)
-    size = Column(Integer, nullable=True)
+    size = Column(BigInteger, nullable=True)
     created_at = Column(TIMESTAMP, default=datetime.utcnow())
     updated_at = Column(
         TIMESTAMP, default=datetime.utcnow(), onupdate=datetime.utcnow()
@@ -24,3 +37,11 @@ class Package(Base):
     application = relationship("Application", backref=backref("packages"))
 
     __mapper_args__ = {"confirm_deleted_rows": False}
+    __table_args__ = (
+        Index("ix_packages_application_semver", application_id, major, minor, patch),
+    )
+
+    @validates("version")
+    def split_version(self, key, version):
+        self.major, self.minor, self.patch = parse_version(version) or (None,) * 3
+        return version
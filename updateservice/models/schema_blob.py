@@ -0,0 +1,13 @@
+from pydantic import BaseModel
+
+from updateservice.models.schema_upload_session import DirectUploadCreate
+
+
+class BlobStatus(BaseModel):
+    hash: str
+    size: int
+    exists: bool
+
+
+class BlobAttach(DirectUploadCreate):
+    pass
@@ -0,0 +1,24 @@
+from datetime import datetime
+from typing import List, Optional
+
+from pydantic import BaseModel
+
+from updateservice.models.schema_package import PackageUpdate
+
+
+class ApplicationManifest(BaseModel):
+    application_id: int
+    generated_at: datetime
+    latest: Optional[PackageUpdate]
+    packages: List[PackageUpdate]
+
+
+class GroupManifestEntry(BaseModel):
+    application_id: int
+    latest: Optional[PackageUpdate]
+
+
+class GroupManifest(BaseModel):
+    group_id: int
+    generated_at: datetime
+    applications: List[GroupManifestEntry]
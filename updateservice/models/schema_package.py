@@ -1,7 +1,9 @@
-import re
+from datetime import datetime
 from typing import Optional
 
-from pydantic import BaseModel, validator
+from pydantic import BaseModel, conlist, validator
+
+from updateservice.utils.versions import parse_version
 
 
 class AppIdSchema(BaseModel):
@@ -31,8 +33,7 @@ class PackageCreate(BaseModel):
 
     @validator("version")
     def version_template(cls, version):
-        template = r"^\d+\.\d+\.\d+$"
-        if not re.match(template, version):
+        if parse_version(version) is None:
             raise ValueError("Invalid version format")
         return version
 
@@ -48,3 +49,45 @@ class PackageList(BaseModel):
 
     class Config:
         orm_mode = True
+
+
+class SignedDownloadUrl(BaseModel):
+    url: str
+    expires_at: datetime
+
+
+class PackageUpdate(BaseModel):
+    id: int
+    version: str
+    hash: Optional[str]
+    size: Optional[int]
+    url: Optional[str]
+
+    class Config:
+        orm_mode = True
+
+
+class UpdateCheck(BaseModel):
+    application_id: int
+    current_version: str
+    update_available: bool
+    latest: Optional[PackageUpdate]
+
+
+class UpdateCheckRequest(BaseModel):
+    application_id: int
+    current_version: str
+
+    @validator("current_version")
+    def version_template(cls, version):
+        if parse_version(version) is None:
+            raise ValueError("Invalid version format")
+        return version
+
+
+class UpdateCheckBatch(BaseModel):
+    checks: conlist(UpdateCheckRequest, min_items=1, max_items=100)
+
+
+class UpdateCheckResult(UpdateCheck):
+    application_found: bool = True
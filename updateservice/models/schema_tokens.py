@@ -1,7 +1,7 @@
 from datetime import datetime
-from typing import Optional
+from typing import List, Optional
 
-from pydantic import BaseModel, constr
+from pydantic import BaseModel, conlist, constr
 
 
 class TokenPayload(BaseModel):
@@ -18,3 +18,13 @@ class TokenBase(BaseModel):
 
     class Config:
         orm_mode = True
+
+
+class TokenIntrospectRequest(BaseModel):
+    tokens: conlist(str, min_items=1, max_items=1000)
+
+
+class TokenIntrospectResult(BaseModel):
+    active: bool
+    user_id: Optional[int]
+    exp: Optional[datetime]
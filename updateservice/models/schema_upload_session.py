@@ -0,0 +1,60 @@
+import re
+from datetime import datetime
+from typing import Optional
+
+from pydantic import BaseModel, Field, validator
+
+
+class UploadSessionCreate(BaseModel):
+    filename: str = Field(..., min_length=1, max_length=255)
+    size: Optional[int] = Field(None, ge=0)
+
+    @validator("filename")
+    def filename_template(cls, filename):
+        if "/" in filename or "\\" in filename or filename in (".", ".."):
+            raise ValueError("Invalid file name")
+        return filename
+
+
+class DirectUploadCreate(UploadSessionCreate):
+    size: int = Field(..., ge=0)
+    hash: str
+
+    @validator("hash")
+    def hash_template(cls, file_hash):
+        if not re.match(r"^[0-9a-f]{64}$", file_hash):
+            raise ValueError("Invalid SHA-256 hash")
+        return file_hash
+
+
+class UploadSessionBase(BaseModel):
+    id: str
+    package_id: int
+    filename: str
+    size: Optional[int]
+    offset: int
+    created_at: Optional[datetime]
+    updated_at: Optional[datetime]
+    expires_at: Optional[datetime]
+
+    class Config:
+        orm_mode = True
+
+
+class DirectUploadBase(BaseModel):
+    id: str
+    package_id: int
+    filename: str
+    size: int
+    hash: str
+    status: str
+    created_at: Optional[datetime]
+    updated_at: Optional[datetime]
+
+    class Config:
+        orm_mode = True
+
+
+class DirectUploadUrl(DirectUploadBase):
+    url: str
+    expires_at: datetime
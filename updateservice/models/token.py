@@ -1,9 +1,24 @@
 from datetime import datetime
 
-from sqlalchemy import TIMESTAMP, VARCHAR, Boolean, Column, ForeignKey, Integer, String
+from sqlalchemy import (
+    CHAR,
+    TIMESTAMP,
+    VARCHAR,
+    Boolean,
+    Column,
+    ForeignKey,
+    Index,
+    Integer,
+    String,
+)
 from sqlalchemy.orm import backref, relationship
 
 from updateservice.connection_db import Base
+from updateservice.utils.token_digest import token_digest
+
+
+def default_token_hash(context):
+    return token_digest(context.get_current_parameters()["token"])
 
 
 class Token(Base):
@@ -12,8 +27,19 @@ class Token(Base):
     id = Column(Integer, primary_key=True)
     user_id = Column(Integer, ForeignKey("users.id"))
     token = Column(String)
+    token_hash = Column(CHAR(64), unique=True, default=default_token_hash)
+    jti = Column(VARCHAR(36), unique=True, nullable=True)
     deleted = Column(Boolean, default=False)
+    expires_at = Column(TIMESTAMP, nullable=True, index=True)
     created_at = Column(TIMESTAMP, default=datetime.utcnow())
     updated_at = Column(TIMESTAMP, default=datetime.now(), onupdate=datetime.now())
 
     user_relationship = relationship("User", backref=backref("tokens"))
+
+    __table_args__ = (
+        Index(
+            "ix_tokens_active_token_hash",
+            "token_hash",
+            postgresql_where=deleted == False,
+        ),
+    )
@@ -0,0 +1,33 @@
+from datetime import datetime
+
+from sqlalchemy import (
+    CHAR,
+    TIMESTAMP,
+    VARCHAR,
+    BigInteger,
+    Boolean,
+    Column,
+    ForeignKey,
+    Integer,
+)
+
+from updateservice.connection_db import Base
+
+
+class UploadSession(Base):
+    __tablename__ = "upload_sessions"
+    id = Column(VARCHAR(32), primary_key=True)
+    package_id = Column(
+        Integer, ForeignKey("packages.id", ondelete="CASCADE"), index=True
+    )
+    filename = Column(VARCHAR(255), nullable=False)
+    size = Column(BigInteger, nullable=True)
+    offset = Column(BigInteger, nullable=False, default=0)
+    # direct uploads go straight to object storage through a presigned PUT
+    direct = Column(Boolean, nullable=False, default=False, server_default="false")
+    hash = Column(CHAR(64), nullable=True)
+    status = Column(VARCHAR(16), nullable=False, default="open", server_default="open")
+    created_at = Column(TIMESTAMP, default=datetime.utcnow)
+    updated_at = Column(TIMESTAMP, default=datetime.utcnow, onupdate=datetime.utcnow)
+    # abandoned sessions are removed with their data by expire_upload_sessions
+    expires_at = Column(TIMESTAMP, nullable=True, index=True)
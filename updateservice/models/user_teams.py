@@ -14,6 +14,8 @@ class User(Base):
     created_at = Column(TIMESTAMP, default=datetime.utcnow())
     updated_at = Column(TIMESTAMP, default=datetime.now(), onupdate=datetime.now())
     last_login = Column(TIMESTAMP, default=datetime.now(), onupdate=datetime.now())
+    token_epoch = Column(Integer, nullable=False, default=0, server_default="0")
+    token_epoch_updated_at = Column(TIMESTAMP, nullable=True, index=True)
 
 
 class Team(Base):
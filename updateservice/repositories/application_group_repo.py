@@ -2,10 +2,11 @@ from sqlalchemy import delete, select, update
 from sqlalchemy.orm import joinedload
 from sqlalchemy.sql.expression import exists
 
-from updateservice.connection_db import async_session
 from updateservice.models.application import Application
 from updateservice.models.application_group import ApplicationGroup, Group
 from updateservice.models.schema_application_group import GroupCreate
+from updateservice.repositories.application_repo import bump_generation
+from updateservice.repositories.base_repo import SessionRepo
 from updateservice.utils.exceptions import (
     AlreadyAssignedError,
     ApplicationAssignedError,
@@ -15,17 +16,18 @@ from updateservice.utils.exceptions import (
 )
 
 
-class GroupRepo:
+class GroupRepo(SessionRepo):
     async def create_group(self, group: GroupCreate):
-        async with async_session() as session:
+        async with self.unit_of_work() as session:
             new_group = Group(name=group.name)
             session.add(new_group)
-            await session.commit()
+            await session.flush()
             await session.refresh(new_group)
+            await session.commit()
             return new_group
 
     async def delete_group(self, group_id: int):
-        async with async_session() as session:
+        async with self.unit_of_work() as session:
             query_group = select(exists().where(Group.id == group_id))
             query_app_group = select(
                 exists().where(
@@ -44,9 +46,9 @@ class GroupRepo:
             return "Group has been deleted"
 
 
-class ApplicationGroupRepo:
+class ApplicationGroupRepo(SessionRepo):
     async def check_application_group(self, application_id: int, group_id: int):
-        async with async_session() as session:
+        async with self.unit_of_work() as session:
             query_app_group = select(
                 exists().where(
                     ApplicationGroup.application_id == application_id,
@@ -59,7 +61,7 @@ class ApplicationGroupRepo:
             return True
 
     async def create_application_group(self, application_id: int, group_id: int):
-        async with async_session() as session:
+        async with self.unit_of_work() as session:
             query_app = select(exists().where(Application.id == application_id))
             query_group = select(exists().where(Group.id == group_id))
             query_app_group = select(
@@ -81,7 +83,8 @@ class ApplicationGroupRepo:
                 application_id=application_id, group_id=group_id
             )
             session.add(new_application_group)
-            await session.commit()
+            await bump_generation(session, application_id)
+            await session.flush()
             select_application_group = await session.execute(
                 select(ApplicationGroup).filter(
                     ApplicationGroup.application_id == application_id,
@@ -90,10 +93,11 @@ class ApplicationGroupRepo:
             )
             select_object = select_application_group.first()
             application_group = dict(select_object).get("ApplicationGroup")
+            await session.commit()
             return application_group
 
     async def unassign_application(self, application_id: int, group_id: int):
-        async with async_session() as session:
+        async with self.unit_of_work() as session:
             query_app = select(exists().where(Application.id == application_id))
             query_group = select(exists().where(Group.id == group_id))
             query_app_group = select(
@@ -116,5 +120,6 @@ class ApplicationGroupRepo:
                 ApplicationGroup.group_id == group_id,
             )
             await session.execute(delete_app_group)
+            await bump_generation(session, application_id)
             await session.commit()
             return "Application has been unassigned"
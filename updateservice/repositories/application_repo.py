@@ -2,7 +2,6 @@ from sqlalchemy import select, update
 from sqlalchemy.orm import joinedload, selectinload
 from sqlalchemy.sql.expression import exists
 
-from updateservice.connection_db import async_session
 from updateservice.models.application import Application
 from updateservice.models.application_group import ApplicationGroup
 from updateservice.models.schema_application import (
@@ -11,18 +10,42 @@ from updateservice.models.schema_application import (
     GroupIdSchema,
 )
 from updateservice.models.user_teams import Team
+from updateservice.repositories.base_repo import SessionRepo
 from updateservice.utils.exceptions import (
     ApplicationNotFoundError,
     InvalidAppIdError,
     InvalidTeamIdError,
     TeamIdError,
 )
+from updateservice.utils.version_index import version_index
 
 
-class ApplicationRepo:
+async def bump_generation(session, application_id: int):
+    """Invalidate the ETags of the application and of its packages"""
+    await session.execute(
+        update(Application)
+        .where(Application.id == application_id)
+        .values(generation=Application.generation + 1)
+    )
+
+
+class ApplicationRepo(SessionRepo):
+    async def get_generation(self, application_id: int, team_id: int = None):
+        """Change counter of the application, None when it does not exist"""
+        async with self.unit_of_work() as session:
+            query_generation = select(Application.generation).filter(
+                Application.id == application_id
+            )
+            if team_id is not None:
+                query_generation = query_generation.filter(
+                    Application.team_id == team_id
+                )
+            result_generation = await session.execute(query_generation)
+            return result_generation.scalar()
+
     async def check_app_exists(self, application_id: int):
 
-        async with async_session() as session:
+        async with self.unit_of_work() as session:
             query = select(exists().where(Application.id == application_id))
             result_id = await session.execute(query)
             if not result_id.scalar():
@@ -31,7 +54,7 @@ class ApplicationRepo:
 
     async def create_application(self, team_id: int, app: ApplicationCreate):
 
-        async with async_session() as session:
+        async with self.unit_of_work() as session:
             query = select(exists().where(Team.id == team_id))
             result_team = await session.execute(query)
             if not result_team.scalar():
@@ -41,7 +64,7 @@ class ApplicationRepo:
                     team_id=team_id, name=app.name, description=app.description
                 )
                 session.add(new_app)
-                await session.commit()
+                await session.flush()
                 select_app = await session.execute(
                     select(Application)
                     .options(joinedload(Application.team))
@@ -51,13 +74,15 @@ class ApplicationRepo:
                 )
                 select_the_app = select_app.first()
                 the_app = dict(select_the_app).get("Application")
+                await session.commit()
+                version_index.drop(the_app.id)
                 return the_app
 
     async def get_applications_list(
         self, team_id: int, limit: int, offset: int, search: str
     ):
 
-        async with async_session() as session:
+        async with self.unit_of_work() as session:
             query = select(exists().where(Team.id == team_id))
             result_team = await session.execute(query)
             if not result_team.scalar():
@@ -90,7 +115,7 @@ class ApplicationRepo:
         self, team_id: int, application_id: int, app: ApplicationPatch
     ):
 
-        async with async_session() as session:
+        async with self.unit_of_work() as session:
             query_team = select(exists().where(Team.id == team_id))
             result_team = await session.execute(query_team)
             if not result_team.scalar():
@@ -109,17 +134,18 @@ class ApplicationRepo:
                 .values(**app.dict(exclude_unset=True))
             )
             await session.execute(updated_application)
-            await session.commit()
+            await bump_generation(session, application_id)
             updated_result = await session.execute(
                 select(Application)
                 .options(joinedload(Application.team))
                 .filter(Application.id == application_id)
             )
             application_updated = updated_result.first()
+            await session.commit()
             return application_updated[0]
 
     async def get_app(self, team_id: int, application_id: int):
-        async with async_session() as session:
+        async with self.unit_of_work() as session:
             query_team = select(exists().where(Team.id == team_id))
             result_team = await session.execute(query_team)
             if not result_team.scalar():
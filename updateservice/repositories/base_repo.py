@@ -0,0 +1,40 @@
+from contextlib import asynccontextmanager
+from typing import Optional
+
+from fastapi import Depends
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from updateservice.connection_db import async_session, get_db_session
+
+
+class SessionRepo:
+    """Base for repositories sharing the request scoped session
+
+    Routes build repositories through dependency(), so every repository of
+    the request gets the same session and the request checks out a single
+    connection. Built without a session it falls back to short lived ones.
+    """
+
+    def __init__(self, session: Optional[AsyncSession] = None):
+        self.session = session
+
+    @classmethod
+    async def dependency(cls, session: AsyncSession = Depends(get_db_session)):
+        return cls(session)
+
+    @asynccontextmanager
+    async def unit_of_work(self):
+        if self.session is not None:
+            yield self.session
+        else:
+            async with async_session() as session:
+                yield session
+
+    async def release(self):
+        """Return the request's connection to the pool before a long response
+
+        The request session is only closed after the response body is sent,
+        file downloads release it once their queries are done.
+        """
+        if self.session is not None:
+            await self.session.close()
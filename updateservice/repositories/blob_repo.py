@@ -0,0 +1,76 @@
+import os
+
+import aiofiles.os
+from sqlalchemy import select, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.sql.expression import exists
+
+from updateservice.models.blob import Blob
+from updateservice.repositories.base_repo import SessionRepo
+from updateservice.utils.compression import encoding_suffixes
+from updateservice.utils.storage import blob_key, get_storage
+
+
+def blob_location(file_hash: str):
+    """Path of a blob in local storage"""
+    return os.path.join(os.getcwd(), "Storage", "blobs", file_hash[:2], file_hash)
+
+
+def variant_location(file_hash: str, encoding: str):
+    return blob_location(file_hash) + encoding_suffixes[encoding]
+
+
+class BlobRepo(SessionRepo):
+    async def blob_exists(self, session, file_hash: str, size: int) -> bool:
+        query_blob = select(exists().where(Blob.hash == file_hash, Blob.size == size))
+        result_blob = await session.execute(query_blob)
+        return result_blob.scalar()
+
+    async def check_blob(self, file_hash: str, size: int) -> bool:
+        async with self.unit_of_work() as session:
+            return await self.blob_exists(session, file_hash, size)
+
+    async def reference_blob(self, session, file_hash: str, size: int):
+        # the upsert locks the blob row, so collection cannot remove the file
+        # between the existence check and the end of this transaction
+        upsert_blob = (
+            insert(Blob)
+            .values(hash=file_hash, size=size, ref_count=1)
+            .on_conflict_do_update(
+                index_elements=[Blob.hash],
+                set_={"ref_count": Blob.ref_count + 1},
+            )
+        )
+        await session.execute(upsert_blob)
+
+    async def store_blob(self, session, temp_location: str, file_hash: str, size: int):
+        # stored before the caller commits, collect_blobs adopts the object
+        # if the transaction fails afterwards
+        await self.reference_blob(session, file_hash, size)
+        key = blob_key(file_hash)
+        storage = get_storage()
+        if await storage.exists(key):
+            await aiofiles.os.remove(temp_location)
+        else:
+            await storage.store(key, temp_location)
+        return key
+
+    async def attach_blob(self, session, source_key: str, file_hash: str, size: int):
+        """store_blob for an object already written to the storage backend"""
+        await self.reference_blob(session, file_hash, size)
+        key = blob_key(file_hash)
+        storage = get_storage()
+        if await storage.exists(key):
+            await storage.delete(source_key)
+        else:
+            await storage.move(source_key, key)
+        return key
+
+    async def release_blob(self, session, file_hash: str):
+        release_query = (
+            update(Blob)
+            .where(Blob.hash == file_hash)
+            .values(ref_count=Blob.ref_count - 1)
+            .execution_options(synchronize_session=False)
+        )
+        await session.execute(release_query)
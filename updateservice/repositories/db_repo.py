@@ -1,11 +1,11 @@
-from updateservice.connection_db import async_session
+from updateservice.repositories.base_repo import SessionRepo
 
 
-class DbConn:
+class DbConn(SessionRepo):
     """Connection to db for health checking"""
 
     async def get_db_conn(self):
-        async with async_session() as session:
+        async with self.unit_of_work() as session:
             cursor = await session.execute("SELECT 1")
             result = cursor.fetchall()
             return result
@@ -0,0 +1,134 @@
+import asyncio
+import datetime
+import logging
+
+from sqlalchemy import and_, bindparam, select, update
+from sqlalchemy.sql.expression import exists
+
+from updateservice.connection_db import async_session
+from updateservice.models.application import Application
+from updateservice.models.delta import Delta
+from updateservice.models.package import Package
+from updateservice.repositories.base_repo import SessionRepo
+from updateservice.repositories.package_repo import package_file_location
+from updateservice.utils.delta_cache import delta_cache
+from updateservice.utils.exceptions import InvalidAppIdError, InvalidPackageVersionError
+from updateservice.utils.storage import blob_key, get_storage
+
+logger = logging.getLogger(__name__)
+
+
+class DeltaServedBuffer:
+    """Write-behind buffer of when each delta pair was last requested
+
+    Eviction keeps the most recently served deltas, and an evicted pair is
+    generated again once it is requested after its eviction.
+    """
+
+    def __init__(self):
+        self._pending = {}
+        self._flush_task = None
+
+    def __len__(self):
+        return len(self._pending)
+
+    def record(self, source_hash: str, target_hash: str):
+        self._pending[(source_hash, target_hash)] = datetime.datetime.utcnow()
+
+    async def flush(self):
+        if not self._pending:
+            return 0
+        pending, self._pending = self._pending, {}
+        update_query = (
+            update(Delta.__table__)
+            .where(
+                and_(
+                    Delta.__table__.c.source_hash == bindparam("b_source_hash"),
+                    Delta.__table__.c.target_hash == bindparam("b_target_hash"),
+                )
+            )
+            .values(served_at=bindparam("b_served_at"))
+        )
+        params = [
+            {"b_source_hash": source, "b_target_hash": target, "b_served_at": served}
+            for (source, target), served in pending.items()
+        ]
+        try:
+            async with async_session() as session:
+                await session.execute(update_query, params)
+                await session.commit()
+        except Exception:
+            for pair, served_at in pending.items():
+                self._pending.setdefault(pair, served_at)
+            raise
+        return len(params)
+
+    async def _flush_periodically(self, interval: float):
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await self.flush()
+            except Exception:
+                logger.exception("Could not flush served deltas")
+
+    def start(self, interval: float):
+        if self._flush_task is None:
+            self._flush_task = asyncio.create_task(self._flush_periodically(interval))
+
+    async def stop(self):
+        if self._flush_task is not None:
+            self._flush_task.cancel()
+            try:
+                await self._flush_task
+            except asyncio.CancelledError:
+                pass
+            self._flush_task = None
+        await self.flush()
+
+
+delta_served_buffer = DeltaServedBuffer()
+
+
+class DeltaRepo(SessionRepo):
+    async def get_version(self, session, application_id: int, version: str):
+        query_package = select(Package).filter(
+            Package.application_id == application_id, Package.version == version
+        )
+        result_package = await session.execute(query_package)
+        the_package = result_package.scalar()
+        if the_package is None:
+            raise InvalidPackageVersionError(version)
+        return the_package
+
+    async def download_delta(
+        self, application_id: int, from_version: str, to_version: str
+    ):
+        async with self.unit_of_work() as session:
+            query_app = select(exists().where(Application.id == application_id))
+            result_app = await session.execute(query_app)
+            if not result_app.scalar():
+                raise InvalidAppIdError
+            source = await self.get_version(session, application_id, from_version)
+            target = await self.get_version(session, application_id, to_version)
+        if target.hash is None:
+            raise FileNotFoundError("File not found")
+        delta_location = None
+        if source.hash is not None and source.hash != target.hash:
+            delta_location = delta_cache.get(source.hash, target.hash)
+            delta_served_buffer.record(source.hash, target.hash)
+        storage = get_storage()
+        if delta_location is None and storage.redirects:
+            url = await storage.presigned_url(blob_key(target.hash), target.file)
+            if url is not None:
+                return None, target.file, target.hash, source.hash, None, url
+        target_location = package_file_location(target)
+        if target_location is None:
+            raise FileNotFoundError("File not found")
+        return (
+            target_location,
+            target.file,
+            target.hash,
+            source.hash,
+            delta_location,
+            None,
+        )
@@ -0,0 +1,130 @@
+import asyncio
+from datetime import datetime
+
+from sqlalchemy import func, select
+from sqlalchemy.sql.expression import exists
+
+from updateservice.models.application import Application
+from updateservice.models.application_group import ApplicationGroup, Group
+from updateservice.models.package import Package
+from updateservice.models.schema_manifest import (
+    ApplicationManifest,
+    GroupManifest,
+    GroupManifestEntry,
+)
+from updateservice.repositories.base_repo import SessionRepo
+from updateservice.utils.exceptions import InvalidAppIdError, InvalidGroupIdError
+from updateservice.utils.manifests import manifest_store
+
+# first key of the advisory locks serializing manifest writes
+application_lock = 1
+group_lock = 2
+
+
+class ManifestRepo(SessionRepo):
+    async def refresh_application(self, application_id: int):
+        async with self.unit_of_work() as session:
+            await self.write_application_manifests(session, application_id)
+            await session.commit()
+
+    async def refresh_group(self, group_id: int):
+        async with self.unit_of_work() as session:
+            await self.write_group_manifest(session, group_id)
+            await session.commit()
+
+    async def remove_group(self, group_id: int):
+        await asyncio.to_thread(
+            manifest_store.remove, manifest_store.group_location(group_id)
+        )
+
+    async def lock_manifest(self, session, kind: int, object_id: int):
+        """Serialize writers of a manifest until the transaction ends
+
+        Rows are read after the lock is taken, so the last writer to get it
+        also writes the newest snapshot.
+        """
+        await session.execute(select(func.pg_advisory_xact_lock(kind, object_id)))
+
+    async def packages_with_file(self, session, application_ids: list):
+        """Packages with a file of the applications, newest version first"""
+        query_packages = (
+            select(
+                Package.application_id,
+                Package.id,
+                Package.version,
+                Package.hash,
+                Package.size,
+                Package.url,
+            )
+            .filter(
+                Package.application_id.in_(application_ids),
+                Package.hash.is_not(None),
+            )
+            .order_by(
+                Package.major.desc().nulls_last(),
+                Package.minor.desc().nulls_last(),
+                Package.patch.desc().nulls_last(),
+            )
+        )
+        result_packages = await session.execute(query_packages)
+        return result_packages.all()
+
+    async def write_application_manifests(self, session, application_id: int):
+        """Rewrite the manifest of the application and of each of its groups"""
+        query_app = select(exists().where(Application.id == application_id))
+        result_app = await session.execute(query_app)
+        if not result_app.scalar():
+            raise InvalidAppIdError
+        await self.lock_manifest(session, application_lock, application_id)
+        packages = await self.packages_with_file(session, [application_id])
+        manifest = ApplicationManifest(
+            application_id=application_id,
+            generated_at=datetime.utcnow(),
+            latest=packages[0] if packages else None,
+            packages=packages,
+        )
+        await asyncio.to_thread(
+            manifest_store.write,
+            manifest_store.application_location(application_id),
+            manifest.json(),
+        )
+        result_groups = await session.execute(
+            select(ApplicationGroup.group_id).filter(
+                ApplicationGroup.application_id == application_id
+            )
+        )
+        # sorted, so concurrent writers take the group locks in the same order
+        for group_id in sorted(set(result_groups.scalars().all())):
+            await self.write_group_manifest(session, group_id)
+
+    async def write_group_manifest(self, session, group_id: int):
+        query_group = select(exists().where(Group.id == group_id))
+        result_group = await session.execute(query_group)
+        if not result_group.scalar():
+            raise InvalidGroupIdError
+        await self.lock_manifest(session, group_lock, group_id)
+        result_apps = await session.execute(
+            select(ApplicationGroup.application_id).filter(
+                ApplicationGroup.group_id == group_id
+            )
+        )
+        application_ids = sorted(set(result_apps.scalars().all()))
+        latest = {}
+        for package in await self.packages_with_file(session, application_ids):
+            latest.setdefault(package.application_id, package)
+        manifest = GroupManifest(
+            group_id=group_id,
+            generated_at=datetime.utcnow(),
+            applications=[
+                GroupManifestEntry(
+                    application_id=application_id,
+                    latest=latest.get(application_id),
+                )
+                for application_id in application_ids
+            ],
+        )
+        await asyncio.to_thread(
+            manifest_store.write,
+            manifest_store.group_location(group_id),
+            manifest.json(),
+        )
@@ -1,5 +1,6 @@
 import hashlib
 import os
+import uuid
 
 import aiofiles
 import aiofiles.os
@@ -8,16 +9,34 @@ from sqlalchemy import delete, select, update
 from sqlalchemy.orm import joinedload
 from sqlalchemy.sql.expression import exists
 
-from updateservice.connection_db import async_session
 from updateservice.models.application import Application
+from updateservice.models.blob import Blob
+from updateservice.models.blob_variant import BlobVariant
 from updateservice.models.package import Package
+from updateservice.models.schema_blob import BlobAttach
 from updateservice.models.schema_package import PackageCreate
-from updateservice.utils.exceptions import InvalidAppIdError, InvalidPackageIdError
+from updateservice.repositories.application_repo import bump_generation
+from updateservice.repositories.blob_repo import (
+    BlobRepo,
+    blob_location,
+    variant_location,
+)
+from updateservice.settings import setting
+from updateservice.utils.compression import negotiate_encoding
+from updateservice.utils.exceptions import (
+    BlobNotFoundError,
+    InvalidAppIdError,
+    InvalidPackageIdError,
+)
+from updateservice.utils.storage import blob_key, get_storage
+from updateservice.utils.version_index import version_index
 
+chunk_size = setting["upload_chunk_size"]
 
-class PackageRepo:
+
+class PackageRepo(BlobRepo):
     async def create_package(self, application_id: int, package=PackageCreate):
-        async with async_session() as session:
+        async with self.unit_of_work() as session:
             query_app = select(exists().where(Application.id == application_id))
             result_app = await session.execute(query_app)
             if not result_app.scalar():
@@ -28,7 +47,8 @@ class PackageRepo:
                 description=package.description,
             )
             session.add(new_package)
-            await session.commit()
+            await bump_generation(session, application_id)
+            await session.flush()
             query_package = await session.execute(
                 select(Package)
                 .options(joinedload(Package.application))
@@ -39,10 +59,12 @@ class PackageRepo:
             )
             select_package = query_package.first()
             the_package = dict(select_package).get("Package")
+            await session.commit()
+            version_index.update_package(application_id, the_package)
             return the_package
 
     async def delete_package(self, application_id: int, package_id: int):
-        async with async_session() as session:
+        async with self.unit_of_work() as session:
             query_app = select(exists().where(Application.id == application_id))
             result_app = await session.execute(query_app)
             if not result_app.scalar():
@@ -57,15 +79,20 @@ class PackageRepo:
             select_package = query_package.first()
             if not select_package:
                 raise InvalidPackageIdError
+            package_hash = select_package[0].hash
             delete_package = delete(Package).filter(
                 Package.application_id == application_id, Package.id == package_id
             )
             await session.execute(delete_package)
+            await bump_generation(session, application_id)
+            if package_hash is not None:
+                await self.release_blob(session, package_hash)
             await session.commit()
+            version_index.remove_package(application_id, package_id)
             return "Package has been successfully deleted"
 
     async def get_package(self, application_id: int, package_id: int):
-        async with async_session() as session:
+        async with self.unit_of_work() as session:
             query_app = select(exists().where(Application.id == application_id))
             result_app = await session.execute(query_app)
             if not result_app.scalar():
@@ -83,7 +110,7 @@ class PackageRepo:
             return select_package[0]
 
     async def list_packages(self, application_id: int, limit: int, offset: int):
-        async with async_session() as session:
+        async with self.unit_of_work() as session:
             query_packages = await session.execute(
                 select(Package)
                 .options(joinedload(Package.application))
@@ -95,18 +122,28 @@ class PackageRepo:
             return result_packages
 
 
-class UploadPackageRepo:
+class UploadPackageRepo(BlobRepo):
     async def upload_package(self, package_id: int, file: UploadFile = File(...)):
-        upload_location = os.path.join(os.getcwd(), "Storage")
-        upload_subdirectory = f"Package_{package_id}"
-        upload_location = os.path.join(upload_location, upload_subdirectory)
+        upload_location = os.path.join(os.getcwd(), "Storage", "uploads")
         if not os.path.exists(upload_location):
             os.makedirs(upload_location)
         upload_string_name = file.filename
-        file_location = os.path.join(upload_location, upload_string_name)
-        async with aiofiles.open(file_location, "wb") as f:
-            await f.write(await file.read())
-        return file_location, upload_string_name
+        temp_location = os.path.join(
+            upload_location, f"Package_{package_id}_{uuid.uuid4().hex}.part"
+        )
+        file_hash = hashlib.sha256()
+        file_size = 0
+        try:
+            async with aiofiles.open(temp_location, "wb") as f:
+                while chunk := await file.read(chunk_size):
+                    file_hash.update(chunk)
+                    file_size += len(chunk)
+                    await f.write(chunk)
+        except BaseException:
+            if os.path.exists(temp_location):
+                os.remove(temp_location)
+            raise
+        return temp_location, upload_string_name, file_size, file_hash.hexdigest()
 
     async def get_size(self, file_location: str):
         stat_src = await aiofiles.os.stat(file_location)
@@ -114,17 +151,43 @@ class UploadPackageRepo:
         return file_size
 
     async def make_hash(self, file_location: str):
+        file_hash = hashlib.sha256()
         async with aiofiles.open(file_location, "rb") as f:
-            file_bytes = await f.read()
-            file_hash = hashlib.sha256(file_bytes).hexdigest()
-        return file_hash
+            while chunk := await f.read(chunk_size):
+                file_hash.update(chunk)
+        return file_hash.hexdigest()
+
+    async def replace_package_file(
+        self, session, package_id: int, filename: str, file_hash: str, size: int
+    ):
+        """Point the package at a stored blob, releasing its previous one"""
+        result_package = await session.execute(
+            select(Package.application_id, Package.hash).filter(
+                Package.id == package_id
+            )
+        )
+        application_id, previous_hash = result_package.first()
+        if previous_hash is not None:
+            await self.release_blob(session, previous_hash)
+        query_update = (
+            update(Package)
+            .where(Package.id == package_id)
+            .values(
+                file=filename,
+                hash=file_hash,
+                size=size,
+                url=f"/v1/applications/{application_id}/packages/{package_id}/file",
+            )
+        )
+        await session.execute(query_update)
+        await bump_generation(session, application_id)
 
 
 class UpdatePackageRepo(UploadPackageRepo):
     async def update_package(
         self, application_id: int, package_id: int, file: UploadFile = File(...)
     ):
-        async with async_session() as session:
+        async with self.unit_of_work() as session:
             query_app = select(exists().where(Application.id == application_id))
             result_app = await session.execute(query_app)
             if not result_app.scalar():
@@ -139,9 +202,12 @@ class UpdatePackageRepo(UploadPackageRepo):
             select_package = query_package.first()
             if not select_package:
                 raise InvalidPackageIdError
+            previous_hash = select_package[0].hash
             upload_file = await self.upload_package(package_id, file)
-            size = await self.get_size(upload_file[0])
-            file_hash = await self.make_hash(upload_file[0])
+            size, file_hash = upload_file[2], upload_file[3]
+            await self.store_blob(session, upload_file[0], file_hash, size)
+            if previous_hash is not None:
+                await self.release_blob(session, previous_hash)
             query_update = (
                 update(Package)
                 .where(
@@ -155,7 +221,62 @@ class UpdatePackageRepo(UploadPackageRepo):
                 )
             )
             await session.execute(query_update)
+            await bump_generation(session, application_id)
+            updated_result = await session.execute(
+                select(Package)
+                .options(joinedload(Package.application))
+                .filter(
+                    Package.id == package_id, Package.application_id == application_id
+                )
+            )
+            updated_package = updated_result.first()
             await session.commit()
+            version_index.update_package(application_id, updated_package[0])
+            return updated_package[0]
+
+
+def package_file_location(package: Package):
+    if package.hash is not None:
+        file_location = blob_location(package.hash)
+        if os.path.exists(file_location):
+            return file_location
+    file_location = legacy_file_location(package)
+    if os.path.exists(file_location):
+        return file_location
+    return None
+
+
+def legacy_file_location(package: Package):
+    """Path of packages uploaded before content addressed storage"""
+    return os.path.join(os.getcwd(), f"Storage/Package_{package.id}/{package.file}")
+
+
+class AttachBlobRepo(UploadPackageRepo):
+    async def attach_package_blob(
+        self, application_id: int, package_id: int, blob: BlobAttach
+    ):
+        async with self.unit_of_work() as session:
+            query_app = select(exists().where(Application.id == application_id))
+            result_app = await session.execute(query_app)
+            if not result_app.scalar():
+                raise InvalidAppIdError
+            query_package = select(
+                exists().where(
+                    Package.id == package_id, Package.application_id == application_id
+                )
+            )
+            result_package = await session.execute(query_package)
+            if not result_package.scalar():
+                raise InvalidPackageIdError
+            if not await self.blob_exists(session, blob.hash, blob.size):
+                raise BlobNotFoundError
+            await self.reference_blob(session, blob.hash, blob.size)
+            # collection may have removed the file while the row was locked
+            if not await get_storage().exists(blob_key(blob.hash)):
+                raise BlobNotFoundError
+            await self.replace_package_file(
+                session, package_id, blob.filename, blob.hash, blob.size
+            )
             updated_result = await session.execute(
                 select(Package)
                 .options(joinedload(Package.application))
@@ -164,16 +285,69 @@ class UpdatePackageRepo(UploadPackageRepo):
                 )
             )
             updated_package = updated_result.first()
+            await session.commit()
+            version_index.update_package(application_id, updated_package[0])
             return updated_package[0]
 
 
 class DownloadPackageRepo(PackageRepo):
-    async def download_package(self, application_id: int, package_id: int):
+    async def download_package(
+        self, application_id: int, package_id: int, file_hash: str = None
+    ):
         get_pack = await self.get_package(application_id, package_id)
-        file_name = get_pack.file
-        file_location = os.path.join(
-            os.getcwd(), f"Storage/Package_{package_id}/{file_name}"
-        )
-        if not os.path.exists(file_location):
+        if file_hash is not None and get_pack.hash != file_hash:
             raise FileNotFoundError("File not found")
-        return file_location, file_name
+        file_location = package_file_location(get_pack)
+        if file_location is None:
+            raise FileNotFoundError("File not found")
+        return file_location, get_pack.file, get_pack.hash
+
+    async def download_url(
+        self,
+        application_id: int,
+        package_id: int,
+        accept_encoding: str = None,
+        file_hash: str = None,
+    ):
+        """Presigned storage URL of the file, None when it is served locally"""
+        get_pack = await self.get_package(application_id, package_id)
+        if file_hash is not None and get_pack.hash != file_hash:
+            raise FileNotFoundError("File not found")
+        if get_pack.hash is None:
+            raise FileNotFoundError("File not found")
+        variant = await self.negotiate_variant(get_pack.hash, accept_encoding)
+        encoding = variant[0] if variant is not None else None
+        return await get_storage().presigned_url(
+            blob_key(get_pack.hash, encoding), get_pack.file
+        )
+
+    async def select_variant(self, file_hash: str, accept_encoding: str = None):
+        """Pick a precompressed variant of the local file for the client, if any"""
+        variant = await self.negotiate_variant(file_hash, accept_encoding)
+        if variant is None:
+            return None
+        encoding, variant_hash = variant
+        location = variant_location(file_hash, encoding)
+        if not os.path.exists(location):
+            return None
+        return location, encoding, variant_hash
+
+    async def negotiate_variant(self, file_hash: str, accept_encoding: str = None):
+        if file_hash is None or not accept_encoding:
+            return None
+        async with self.unit_of_work() as session:
+            result = await session.execute(
+                select(BlobVariant).filter(
+                    BlobVariant.hash == file_hash,
+                    BlobVariant.hash == Blob.hash,
+                    BlobVariant.size < Blob.size,
+                )
+            )
+            variants = {variant.encoding: variant for variant in result.scalars()}
+        encoding = negotiate_encoding(
+            accept_encoding,
+            {encoding: variant.size for encoding, variant in variants.items()},
+        )
+        if encoding is None:
+            return None
+        return encoding, variants[encoding].variant_hash
@@ -2,33 +2,34 @@ from fastapi import HTTPException, status
 from sqlalchemy import func, update
 from sqlalchemy.future import select
 
-from updateservice.connection_db import async_session
 from updateservice.models.schema import TeamCreate, TeamUpdate
 from updateservice.models.user_teams import Team
+from updateservice.repositories.base_repo import SessionRepo
 
 
-class TeamRepo:
+class TeamRepo(SessionRepo):
     async def create_team(self, team: TeamCreate):
-        async with async_session() as session:
+        async with self.unit_of_work() as session:
             new_team = Team(name=team.name, description=team.description)
             session.add(new_team)
-            await session.commit()
+            await session.flush()
             await session.refresh(new_team)
+            await session.commit()
             return new_team
 
 
-class GetTeamRepo:
+class GetTeamRepo(SessionRepo):
     async def get_all_teams(self, limit: int, offset: int):
-        async with async_session() as session:
+        async with self.unit_of_work() as session:
             select_teams = await session.execute(
                 select(Team).limit(limit).offset(offset)
             )
             return select_teams.scalars().all()
 
 
-class PutTeamRepo:
+class PutTeamRepo(SessionRepo):
     async def update_team(self, team_id: int, team: TeamUpdate):
-        async with async_session() as session:
+        async with self.unit_of_work() as session:
             update_post_query = await session.execute(
                 select(Team).filter(Team.id == team_id)
             )
@@ -50,7 +51,6 @@ class PutTeamRepo:
             updated_query.description = team.description
 
             await session.execute(updated_query)
-            await session.commit()
             updated_post_query = await session.execute(
                 select(
                     Team.id,
@@ -61,4 +61,5 @@ class PutTeamRepo:
                 ).filter(Team.id == team_id)
             )
             updated_post = updated_post_query.first()
+            await session.commit()
             return updated_post
@@ -1,79 +1,200 @@
 import datetime
+import uuid
 from datetime import timedelta
 
 import jwt
 from sqlalchemy import and_, select, update
 from sqlalchemy.orm import joinedload
 
-from updateservice.connection_db import async_session
 from updateservice.models.token import Token
 from updateservice.models.user_teams import User
+from updateservice.repositories.base_repo import SessionRepo
 from updateservice.settings import setting
 from updateservice.utils.exceptions import (
     InvalidUserIdError,
     TokenDeletedError,
     UserTokenNotFound,
 )
+from updateservice.utils.revocation_epochs import revocation_epochs
+from updateservice.utils.token_cache import token_status_cache
+from updateservice.utils.token_digest import token_digest
 
 jwt_secret = setting["secret_key"]
+token_lifetime = setting["token_lifetime"]
 
 
-class TokenRepo:
+class TokenRepo(SessionRepo):
     async def create_token(self, user_id: int):
-        async with async_session() as session:
+        async with self.unit_of_work() as session:
             query = await session.execute(select(User).filter(User.id == user_id))
             check_user_id = query.first()
             if check_user_id is None:
                 raise InvalidUserIdError
-            exp = datetime.datetime.utcnow() + timedelta(seconds=43200)
-            payload = {"user_id": user_id, "exp": exp}
+            exp = datetime.datetime.utcnow() + timedelta(seconds=token_lifetime)
+            jti = str(uuid.uuid4())
+            payload = {
+                "user_id": user_id,
+                "exp": exp,
+                "jti": jti,
+                "epoch": check_user_id[0].token_epoch or 0,
+            }
             encoded_jwt = jwt.encode(payload, jwt_secret, algorithm="HS256")
-            created_token = Token(user_id=user_id, token=encoded_jwt)
+            created_token = Token(
+                user_id=user_id,
+                token=encoded_jwt,
+                token_hash=token_digest(encoded_jwt),
+                jti=jti,
+                expires_at=exp,
+            )
 
             session.add(created_token)
-            await session.commit()
+            await session.flush()
             await session.refresh(created_token)
+            await session.commit()
 
             return created_token
 
 
-class DeleteTokenRepo:
+class DeleteTokenRepo(SessionRepo):
     async def delete_token(self, user_id: int, token: str):
-        async with async_session() as session:
+        async with self.unit_of_work() as session:
             user_query = await session.execute(select(User).filter(User.id == user_id))
             check_user_id = user_query.first()
             if check_user_id is None:
                 raise InvalidUserIdError
+            token_hash = token_digest(token)
             query_token_user = await session.execute(
                 select(Token)
                 .options(joinedload(Token.user_relationship))
-                .filter(Token.user_id == user_id, Token.token == token)
+                .filter(Token.user_id == user_id, Token.token_hash == token_hash)
             )
             selected_token = query_token_user.first()
             if not selected_token:
                 raise UserTokenNotFound
+            deleted_at = datetime.datetime.utcnow()
             delete_query = (
                 update(Token)
-                .values(deleted=True)
-                .filter(and_(Token.user_id == user_id, Token.token == token))
+                .values(deleted=True, updated_at=deleted_at)
+                .filter(and_(Token.user_id == user_id, Token.token_hash == token_hash))
             )
             await session.execute(delete_query)
             await session.commit()
+            token_status_cache.evict(token)
+            if selected_token[0].jti is not None:
+                revocation_epochs.revoke_jti(selected_token[0].jti, deleted_at)
 
             return "The token has been deleted successfully"
 
 
-class CheckTokenRepo:
+class CheckTokenRepo(SessionRepo):
     async def token_status(self, user_id: int, token: str, deleted: bool):
-        async with async_session() as session:
+        if not deleted:
+            cached_token = token_status_cache.get(token)
+            if cached_token is not None and cached_token.user_id == user_id:
+                return cached_token
+        async with self.unit_of_work() as session:
             token_query = await session.execute(
                 select(Token.user_id, Token.token, Token.deleted).filter(
                     Token.user_id == user_id,
-                    Token.token == token,
+                    Token.token_hash == token_digest(token),
                     Token.deleted == deleted,
                 )
             )
         the_token = token_query.first()
         if the_token is None:
             raise TokenDeletedError
+        if not deleted:
+            token_status_cache.set(token, the_token)
         return the_token
+
+
+class IntrospectTokenRepo(SessionRepo):
+    async def tokens_status(self, tokens: list):
+        statuses = {}
+        missing = {}
+        for token in tokens:
+            cached_token = token_status_cache.get(token)
+            if cached_token is not None:
+                statuses[token] = cached_token
+            else:
+                missing[token_digest(token)] = token
+        if not missing:
+            return statuses
+        async with self.unit_of_work() as session:
+            token_query = await session.execute(
+                select(
+                    Token.user_id, Token.token, Token.deleted, Token.token_hash
+                ).filter(Token.token_hash.in_(list(missing)))
+            )
+            found_tokens = token_query.all()
+        for found_token in found_tokens:
+            token = missing[found_token.token_hash]
+            statuses[token] = found_token
+            if not found_token.deleted:
+                token_status_cache.set(token, found_token)
+        return statuses
+
+
+class RevokeUserTokensRepo(SessionRepo):
+    async def revoke_user_tokens(self, user_id: int):
+        async with self.unit_of_work() as session:
+            revoke_query = (
+                update(User)
+                .where(User.id == user_id)
+                .values(
+                    token_epoch=User.token_epoch + 1,
+                    token_epoch_updated_at=datetime.datetime.utcnow(),
+                )
+                .returning(User.token_epoch)
+                .execution_options(synchronize_session=False)
+            )
+            result = await session.execute(revoke_query)
+            new_epoch = result.scalar()
+            if new_epoch is None:
+                raise InvalidUserIdError
+            await session.commit()
+            revocation_epochs.set_epoch(user_id, new_epoch)
+
+            return "All tokens of the user have been revoked"
+
+
+class RevocationEpochRepo(SessionRepo):
+    async def refresh_if_stale(self):
+        if not revocation_epochs.is_stale():
+            return
+        async with revocation_epochs.refresh_lock:
+            if revocation_epochs.is_stale():
+                await self.refresh_epochs()
+
+    async def refresh_epochs(self):
+        since = revocation_epochs.watermark
+        async with self.unit_of_work() as session:
+            epochs_query = select(
+                User.id, User.token_epoch, User.token_epoch_updated_at
+            ).filter(User.token_epoch > 0)
+            revoked_query = select(Token.jti, Token.updated_at).filter(
+                Token.deleted.is_(True), Token.jti.isnot(None)
+            )
+            if since is None:
+                revoked_query = revoked_query.filter(
+                    Token.updated_at
+                    >= datetime.datetime.utcnow() - timedelta(seconds=token_lifetime)
+                )
+            else:
+                overlap_since = since - revocation_epochs.watermark_overlap
+                epochs_query = epochs_query.filter(
+                    User.token_epoch_updated_at >= overlap_since
+                )
+                revoked_query = revoked_query.filter(Token.updated_at >= overlap_since)
+            epochs = (await session.execute(epochs_query)).all()
+            revoked = (await session.execute(revoked_query)).all()
+        watermark = since
+        for user_id, epoch, updated_at in epochs:
+            revocation_epochs.set_epoch(user_id, epoch)
+            if updated_at is not None and (watermark is None or updated_at > watermark):
+                watermark = updated_at
+        for jti, updated_at in revoked:
+            revocation_epochs.revoke_jti(jti, updated_at)
+            if updated_at is not None and (watermark is None or updated_at > watermark):
+                watermark = updated_at
+        revocation_epochs.mark_refreshed(watermark)
@@ -0,0 +1,75 @@
+from sqlalchemy import select
+
+from updateservice.models.application import Application
+from updateservice.models.package import Package
+from updateservice.repositories.base_repo import SessionRepo
+from updateservice.utils.exceptions import InvalidAppIdError
+from updateservice.utils.version_index import version_index
+from updateservice.utils.versions import parse_version
+
+
+class UpdateCheckRepo(SessionRepo):
+    async def latest_package(self, application_id: int, current_version: str):
+        """Newest package with a file above current_version, None when up to date"""
+        await self.load_versions([application_id])
+        if not version_index.is_known(application_id):
+            raise InvalidAppIdError
+        return version_index.latest_above(
+            application_id, parse_version(current_version)
+        )
+
+    async def latest_packages(self, checks: list):
+        """(application found, newest package or None) per check, in order"""
+        await self.load_versions(list({check.application_id for check in checks}))
+        results = []
+        for check in checks:
+            if not version_index.is_known(check.application_id):
+                results.append((False, None))
+                continue
+            latest = version_index.latest_above(
+                check.application_id, parse_version(check.current_version)
+            )
+            results.append((True, latest))
+        return results
+
+    async def load_versions(self, application_ids: list):
+        """Load stale applications, known or not, into the version index"""
+        if not any(map(version_index.is_stale, application_ids)):
+            return
+        async with version_index.refresh_lock:
+            stale_ids = list(filter(version_index.is_stale, application_ids))
+            if not stale_ids:
+                return
+            for application_id in stale_ids:
+                version_index.begin_load(application_id)
+            try:
+                async with self.unit_of_work() as session:
+                    query_apps = select(Application.id).filter(
+                        Application.id.in_(stale_ids)
+                    )
+                    result_apps = await session.execute(query_apps)
+                    found_ids = set(result_apps.scalars().all())
+                    query_packages = select(
+                        Package.application_id,
+                        Package.id,
+                        Package.version,
+                        Package.hash,
+                        Package.size,
+                        Package.url,
+                    ).filter(
+                        Package.application_id.in_(found_ids),
+                        Package.hash.is_not(None),
+                    )
+                    result_packages = await session.execute(query_packages)
+                    packages = {application_id: [] for application_id in found_ids}
+                    for package in result_packages.all():
+                        packages[package.application_id].append(package)
+            except BaseException:
+                for application_id in stale_ids:
+                    version_index.abort_load(application_id)
+                raise
+            for application_id in stale_ids:
+                if application_id in packages:
+                    version_index.load(application_id, packages[application_id])
+                else:
+                    version_index.load_unknown(application_id)
@@ -0,0 +1,244 @@
+import hashlib
+import os
+import time
+import uuid
+from datetime import datetime, timedelta
+
+import aiofiles
+from sqlalchemy import delete, select, update
+from sqlalchemy.orm import joinedload
+from sqlalchemy.sql.expression import exists
+
+from updateservice.models.application import Application
+from updateservice.models.package import Package
+from updateservice.models.schema_upload_session import (
+    DirectUploadCreate,
+    UploadSessionCreate,
+)
+from updateservice.models.upload_session import UploadSession
+from updateservice.repositories.package_repo import UploadPackageRepo
+from updateservice.settings import setting
+from updateservice.utils.exceptions import (
+    DirectUploadUnavailableError,
+    InvalidAppIdError,
+    InvalidPackageIdError,
+    InvalidUploadIdError,
+    UploadNotReceivedError,
+    UploadOffsetError,
+    UploadSizeError,
+)
+from updateservice.utils.storage import get_storage, upload_key
+from updateservice.utils.upload_hashers import upload_hashers
+from updateservice.utils.version_index import version_index
+
+upload_session_ttl = setting["upload_session_ttl"]
+
+
+def upload_part_location(upload_id: str):
+    return os.path.join(os.getcwd(), "Storage", "uploads", f"{upload_id}.part")
+
+
+def upload_expiry():
+    """Sessions without activity until then are removed"""
+    return datetime.utcnow() + timedelta(seconds=upload_session_ttl)
+
+
+class UploadSessionRepo(UploadPackageRepo):
+    async def check_package(self, session, application_id: int, package_id: int):
+        query_app = select(exists().where(Application.id == application_id))
+        result_app = await session.execute(query_app)
+        if not result_app.scalar():
+            raise InvalidAppIdError
+        query_package = select(
+            exists().where(
+                Package.id == package_id, Package.application_id == application_id
+            )
+        )
+        result_package = await session.execute(query_package)
+        if not result_package.scalar():
+            raise InvalidPackageIdError
+
+    async def select_upload(
+        self,
+        session,
+        application_id: int,
+        package_id: int,
+        upload_id: str,
+        for_update: bool = False,
+        direct: bool = False,
+    ):
+        await self.check_package(session, application_id, package_id)
+        query_upload = select(UploadSession).filter(
+            UploadSession.id == upload_id,
+            UploadSession.package_id == package_id,
+            UploadSession.direct.is_(direct),
+        )
+        if for_update:
+            query_upload = query_upload.with_for_update()
+        result_upload = await session.execute(query_upload)
+        upload = result_upload.scalar()
+        if upload is None:
+            raise InvalidUploadIdError
+        return upload
+
+    async def create_upload(
+        self, application_id: int, package_id: int, upload: UploadSessionCreate
+    ):
+        async with self.unit_of_work() as session:
+            await self.check_package(session, application_id, package_id)
+            new_upload = UploadSession(
+                id=uuid.uuid4().hex,
+                package_id=package_id,
+                filename=upload.filename,
+                size=upload.size,
+                offset=0,
+                expires_at=upload_expiry(),
+            )
+            session.add(new_upload)
+            await session.flush()
+            part_location = upload_part_location(new_upload.id)
+            os.makedirs(os.path.dirname(part_location), exist_ok=True)
+            async with aiofiles.open(part_location, "wb"):
+                pass
+            upload_hashers.set(new_upload.id, 0, hashlib.sha256())
+            await session.commit()
+            return new_upload
+
+    async def get_upload(self, application_id: int, package_id: int, upload_id: str):
+        async with self.unit_of_work() as session:
+            return await self.select_upload(
+                session, application_id, package_id, upload_id
+            )
+
+    async def write_chunk(
+        self,
+        application_id: int,
+        package_id: int,
+        upload_id: str,
+        offset: int,
+        chunks,
+    ):
+        async with self.unit_of_work() as session:
+            upload = await self.select_upload(
+                session, application_id, package_id, upload_id, for_update=True
+            )
+            if offset != upload.offset:
+                raise UploadOffsetError(upload.offset)
+            hashed_offset, hasher = upload_hashers.pop(upload_id)
+            if hashed_offset != offset:
+                hasher = None
+            part_location = upload_part_location(upload_id)
+            written = 0
+            async with aiofiles.open(part_location, "r+b") as f:
+                await f.seek(offset)
+                async for chunk in chunks:
+                    written += len(chunk)
+                    if upload.size is not None and offset + written > upload.size:
+                        raise UploadSizeError(upload.size)
+                    await f.write(chunk)
+                    if hasher is not None:
+                        hasher.update(chunk)
+                await f.truncate()
+            upload.offset = offset + written
+            upload.expires_at = upload_expiry()
+            await session.flush()
+            await session.commit()
+            if hasher is not None:
+                upload_hashers.set(upload_id, upload.offset, hasher)
+            return upload
+
+    async def finalize_upload(
+        self, application_id: int, package_id: int, upload_id: str
+    ):
+        async with self.unit_of_work() as session:
+            upload = await self.select_upload(
+                session, application_id, package_id, upload_id, for_update=True
+            )
+            if upload.size is not None and upload.offset != upload.size:
+                raise UploadSizeError(upload.size)
+            part_location = upload_part_location(upload_id)
+            # an interrupted chunk can leave bytes past the committed offset
+            async with aiofiles.open(part_location, "r+b") as f:
+                await f.truncate(upload.offset)
+            hashed_offset, hasher = upload_hashers.pop(upload_id)
+            if hashed_offset == upload.offset:
+                file_hash = hasher.hexdigest()
+            else:
+                # chunks were received by another process, hash the part from disk
+                file_hash = await self.make_hash(part_location)
+            await self.store_blob(session, part_location, file_hash, upload.offset)
+            await self.replace_package_file(
+                session, package_id, upload.filename, file_hash, upload.offset
+            )
+            await session.execute(
+                delete(UploadSession).filter(UploadSession.id == upload_id)
+            )
+            updated_result = await session.execute(
+                select(Package)
+                .options(joinedload(Package.application))
+                .filter(
+                    Package.id == package_id, Package.application_id == application_id
+                )
+            )
+            updated_package = updated_result.first()
+            await session.commit()
+            version_index.update_package(application_id, updated_package[0])
+            return updated_package[0]
+
+    async def create_direct_upload(
+        self, application_id: int, package_id: int, upload: DirectUploadCreate
+    ):
+        async with self.unit_of_work() as session:
+            await self.check_package(session, application_id, package_id)
+            new_upload = UploadSession(
+                id=uuid.uuid4().hex,
+                package_id=package_id,
+                filename=upload.filename,
+                size=upload.size,
+                offset=0,
+                direct=True,
+                hash=upload.hash,
+                status="open",
+                expires_at=upload_expiry(),
+            )
+            url = await get_storage().presigned_put_url(upload_key(new_upload.id))
+            if url is None:
+                raise DirectUploadUnavailableError
+            session.add(new_upload)
+            await session.flush()
+            await session.commit()
+            expires = int(time.time()) + setting["presigned_url_ttl"]
+            return new_upload, url, expires
+
+    async def get_direct_upload(
+        self, application_id: int, package_id: int, upload_id: str
+    ):
+        async with self.unit_of_work() as session:
+            return await self.select_upload(
+                session, application_id, package_id, upload_id, direct=True
+            )
+
+    async def finalize_direct_upload(
+        self, application_id: int, package_id: int, upload_id: str
+    ):
+        """Queue a direct upload for verification once its object has arrived"""
+        async with self.unit_of_work() as session:
+            upload = await self.select_upload(
+                session,
+                application_id,
+                package_id,
+                upload_id,
+                for_update=True,
+                direct=True,
+            )
+            if upload.status == "open":
+                received_size = await get_storage().size(upload_key(upload_id))
+                if received_size is None:
+                    raise UploadNotReceivedError
+                if received_size != upload.size:
+                    raise UploadSizeError(upload.size)
+                upload.status = "verifying"
+                upload.expires_at = upload_expiry()
+                await session.flush()
+            await session.commit()
+            return upload
@@ -1,24 +1,28 @@
+import asyncio
 import datetime
+import logging
 
-from sqlalchemy import select, update
+from sqlalchemy import bindparam, select, update
 
 from updateservice.connection_db import async_session
 from updateservice.models.schema import UserCreate
 from updateservice.models.user_teams import User
+from updateservice.repositories.base_repo import SessionRepo
 from updateservice.utils.exceptions import UsersNotFoundError
 
 
-class UserRepo:
+class UserRepo(SessionRepo):
     async def create_user(self, user: UserCreate):
-        async with async_session() as session:
+        async with self.unit_of_work() as session:
             new_user = User(email=user.email, full_name=user.full_name)
             session.add(new_user)
-            await session.commit()
+            await session.flush()
             await session.refresh(new_user)
+            await session.commit()
             return new_user
 
     async def get_list_users(self, limit: int, offset: int, search: str):
-        async with async_session() as session:
+        async with self.unit_of_work() as session:
             if search:
                 select_users = await session.execute(
                     select(User)
@@ -36,14 +40,71 @@ class UserRepo:
             return selected_users
 
 
-class UserLoginRepo:
+logger = logging.getLogger(__name__)
+
+
+class LastLoginBuffer:
+    """Write-behind buffer coalescing last_login timestamps per user"""
+
+    def __init__(self):
+        self._pending = {}
+        self._flush_task = None
+
+    def __len__(self):
+        return len(self._pending)
+
+    def record(self, user_id: int):
+        self._pending[user_id] = datetime.datetime.utcnow()
+
+    async def flush(self):
+        if not self._pending:
+            return 0
+        pending, self._pending = self._pending, {}
+        update_query = (
+            update(User.__table__)
+            .where(User.__table__.c.id == bindparam("b_user_id"))
+            .values(last_login=bindparam("b_last_login"))
+        )
+        params = [
+            {"b_user_id": user_id, "b_last_login": last_login}
+            for user_id, last_login in pending.items()
+        ]
+        try:
+            async with async_session() as session:
+                await session.execute(update_query, params)
+                await session.commit()
+        except Exception:
+            for user_id, last_login in pending.items():
+                self._pending.setdefault(user_id, last_login)
+            raise
+        return len(params)
+
+    async def _flush_periodically(self, interval: float):
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await self.flush()
+            except Exception:
+                logger.exception("Could not flush last_login updates")
+
+    def start(self, interval: float):
+        if self._flush_task is None:
+            self._flush_task = asyncio.create_task(self._flush_periodically(interval))
+
+    async def stop(self):
+        if self._flush_task is not None:
+            self._flush_task.cancel()
+            try:
+                await self._flush_task
+            except asyncio.CancelledError:
+                pass
+            self._flush_task = None
+        await self.flush()
+
+
+last_login_buffer = LastLoginBuffer()
+
+
+class UserLoginRepo(SessionRepo):
     async def update_last_login(self, user_id: int):
-        async with async_session() as session:
-
-            update_query = (
-                update(User)
-                .where(User.id == user_id)
-                .values(last_login=datetime.datetime.utcnow())
-            )
-            await session.execute(update_query)
-            await session.commit()
+        last_login_buffer.record(user_id)
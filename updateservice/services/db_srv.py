@@ -4,7 +4,7 @@ from ..repositories.db_repo import DbConn
 
 
 class PostApiServer(DbConn):
-    def __init__(self, repo: DbConn = Depends(DbConn)):
+    def __init__(self, repo: DbConn = Depends(DbConn.dependency)):
         self.repo = repo
 
     async def check_connection(self):
@@ -13,6 +13,37 @@ class AppSettings(BaseSettings):
     my_secret_key: str = "MY_SECRET_KEY"
     bucket_name: str = "BUCKET_NAME"
     broker_url: str = "BROKER_URL"
+    token_lifetime: int = 43200
+    stateless_tokens: bool = False
+    revocation_refresh_interval: float = 5.0
+    token_cache_size: int = 10000
+    token_cache_ttl: float = 30.0
+    version_index_refresh_interval: float = 30.0
+    jwt_cache_size: int = 10000
+    download_url_ttl: int = 300
+    upload_chunk_size: int = 1024 * 1024
+    upload_session_ttl: int = 86400
+    upload_session_cleanup_interval: int = 3600
+    upload_session_cleanup_batch_size: int = 500
+    upload_hasher_cache_size: int = 1000
+    download_sendfile: bool = True
+    delta_cache_max_size: int = 10 * 1024 * 1024 * 1024
+    delta_generation_interval: int = 600
+    delta_served_flush_interval: float = 30.0
+    variant_compression_interval: int = 60
+    variant_compression_batch_size: int = 20
+    storage_backend: str = "local"
+    storage_bucket: str = "packages"
+    storage_secure: bool = False
+    presigned_url_ttl: int = 3600
+    direct_upload_verify_interval: int = 10
+    direct_upload_verify_batch_size: int = 10
+    token_compaction_interval: int = 3600
+    token_compaction_batch_size: int = 1000
+    token_compaction_pause: float = 0.1
+    last_login_flush_interval: float = 5.0
+    blob_collection_interval: int = 3600
+    blob_collection_batch_size: int = 500
     POSTGRES_MAX_INT: int = 2**31 - 1
     POSTGRES_MAX_STR: str = "s" * 256
 
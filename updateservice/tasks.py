@@ -1,19 +1,59 @@
 from minio import Minio
 import pyshorteners
 from datetime import datetime
+import asyncio
 import os
+import shutil
+import tempfile
+import time
+import uuid
+from contextlib import asynccontextmanager
+from sqlalchemy import delete, func, or_, select, tuple_, update
+from sqlalchemy.dialects.postgresql import insert
 from updateservice.models.backup import Backup
+from updateservice.models.blob import Blob
+from updateservice.models.blob_variant import BlobVariant
+from updateservice.models.delta import Delta
+from updateservice.models.package import Package
+from updateservice.models.token import Token
+from updateservice.models.upload_session import UploadSession
+from updateservice.models import user_teams  # resolves Token.user_relationship
 from asgiref.sync import async_to_sync
 from updateservice.connection_db import celery_async_session
 import re
 from updateservice.settings import setting
 from updateservice.celeryapp import app
+from updateservice.repositories.manifest_repo import ManifestRepo
+from updateservice.repositories.package_repo import (
+    legacy_file_location,
+    package_file_location,
+)
+from updateservice.repositories.upload_session_repo import (
+    UploadSessionRepo,
+    upload_part_location,
+)
+from updateservice.utils.compression import (
+    available_encodings,
+    compress_file,
+    encoding_suffixes,
+)
+from updateservice.utils.delta_cache import delta_cache
+from updateservice.utils.file_digest import file_digest
+from updateservice.utils.storage import blob_key, get_storage, upload_key
+from updateservice.utils.upload_hashers import upload_hashers
+from updateservice.utils.versions import parse_version
 
 
 endpoint = setting["endpoint"]
 access_key = setting["my_access_key"]
 secret_key = setting["my_secret_key"]
 bucket_name = setting["bucket_name"]
+compaction_batch_size = setting["token_compaction_batch_size"]
+compaction_pause = setting["token_compaction_pause"]
+blob_collection_batch_size = setting["blob_collection_batch_size"]
+variant_batch_size = setting["variant_compression_batch_size"]
+verify_batch_size = setting["direct_upload_verify_batch_size"]
+upload_cleanup_batch_size = setting["upload_session_cleanup_batch_size"]
 
 
 def short_url(url): 
@@ -90,5 +130,528 @@ def backup_task():
     async_to_sync(insert_to_db)()
 
 
+async def compact_tokens():
+    started = time.monotonic()
+    removed = 0
+    compactable = Token.expires_at < datetime.utcnow()
+    if not setting["stateless_tokens"]:
+        # stateless nodes load revoked jti from these rows until the token expires
+        compactable = or_(compactable, Token.deleted.is_(True))
+    batch = (
+        select(Token.id)
+        .filter(compactable)
+        .limit(compaction_batch_size)
+        .with_for_update(skip_locked=True)
+    )
+    delete_batch = (
+        delete(Token)
+        .where(Token.id.in_(batch.scalar_subquery()))
+        .execution_options(synchronize_session=False)
+    )
+
+    async with celery_async_session() as session:
+        while True:
+            result = await session.execute(delete_batch)
+            await session.commit()
+            removed += result.rowcount
+            if result.rowcount < compaction_batch_size:
+                break
+            await asyncio.sleep(compaction_pause)
+
+    elapsed = time.monotonic() - started
+    timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    print(f"{timestamp}: Compacted tokens table, removed {removed} rows in {elapsed:.2f}s")
+    return {"removed": removed, "seconds": elapsed}
+
+
+@app.task(name='tasks.compact_tokens_task')
+def compact_tokens_task():
+    return async_to_sync(compact_tokens)()
+
+
+async def adopt_orphan_blobs():
+    """Give blob objects without a row an unreferenced one for collection
+
+    A transaction that stored a blob and then failed leaves its object
+    behind. Uploads insert the row before storing, so a pending upload of
+    the same content conflicts on the row instead of losing its file.
+    """
+    adopted = 0
+    sizes = {}
+    for key, size in await get_storage().list_keys("blobs/"):
+        file_hash = key.rsplit("/", 1)[-1].split(".", 1)[0]
+        if key == blob_key(file_hash) or file_hash not in sizes:
+            sizes[file_hash] = size
+    hashes = list(sizes)
+    for start in range(0, len(hashes), blob_collection_batch_size):
+        batch = hashes[start : start + blob_collection_batch_size]
+        async with celery_async_session() as session:
+            known = set(
+                (await session.execute(select(Blob.hash).filter(Blob.hash.in_(batch))))
+                .scalars()
+                .all()
+            )
+            orphans = [file_hash for file_hash in batch if file_hash not in known]
+            if not orphans:
+                continue
+            result = await session.execute(
+                insert(Blob)
+                .values(
+                    [
+                        {"hash": file_hash, "size": sizes[file_hash], "ref_count": 0}
+                        for file_hash in orphans
+                    ]
+                )
+                .on_conflict_do_nothing()
+            )
+            await session.commit()
+            adopted += result.rowcount
+    return adopted
+
+
+async def collect_blobs():
+    removed = 0
+    storage = get_storage()
+    adopted = await adopt_orphan_blobs()
+    batch = (
+        select(Blob.hash)
+        .filter(Blob.ref_count <= 0)
+        .limit(blob_collection_batch_size)
+        .with_for_update(skip_locked=True)
+    )
+
+    async with celery_async_session() as session:
+        while True:
+            hashes = (await session.execute(batch)).scalars().all()
+            if not hashes:
+                break
+            # rows stay locked until commit, a concurrent upload of the same
+            # content waits and then stores the file again
+            for file_hash in hashes:
+                await storage.delete(blob_key(file_hash))
+                for encoding in encoding_suffixes:
+                    await storage.delete(blob_key(file_hash, encoding))
+            await session.execute(
+                delete(Blob)
+                .where(Blob.hash.in_(hashes))
+                .execution_options(synchronize_session=False)
+            )
+            await session.commit()
+            removed += len(hashes)
+            if len(hashes) < blob_collection_batch_size:
+                break
+
+    timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    print(
+        f"{timestamp}: Collected {removed} unreferenced blobs, {adopted} were orphaned"
+    )
+    return {"removed": removed, "adopted": adopted}
+
+
+@app.task(name='tasks.collect_blobs_task')
+def collect_blobs_task():
+    return async_to_sync(collect_blobs)()
+
+
+def storage_temp_directory():
+    directory = os.path.join(os.getcwd(), "Storage", "uploads")
+    os.makedirs(directory, exist_ok=True)
+    return directory
+
+
+async def link_legacy_blobs():
+    """Store files of Storage/Package_<id>/ under their blob key
+
+    Run once after upgrading to content addressed storage, on the host that
+    holds the Storage directory. Files already stored are skipped.
+    """
+    linked = 0
+    missing = 0
+    storage = get_storage()
+    async with celery_async_session() as session:
+        result = await session.execute(
+            select(Package).filter(Package.hash.is_not(None), Package.file.is_not(None))
+        )
+        packages = result.scalars().all()
+
+    for package in packages:
+        if await storage.exists(blob_key(package.hash)):
+            continue
+        source = legacy_file_location(package)
+        if not os.path.exists(source):
+            missing += 1
+            continue
+        temp_location = os.path.join(storage_temp_directory(), f"{uuid.uuid4().hex}.part")
+        try:
+            os.link(source, temp_location)
+        except OSError:
+            shutil.copy2(source, temp_location)
+        await storage.store(blob_key(package.hash), temp_location)
+        linked += 1
+
+    timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    print(f"{timestamp}: Linked {linked} legacy package files, {missing} not found")
+    return {"linked": linked, "missing": missing}
+
+
+@app.task(name='tasks.link_legacy_blobs_task')
+def link_legacy_blobs_task():
+    return async_to_sync(link_legacy_blobs)()
+
+
+def version_key(package):
+    return parse_version(package.version) or (-1, -1, -1)
+
+
+@asynccontextmanager
+async def package_local_file(package):
+    storage = get_storage()
+    key = blob_key(package.hash)
+    if await storage.exists(key):
+        async with storage.local_copy(key) as location:
+            yield location
+    else:
+        yield package_file_location(package)
+
+
+def wants_delta(state, source_hash: str, target_hash: str) -> bool:
+    """Whether a consecutive pair needs its delta generated in this run"""
+    if state is None:
+        return True
+    if state.status == "stored":
+        return delta_cache.get(source_hash, target_hash) is None
+    if state.status == "evicted":
+        # eviction is final until the pair is requested again
+        return state.served_at is not None and state.served_at > state.evicted_at
+    return False
+
+
+async def remove_stale_deltas(stale: list):
+    """Forget pairs that are no longer consecutive versions of an application"""
+    if not stale:
+        return 0
+    async with celery_async_session() as session:
+        await session.execute(
+            delete(Delta)
+            .where(tuple_(Delta.source_hash, Delta.target_hash).in_(stale))
+            .execution_options(synchronize_session=False)
+        )
+        await session.commit()
+    for source_hash, target_hash in stale:
+        delta_cache.remove(source_hash, target_hash)
+    return len(stale)
+
+
+async def evict_deltas():
+    """Evict the least recently served deltas past delta_cache.max_size"""
+    evicted = []
+    total = 0
+    async with celery_async_session() as session:
+        result = await session.execute(
+            select(Delta)
+            .filter(Delta.status == "stored")
+            .order_by(func.coalesce(Delta.served_at, Delta.created_at).desc())
+        )
+        for delta in result.scalars().all():
+            total += delta.size
+            if total <= delta_cache.max_size:
+                continue
+            delta.status = "evicted"
+            delta.evicted_at = datetime.utcnow()
+            evicted.append((delta.source_hash, delta.target_hash))
+        await session.commit()
+    for source_hash, target_hash in evicted:
+        delta_cache.remove(source_hash, target_hash)
+    return len(evicted)
+
+
+async def generate_deltas():
+    generated = 0
+    async with celery_async_session() as session:
+        result = await session.execute(
+            select(Package).filter(Package.hash.is_not(None))
+        )
+        packages = result.scalars().all()
+        result = await session.execute(select(Delta))
+        states = {
+            (state.source_hash, state.target_hash): state
+            for state in result.scalars().all()
+        }
+
+    pairs = {}
+    by_application = {}
+    for package in packages:
+        by_application.setdefault(package.application_id, []).append(package)
+    for application_packages in by_application.values():
+        application_packages.sort(key=version_key)
+        for source, target in zip(application_packages, application_packages[1:]):
+            if source.hash != target.hash:
+                pairs[(source.hash, target.hash)] = (source, target)
+
+    for (source_hash, target_hash), (source, target) in pairs.items():
+        if not wants_delta(
+            states.get((source_hash, target_hash)), source_hash, target_hash
+        ):
+            continue
+        async with package_local_file(source) as source_location:
+            async with package_local_file(target) as target_location:
+                if source_location is None or target_location is None:
+                    continue
+                size = await asyncio.to_thread(
+                    delta_cache.generate,
+                    source_hash,
+                    target_hash,
+                    source_location,
+                    target_location,
+                )
+        status = "full" if size is None else "stored"
+        async with celery_async_session() as session:
+            await session.execute(
+                insert(Delta)
+                .values(
+                    source_hash=source_hash,
+                    target_hash=target_hash,
+                    status=status,
+                    size=size,
+                )
+                .on_conflict_do_update(
+                    index_elements=[Delta.source_hash, Delta.target_hash],
+                    set_={"status": status, "size": size, "evicted_at": None},
+                )
+            )
+            await session.commit()
+        generated += 1
+
+    removed = await remove_stale_deltas([pair for pair in states if pair not in pairs])
+    # once per run, deltas generated above count as recently served
+    evicted = await evict_deltas()
+
+    timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    print(
+        f"{timestamp}: Generated {generated} package deltas, "
+        f"evicted {evicted}, removed {removed} stale"
+    )
+    return {"generated": generated, "evicted": evicted, "removed": removed}
+
+
+@app.task(name='tasks.generate_deltas_task')
+def generate_deltas_task():
+    return async_to_sync(generate_deltas)()
+
+
+async def compress_blob(file_hash: str, blob_size: int):
+    """Store the variants smaller than the blob, {encoding: (size, hash)}"""
+    variants = {}
+    storage = get_storage()
+    async with storage.local_copy(blob_key(file_hash)) as location:
+        for encoding in available_encodings():
+            # next to the blobs, so LocalStorage.store is a rename
+            handle, temp_location = tempfile.mkstemp(
+                suffix=".part", dir=storage_temp_directory()
+            )
+            os.close(handle)
+            try:
+                size, variant_hash = await asyncio.to_thread(
+                    compress_file, location, encoding, temp_location
+                )
+            except BaseException:
+                os.remove(temp_location)
+                raise
+            # already compressed firmware, the variant could never be served
+            if size >= blob_size:
+                os.remove(temp_location)
+                continue
+            await storage.store(blob_key(file_hash, encoding), temp_location, encoding)
+            variants[encoding] = (size, variant_hash)
+    return variants
+
+
+async def compress_variants():
+    compressed = 0
+    skipped = 0
+    failed = 0
+    storage = get_storage()
+    pending = (
+        select(Blob.hash, Blob.size)
+        .filter(Blob.ref_count > 0, Blob.variants_status.is_(None))
+        .order_by(Blob.variants_checked_at.asc().nulls_first())
+        .limit(variant_batch_size)
+    )
+
+    async with celery_async_session() as session:
+        blobs = (await session.execute(pending)).all()
+
+    for file_hash, blob_size in blobs:
+        # compressed outside of any transaction, level 19 zstd takes a while
+        try:
+            variants = await compress_blob(file_hash, blob_size)
+        except Exception as e:
+            # left pending, it moves behind the blobs not attempted yet
+            print(f"Could not compress blob {file_hash}: {e}")
+            async with celery_async_session() as session:
+                await session.execute(
+                    update(Blob)
+                    .where(Blob.hash == file_hash)
+                    .values(variants_checked_at=datetime.utcnow())
+                )
+                await session.commit()
+            failed += 1
+            continue
+        async with celery_async_session() as session:
+            # the updated row stays locked, collect_blobs waits for the commit
+            marked = await session.execute(
+                update(Blob)
+                .where(Blob.hash == file_hash)
+                .values(variants_status="done", variants_checked_at=datetime.utcnow())
+                .returning(Blob.hash)
+            )
+            if marked.scalar() is None:
+                # collected meanwhile, its variant objects would never be removed
+                for encoding in variants:
+                    await storage.delete(blob_key(file_hash, encoding))
+                continue
+            for encoding, (size, variant_hash) in variants.items():
+                await session.execute(
+                    insert(BlobVariant)
+                    .values(
+                        hash=file_hash,
+                        encoding=encoding,
+                        size=size,
+                        variant_hash=variant_hash,
+                    )
+                    .on_conflict_do_nothing()
+                )
+            await session.commit()
+        if variants:
+            compressed += 1
+        else:
+            skipped += 1
+
+    timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    print(
+        f"{timestamp}: Compressed variants for {compressed} blobs, "
+        f"skipped {skipped}, {failed} failed"
+    )
+    return {"compressed": compressed, "skipped": skipped, "failed": failed}
+
+
+@app.task(name='tasks.compress_variants_task')
+def compress_variants_task():
+    return async_to_sync(compress_variants)()
+
+
+async def verify_direct_uploads():
+    verified = 0
+    failed = 0
+    storage = get_storage()
+    repo = UploadSessionRepo()
+    manifest_repo = ManifestRepo()
+    pending = (
+        select(UploadSession.id, UploadSession.size, UploadSession.hash)
+        .filter(UploadSession.direct.is_(True), UploadSession.status == "verifying")
+        .limit(verify_batch_size)
+    )
+
+    async with celery_async_session() as session:
+        uploads = (await session.execute(pending)).all()
+
+    for upload_id, expected_size, expected_hash in uploads:
+        key = upload_key(upload_id)
+        # objects can be several GB, they are hashed outside of any transaction
+        size, file_hash = None, None
+        if await storage.exists(key):
+            async with storage.local_copy(key) as location:
+                size, file_hash = await asyncio.to_thread(file_digest, location)
+        elif await storage.size(blob_key(expected_hash)) == expected_size:
+            # moved by an earlier run that failed before committing
+            size, file_hash = expected_size, expected_hash
+
+        async with celery_async_session() as session:
+            claim = (
+                select(UploadSession)
+                .filter(
+                    UploadSession.id == upload_id,
+                    UploadSession.status == "verifying",
+                )
+                .with_for_update(skip_locked=True)
+            )
+            upload = (await session.execute(claim)).scalar()
+            if upload is None:
+                continue
+            if size != upload.size or file_hash != upload.hash:
+                upload.status = "failed"
+                await session.commit()
+                await storage.delete(key)
+                failed += 1
+                continue
+            await repo.attach_blob(session, key, file_hash, size)
+            await repo.replace_package_file(
+                session, upload.package_id, upload.filename, file_hash, size
+            )
+            upload.status = "completed"
+            application_id = (
+                await session.execute(
+                    select(Package.application_id).filter(
+                        Package.id == upload.package_id
+                    )
+                )
+            ).scalar()
+            await session.commit()
+            verified += 1
+            await manifest_repo.write_application_manifests(session, application_id)
+            await session.commit()
+
+    timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    print(f"{timestamp}: Verified {verified} direct uploads, {failed} failed")
+    return {"verified": verified, "failed": failed}
+
+
+@app.task(name='tasks.verify_direct_uploads_task')
+def verify_direct_uploads_task():
+    return async_to_sync(verify_direct_uploads)()
+
+
+async def expire_upload_sessions():
+    removed = 0
+    storage = get_storage()
+    # sessions waiting for verify_direct_uploads are left to it
+    batch = (
+        select(UploadSession.id, UploadSession.direct)
+        .filter(
+            UploadSession.expires_at < datetime.utcnow(),
+            UploadSession.status != "verifying",
+        )
+        .limit(upload_cleanup_batch_size)
+        .with_for_update(skip_locked=True)
+    )
+
+    async with celery_async_session() as session:
+        while True:
+            uploads = (await session.execute(batch)).all()
+            if not uploads:
+                break
+            await session.execute(
+                delete(UploadSession)
+                .where(UploadSession.id.in_([upload_id for upload_id, _ in uploads]))
+                .execution_options(synchronize_session=False)
+            )
+            await session.commit()
+            # a late chunk finds no session once the rows are gone
+            for upload_id, direct in uploads:
+                if direct:
+                    await storage.delete(upload_key(upload_id))
+                elif os.path.exists(upload_part_location(upload_id)):
+                    os.remove(upload_part_location(upload_id))
+                upload_hashers.discard(upload_id)
+            removed += len(uploads)
+            if len(uploads) < upload_cleanup_batch_size:
+                break
+
+    timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    print(f"{timestamp}: Removed {removed} expired upload sessions")
+    return {"removed": removed}
 
 
+@app.task(name='tasks.expire_upload_sessions_task')
+def expire_upload_sessions_task():
+    return async_to_sync(expire_upload_sessions)()
@@ -0,0 +1,53 @@
+from types import SimpleNamespace
+
+
+class MissingObject(Exception):
+    code = "NoSuchKey"
+
+
+class FakeMinio:
+    """In-memory stand-in for the parts of the MinIO client S3Storage uses"""
+
+    def __init__(self):
+        self.objects = {}
+        self.presigned = 0
+
+    def stat_object(self, bucket, key):
+        if (bucket, key) not in self.objects:
+            raise MissingObject
+        return self.objects[(bucket, key)]
+
+    def put(self, bucket, key, data, metadata=None):
+        self.objects[(bucket, key)] = SimpleNamespace(
+            data=data, size=len(data), metadata=metadata
+        )
+
+    def fput_object(self, bucket, key, location, metadata=None):
+        with open(location, "rb") as f:
+            self.put(bucket, key, f.read(), metadata)
+
+    def fget_object(self, bucket, key, location):
+        with open(location, "wb") as f:
+            f.write(self.stat_object(bucket, key).data)
+
+    def copy_object(self, bucket, key, source):
+        self.objects[(bucket, key)] = self.stat_object(
+            source.bucket_name, source.object_name
+        )
+
+    def list_objects(self, bucket, prefix, recursive):
+        return [
+            SimpleNamespace(object_name=key, size=stored.size)
+            for (stored_bucket, key), stored in self.objects.items()
+            if stored_bucket == bucket and key.startswith(prefix)
+        ]
+
+    def remove_object(self, bucket, key):
+        self.objects.pop((bucket, key), None)
+
+    def presigned_get_object(self, bucket, key, expires, response_headers):
+        self.presigned += 1
+        return f"http://objects/{bucket}/{key}?signature={self.presigned}"
+
+    def presigned_put_object(self, bucket, key, expires):
+        return f"http://objects/{bucket}/{key}?upload"
@@ -0,0 +1,47 @@
+import gzip
+
+import pytest
+
+from updateservice.utils.compression import (
+    accepted_encodings,
+    compress_file,
+    negotiate_encoding,
+)
+
+
+def test_accepted_encodings():
+    assert accepted_encodings("gzip, zstd;q=0.5, br;q=abc") == {
+        "gzip": 1.0,
+        "zstd": 0.5,
+        "br": 0.0,
+    }
+
+
+@pytest.mark.parametrize(
+    "header, expected",
+    [
+        (None, None),
+        ("gzip", "gzip"),
+        ("gzip, zstd", "zstd"),
+        ("gzip, zstd;q=0.5", "gzip"),
+        ("*", "zstd"),
+        ("gzip;q=0.5, identity", None),
+        ("br", None),
+        ("gzip;q=0", None),
+    ],
+)
+def test_negotiate_encoding(header, expected):
+    assert negotiate_encoding(header, {"gzip": 30, "zstd": 20}) == expected
+
+
+def test_compress_file_gzip(tmp_path):
+    content = b"firmware " * 10000
+    location = tmp_path / "firmware.bin"
+    location.write_bytes(content)
+    target = tmp_path / "firmware.bin.gz"
+
+    size, variant_hash = compress_file(str(location), "gzip", str(target))
+
+    assert size == target.stat().st_size < len(content)
+    assert len(variant_hash) == 64
+    assert gzip.decompress(target.read_bytes()) == content
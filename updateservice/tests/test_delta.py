@@ -0,0 +1,60 @@
+import os
+
+from updateservice.repositories.delta_repo import DeltaServedBuffer
+from updateservice.utils.delta import apply_delta, make_delta
+from updateservice.utils.delta_cache import DeltaCache
+
+
+def write_versions(tmp_path):
+    source_content = os.urandom(2 * 1024 * 1024)
+    target_content = (
+        source_content[:5000]
+        + b"inserted bytes"
+        + source_content[5000:900000]
+        + os.urandom(300)
+        + source_content[900300:]
+    )
+    source = tmp_path / "source.bin"
+    target = tmp_path / "target.bin"
+    source.write_bytes(source_content)
+    target.write_bytes(target_content)
+    return str(source), str(target), target_content
+
+
+def test_delta_round_trip(tmp_path):
+    source, target, target_content = write_versions(tmp_path)
+    delta = tmp_path / "target.delta"
+    patched = tmp_path / "patched.bin"
+
+    make_delta(source, target, str(delta))
+    apply_delta(source, str(delta), str(patched))
+
+    assert patched.read_bytes() == target_content
+    assert delta.stat().st_size < len(target_content) // 10
+
+
+def test_delta_cache_generate_and_remove(tmp_path):
+    source, target, _ = write_versions(tmp_path)
+    unrelated = tmp_path / "unrelated.bin"
+    unrelated.write_bytes(os.urandom(64 * 1024))
+    cache = DeltaCache(max_size=1, directory=str(tmp_path / "deltas"))
+
+    assert cache.generate("a", "b", source, str(unrelated)) is None
+    assert cache.get("a", "b") is None
+    size = cache.generate("a", "c", source, target)
+    location = cache.get("a", "c")
+    mtime = os.stat(location).st_mtime_ns
+    assert size == os.stat(location).st_size
+    assert cache.get("a", "c") == location
+    assert os.stat(location).st_mtime_ns == mtime
+    cache.remove("a", "c")
+    assert cache.get("a", "c") is None
+    assert os.listdir(cache.directory) == []
+
+
+def test_delta_served_buffer_coalesces_per_pair():
+    buffer = DeltaServedBuffer()
+    buffer.record("a", "b")
+    buffer.record("a", "b")
+    buffer.record("a", "c")
+    assert len(buffer) == 2
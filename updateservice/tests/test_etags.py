@@ -0,0 +1,26 @@
+from starlette.requests import Request
+
+from updateservice.utils.etags import generation_etag, not_modified
+
+
+def request_with(headers: dict):
+    return Request(
+        {
+            "type": "http",
+            "headers": [(k.encode(), v.encode()) for k, v in headers.items()],
+        }
+    )
+
+
+def test_not_modified_matches_current_generation():
+    etag = generation_etag(3, 7)
+    response = not_modified(request_with({"if-none-match": f'"x", {etag}'}), etag)
+    assert response.status_code == 304
+    assert response.headers["etag"] == etag
+    assert not_modified(request_with({"if-none-match": "*"}), etag) is not None
+
+
+def test_not_modified_misses_other_generation():
+    etag = generation_etag(3, 7)
+    assert not_modified(request_with({"if-none-match": '"3-6"'}), etag) is None
+    assert not_modified(request_with({}), etag) is None
@@ -0,0 +1,118 @@
+import pytest
+from fastapi import FastAPI, Request
+from httpx import AsyncClient
+
+from updateservice.utils.file_responses import (
+    RangeNotSatisfiableError,
+    SendfileResponse,
+    etag_matches,
+    package_file_response,
+    parse_byte_ranges,
+)
+
+
+@pytest.mark.parametrize(
+    "header, expected",
+    [
+        ("bytes=0-9", [(0, 9)]),
+        ("bytes=10-", [(10, 99)]),
+        ("bytes=-10", [(90, 99)]),
+        ("bytes=90-200", [(90, 99)]),
+        ("bytes=0-0, 50-59", [(0, 0), (50, 59)]),
+        ("bytes=-200", [(0, 99)]),
+        ("items=0-9", None),
+        ("bytes=9-0", None),
+        ("bytes=a-b", None),
+    ],
+)
+def test_parse_byte_ranges(header, expected):
+    assert parse_byte_ranges(header, 100) == expected
+
+
+def test_parse_byte_ranges_not_satisfiable():
+    with pytest.raises(RangeNotSatisfiableError):
+        parse_byte_ranges("bytes=100-200", 100)
+
+
+def test_etag_matches():
+    assert etag_matches('"abc"', '"abc"')
+    assert etag_matches('"x", W/"abc"', '"abc"')
+    assert etag_matches("*", '"abc"')
+    assert not etag_matches('"abd"', '"abc"')
+
+
+@pytest.fixture
+def file_app(tmp_path):
+    location = tmp_path / "firmware.bin"
+    location.write_bytes(bytes(range(100)))
+    app = FastAPI()
+
+    @app.get("/file")
+    async def file_endpoint(request: Request):
+        return package_file_response(request, str(location), "firmware.bin", "abc")
+
+    return app
+
+
+@pytest.mark.asyncio
+async def test_package_file_response_conditional_and_ranges(file_app):
+    async with AsyncClient(app=file_app, base_url="http://test") as client:
+        response_full = await client.get("/file")
+        response_cached = await client.get("/file", headers={"If-None-Match": '"abc"'})
+        response_single = await client.get("/file", headers={"Range": "bytes=10-19"})
+        response_multi = await client.get("/file", headers={"Range": "bytes=0-1,-2"})
+        response_stale = await client.get(
+            "/file", headers={"Range": "bytes=0-1", "If-Range": '"old"'}
+        )
+        response_416 = await client.get("/file", headers={"Range": "bytes=200-"})
+
+    assert response_full.status_code == 200
+    assert response_full.headers["etag"] == '"abc"'
+    assert response_cached.status_code == 304
+    assert response_cached.content == b""
+    assert response_single.status_code == 206
+    assert response_single.headers["content-range"] == "bytes 10-19/100"
+    assert response_single.content == bytes(range(10, 20))
+    assert response_multi.status_code == 206
+    assert response_multi.headers["content-type"].startswith("multipart/byteranges")
+    assert int(response_multi.headers["content-length"]) == len(response_multi.content)
+    assert b"Content-Range: bytes 98-99/100" in response_multi.content
+    assert response_stale.status_code == 200
+    assert response_416.status_code == 416
+    assert response_416.headers["content-range"] == "bytes */100"
+
+
+async def collect_messages(response, extensions):
+    messages = []
+
+    async def send(message):
+        if message["type"] == "http.response.zerocopysend":
+            message = dict(message, file=message["file"].read())
+        messages.append(message)
+
+    scope = {"type": "http", "method": "GET", "extensions": extensions}
+    await response(scope, None, send)
+    return messages
+
+
+@pytest.mark.asyncio
+async def test_sendfile_response_uses_server_extensions(tmp_path):
+    location = tmp_path / "firmware.bin"
+    location.write_bytes(bytes(range(100)))
+
+    zerocopy = await collect_messages(
+        SendfileResponse(str(location), offset=10, count=5),
+        {"http.response.zerocopysend": {}},
+    )
+    pathsend = await collect_messages(
+        SendfileResponse(str(location)), {"http.response.pathsend": {}}
+    )
+    fallback = await collect_messages(SendfileResponse(str(location)), {})
+
+    assert zerocopy[1]["offset"] == 10
+    assert zerocopy[1]["count"] == 5
+    assert zerocopy[1]["file"] == bytes(range(100))
+    assert pathsend[1] == {"type": "http.response.pathsend", "path": str(location)}
+    assert dict(fallback[0]["headers"])[b"content-length"] == b"100"
+    body = b"".join(message["body"] for message in fallback[1:])
+    assert body == bytes(range(100))
@@ -0,0 +1,17 @@
+import pytest
+
+from updateservice.repositories.user_repo import LastLoginBuffer
+
+
+def test_last_login_buffer_coalesces_per_user():
+    buffer = LastLoginBuffer()
+    buffer.record(1)
+    buffer.record(1)
+    buffer.record(2)
+    assert len(buffer) == 2
+
+
+@pytest.mark.asyncio
+async def test_last_login_buffer_empty_flush():
+    buffer = LastLoginBuffer()
+    assert await buffer.flush() == 0
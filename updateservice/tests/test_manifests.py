@@ -0,0 +1,24 @@
+import os
+
+from updateservice.utils.manifests import ManifestStore
+
+
+def test_manifest_locations(tmp_path):
+    store = ManifestStore(directory=str(tmp_path))
+    assert store.application_location(3) == os.path.join(
+        tmp_path, "applications", "3.json"
+    )
+    assert store.group_location(4) == os.path.join(tmp_path, "groups", "4.json")
+
+
+def test_manifest_write_replaces_atomically(tmp_path):
+    store = ManifestStore(directory=str(tmp_path))
+    location = store.application_location(1)
+    store.write(location, '{"latest": null}')
+    store.write(location, '{"latest": {"id": 1}}')
+    with open(location) as f:
+        assert f.read() == '{"latest": {"id": 1}}'
+    assert os.listdir(os.path.dirname(location)) == ["1.json"]
+    store.remove(location)
+    store.remove(location)
+    assert not os.path.exists(location)
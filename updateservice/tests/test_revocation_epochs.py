@@ -0,0 +1,31 @@
+import datetime
+
+from updateservice.utils.revocation_epochs import RevocationEpochTable
+
+
+def test_tokens_from_older_epoch_are_revoked():
+    table = RevocationEpochTable(refresh_interval=60, token_lifetime=3600)
+    assert table.is_valid(1, 0)
+    table.set_epoch(1, 2)
+    table.set_epoch(1, 1)
+    assert not table.is_valid(1, 1)
+    assert table.is_valid(1, 2)
+    assert table.is_valid(2, 0)
+
+
+def test_revoked_jti_is_rejected_until_pruned():
+    table = RevocationEpochTable(refresh_interval=60, token_lifetime=3600)
+    now = datetime.datetime.utcnow()
+    table.revoke_jti("recent", now)
+    table.revoke_jti("old", now - datetime.timedelta(hours=2))
+    assert not table.is_valid(1, 0, "recent")
+    table.mark_refreshed(now)
+    assert not table.is_valid(1, 0, "recent")
+    assert table.is_valid(1, 0, "old")
+
+
+def test_table_is_stale_until_refreshed():
+    table = RevocationEpochTable(refresh_interval=60, token_lifetime=3600)
+    assert table.is_stale()
+    table.mark_refreshed(None)
+    assert not table.is_stale()
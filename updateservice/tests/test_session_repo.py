@@ -0,0 +1,61 @@
+import pytest
+from fastapi import APIRouter, Depends, FastAPI
+from httpx import AsyncClient
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from updateservice.repositories.package_repo import PackageRepo
+from updateservice.repositories.tokens_repo import CheckTokenRepo
+
+
+@pytest.mark.asyncio
+async def test_repositories_share_request_session():
+    sessions = []
+
+    async def authentication(repo: CheckTokenRepo = Depends(CheckTokenRepo.dependency)):
+        sessions.append(repo.session)
+
+    router = APIRouter()
+
+    @router.get("/session")
+    async def session_endpoint(repo: PackageRepo = Depends(PackageRepo.dependency)):
+        sessions.append(repo.session)
+
+    app = FastAPI()
+    app.include_router(router, dependencies=[Depends(authentication)])
+    async with AsyncClient(app=app, base_url="http://test") as client:
+        await client.get("/session")
+        await client.get("/session")
+
+    assert all(isinstance(session, AsyncSession) for session in sessions)
+    assert sessions[0] is sessions[1]
+    assert sessions[2] is sessions[3]
+    assert sessions[0] is not sessions[2]
+
+
+@pytest.mark.asyncio
+async def test_release_closes_request_session(monkeypatch):
+    closed = []
+
+    async def close(session):
+        closed.append(session)
+
+    monkeypatch.setattr(AsyncSession, "close", close)
+    router = APIRouter()
+
+    @router.get("/download")
+    async def download_endpoint(repo: PackageRepo = Depends(PackageRepo.dependency)):
+        await repo.release()
+        closed.append("released")
+
+    app = FastAPI()
+    app.include_router(router)
+    async with AsyncClient(app=app, base_url="http://test") as client:
+        await client.get("/download")
+
+    assert isinstance(closed[0], AsyncSession)
+    assert closed[1] == "released"
+    await PackageRepo().release()
+
+
+def test_repository_built_outside_a_request_has_no_session():
+    assert PackageRepo().session is None
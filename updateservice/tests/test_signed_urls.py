@@ -0,0 +1,19 @@
+from urllib.parse import parse_qs, urlparse
+
+from updateservice.utils.signed_urls import sign_download_url, verify_download_signature
+
+
+def test_signed_url_round_trip():
+    url, expires = sign_download_url(1, 2, "abc")
+    query = parse_qs(urlparse(url).query)
+    assert urlparse(url).path == "/v1/downloads/applications/1/packages/2/file"
+    assert int(query["expires"][0]) == expires
+    assert verify_download_signature(1, 2, "abc", expires, query["signature"][0])
+
+
+def test_signature_is_bound_to_package_and_hash():
+    url, expires = sign_download_url(1, 2, "abc")
+    signature = parse_qs(urlparse(url).query)["signature"][0]
+    assert not verify_download_signature(1, 3, "abc", expires, signature)
+    assert not verify_download_signature(1, 2, "abd", expires, signature)
+    assert not verify_download_signature(1, 2, "abc", expires + 1, signature)
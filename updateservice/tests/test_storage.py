@@ -0,0 +1,61 @@
+import pytest
+
+from updateservice.tests.fake_minio import FakeMinio
+from updateservice.utils import storage as storage_module
+from updateservice.utils.storage import LocalStorage, S3Storage, blob_key, get_storage
+
+
+def test_blob_key():
+    assert blob_key("abcdef") == "blobs/ab/abcdef"
+    assert blob_key("abcdef", "gzip") == "blobs/ab/abcdef.gz"
+
+
+def test_get_storage_follows_the_configured_backend(monkeypatch):
+    object_storage = S3Storage(bucket="packages", url_ttl=3600, client=FakeMinio())
+    monkeypatch.setattr(storage_module, "storage", object_storage)
+
+    assert get_storage() is object_storage
+
+
+@pytest.mark.asyncio
+async def test_local_storage(tmp_path):
+    local_storage = LocalStorage(root=str(tmp_path))
+    temp_location = tmp_path / "upload.part"
+    temp_location.write_bytes(b"firmware")
+
+    await local_storage.store("blobs/ab/abcdef", str(temp_location))
+
+    assert await local_storage.exists("blobs/ab/abcdef")
+    assert not temp_location.exists()
+    assert await local_storage.presigned_url("blobs/ab/abcdef", "f.bin") is None
+    async with local_storage.local_copy("blobs/ab/abcdef") as location:
+        assert open(location, "rb").read() == b"firmware"
+    assert await local_storage.list_keys("blobs/") == [("blobs/ab/abcdef", 8)]
+
+
+@pytest.mark.asyncio
+async def test_s3_storage_caches_presigned_urls(tmp_path):
+    client = FakeMinio()
+    s3_storage = S3Storage(bucket="packages", url_ttl=3600, client=client)
+    temp_location = tmp_path / "upload.part"
+    temp_location.write_bytes(b"firmware")
+
+    assert await s3_storage.presigned_url("blobs/ab/abcdef", "f.bin") is None
+    await s3_storage.store("blobs/ab/abcdef.gz", str(temp_location), "gzip")
+    first_url = await s3_storage.presigned_url("blobs/ab/abcdef.gz", "f.bin")
+    second_url = await s3_storage.presigned_url("blobs/ab/abcdef.gz", "f.bin")
+    stored = client.objects[("packages", "blobs/ab/abcdef.gz")]
+    async with s3_storage.local_copy("blobs/ab/abcdef.gz") as location:
+        copied = open(location, "rb").read()
+    listed = await s3_storage.list_keys("blobs/")
+    await s3_storage.delete("blobs/ab/abcdef.gz")
+
+    assert not temp_location.exists()
+    assert stored.metadata == {"Content-Encoding": "gzip"}
+    assert stored.size == len(b"firmware")
+    assert client.objects == {}
+    assert first_url == second_url
+    assert client.presigned == 1
+    assert copied == b"firmware"
+    assert listed == [("blobs/ab/abcdef.gz", len(b"firmware"))]
+    assert await s3_storage.presigned_url("blobs/ab/abcdef.gz", "f.bin") is None
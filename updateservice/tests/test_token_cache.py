@@ -0,0 +1,60 @@
+import time
+
+from updateservice.utils.token_cache import DecodedTokenCache, TokenStatusCache
+from updateservice.utils.token_digest import token_digest
+
+
+def test_token_cache_hit_and_miss():
+    cache = TokenStatusCache(max_size=2, ttl=60)
+    assert cache.get("token") is None
+    cache.set("token", "status")
+    assert cache.get("token") == "status"
+    assert cache.stats() == {"size": 1, "hits": 1, "misses": 1}
+
+
+def test_token_cache_evicts_least_recently_used():
+    cache = TokenStatusCache(max_size=2, ttl=60)
+    cache.set("first", 1)
+    cache.set("second", 2)
+    cache.get("first")
+    cache.set("third", 3)
+    assert cache.get("second") is None
+    assert cache.get("first") == 1
+    assert cache.get("third") == 3
+
+
+def test_token_cache_expires_entries():
+    cache = TokenStatusCache(max_size=2, ttl=0.01)
+    cache.set("token", "status")
+    time.sleep(0.02)
+    assert cache.get("token") is None
+
+
+def test_token_cache_evict():
+    cache = TokenStatusCache(max_size=2, ttl=60)
+    cache.set("token", "status")
+    cache.evict("token")
+    assert cache.get("token") is None
+
+
+def test_token_digest_is_fixed_width():
+    assert len(token_digest("token")) == 64
+    assert token_digest("token") == token_digest("token")
+    assert token_digest("token") != token_digest("other")
+
+
+def test_decoded_token_cache_honours_exp():
+    cache = DecodedTokenCache(max_size=2)
+    cache.set("valid", {"user_id": 1, "exp": time.time() + 60})
+    cache.set("expired", {"user_id": 1, "exp": time.time() - 1})
+    assert cache.get("valid")["user_id"] == 1
+    assert cache.get("expired") is None
+    assert cache.stats()["size"] == 1
+
+
+def test_decoded_token_cache_size_cap():
+    cache = DecodedTokenCache(max_size=1)
+    cache.set("first", {"user_id": 1})
+    cache.set("second", {"user_id": 2})
+    assert cache.get("first") is None
+    assert cache.get("second") == {"user_id": 2}
@@ -0,0 +1,43 @@
+import hashlib
+import time
+
+from updateservice.utils.upload_hashers import UploadHasherCache
+
+
+def test_upload_hasher_cache_pop():
+    cache = UploadHasherCache(max_size=2, ttl=60)
+    hasher = hashlib.sha256()
+    cache.set("upload", 12, hasher)
+
+    assert cache.pop("upload") == (12, hasher)
+    assert cache.pop("upload") == (None, None)
+
+
+def test_upload_hasher_cache_is_bounded():
+    cache = UploadHasherCache(max_size=2, ttl=60)
+    cache.set("first", 0, hashlib.sha256())
+    cache.set("second", 0, hashlib.sha256())
+    cache.set("first", 5, hashlib.sha256())
+    cache.set("third", 0, hashlib.sha256())
+
+    assert len(cache) == 2
+    assert cache.pop("second") == (None, None)
+    assert cache.pop("first")[0] == 5
+
+
+def test_upload_hasher_cache_drops_idle_sessions():
+    cache = UploadHasherCache(max_size=10, ttl=0.01)
+    cache.set("idle", 0, hashlib.sha256())
+    time.sleep(0.02)
+    cache.set("active", 0, hashlib.sha256())
+
+    assert len(cache) == 1
+    assert cache.pop("idle") == (None, None)
+
+
+def test_upload_hasher_cache_discard():
+    cache = UploadHasherCache(max_size=2, ttl=60)
+    cache.set("upload", 0, hashlib.sha256())
+    cache.discard("upload")
+
+    assert cache.pop("upload") == (None, None)
@@ -0,0 +1,26 @@
+import hashlib
+import io
+import os
+
+import pytest
+from fastapi import UploadFile
+
+from updateservice.repositories.package_repo import UploadPackageRepo
+
+
+@pytest.mark.asyncio
+async def test_upload_package_streams_hash_and_size(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    content = os.urandom(3 * 1024 * 1024 + 17)
+    upload = UploadFile(filename="firmware.bin", file=io.BytesIO(content))
+
+    location, name, size, file_hash = await UploadPackageRepo().upload_package(
+        7, upload
+    )
+
+    assert name == "firmware.bin"
+    assert os.path.dirname(location) == os.path.join(tmp_path, "Storage", "uploads")
+    assert size == len(content)
+    assert file_hash == hashlib.sha256(content).hexdigest()
+    assert await UploadPackageRepo().make_hash(location) == file_hash
+    assert os.listdir(os.path.dirname(location)) == [os.path.basename(location)]
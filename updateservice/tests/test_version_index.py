@@ -0,0 +1,77 @@
+import time
+from types import SimpleNamespace
+
+from updateservice.utils.version_index import VersionIndex
+
+
+def package(package_id, version, file_hash="a" * 64):
+    return SimpleNamespace(
+        id=package_id,
+        version=version,
+        hash=file_hash,
+        size=package_id,
+        url=f"/v1/applications/1/packages/{package_id}/file",
+    )
+
+
+def test_latest_above():
+    index = VersionIndex(refresh_interval=60)
+    index.load(1, [package(1, "1.2.0"), package(2, "1.10.0"), package(3, "1.9.5")])
+    assert index.latest_above(1, (1, 2, 0)).id == 2
+    assert index.latest_above(1, (1, 9, 99)).version == "1.10.0"
+    assert index.latest_above(1, (1, 10, 0)) is None
+    assert index.latest_above(2, (0, 0, 0)) is None
+
+
+def test_load_skips_packages_without_file():
+    index = VersionIndex(refresh_interval=60)
+    index.load(1, [package(1, "1.0.0"), package(2, "2.0.0", file_hash=None)])
+    assert index.latest_above(1, (0, 0, 0)).id == 1
+
+
+def test_update_and_remove_package():
+    index = VersionIndex(refresh_interval=60)
+    index.load(1, [package(1, "1.0.0")])
+    index.update_package(1, package(2, "2.0.0"))
+    assert index.latest_above(1, (1, 0, 0)).id == 2
+    index.update_package(1, package(2, "2.0.0", file_hash="b" * 64))
+    assert index.latest_above(1, (1, 0, 0)).hash == "b" * 64
+    index.remove_package(1, 2)
+    assert index.latest_above(1, (0, 0, 0)).id == 1
+    index.update_package(2, package(3, "3.0.0"))
+    assert index.is_stale(2)
+
+
+def test_is_stale_after_refresh_interval():
+    index = VersionIndex(refresh_interval=0.01)
+    assert index.is_stale(1)
+    index.load(1, [])
+    assert not index.is_stale(1)
+    time.sleep(0.02)
+    assert index.is_stale(1)
+
+
+def test_unknown_application_is_cached_until_refresh():
+    index = VersionIndex(refresh_interval=60)
+    index.begin_load(1)
+    index.load_unknown(1)
+    assert not index.is_stale(1)
+    assert not index.is_known(1)
+    assert index.latest_above(1, (0, 0, 0)) is None
+    index.update_package(1, package(1, "1.0.0"))
+    assert not index.is_known(1)
+
+
+def test_writes_during_load_are_replayed():
+    index = VersionIndex(refresh_interval=60)
+    index.begin_load(1)
+    # committed after the rows below were read
+    index.update_package(1, package(2, "2.0.0"))
+    index.remove_package(1, 1)
+    index.load(1, [package(1, "1.0.0")])
+    assert index.latest_above(1, (0, 0, 0)).id == 2
+    assert [entry.id for entry in index._entries[1]] == [2]
+    index.begin_load(1)
+    index.abort_load(1)
+    index.update_package(1, package(3, "3.0.0"))
+    assert index._pending == {}
@@ -0,0 +1,18 @@
+import pytest
+
+from updateservice.utils.versions import parse_version
+
+
+@pytest.mark.parametrize(
+    "version, expected",
+    [
+        ("1.2.3", (1, 2, 3)),
+        ("10.0.200", (10, 0, 200)),
+        ("1.2", None),
+        ("1.2.3-beta", None),
+        ("1234567890.0.0", None),
+        (None, None),
+    ],
+)
+def test_parse_version(version, expected):
+    assert parse_version(version) == expected
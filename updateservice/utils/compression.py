@@ -0,0 +1,75 @@
+import gzip
+import shutil
+
+try:
+    import zstandard
+except ImportError:  # zstd variants are skipped without the zstandard package
+    zstandard = None
+
+from updateservice.settings import setting
+from updateservice.utils.file_digest import file_digest
+
+chunk_size = setting["upload_chunk_size"]
+
+# server preference when the client accepts several encodings equally
+encoding_suffixes = {"zstd": ".zst", "gzip": ".gz"}
+
+
+def available_encodings():
+    return [
+        encoding
+        for encoding in encoding_suffixes
+        if encoding != "zstd" or zstandard is not None
+    ]
+
+
+def compress_file(location: str, encoding: str, target_location: str):
+    """Write the encoded variant of a file, returning its size and sha256"""
+    with open(location, "rb") as source, open(target_location, "wb") as target:
+        if encoding == "gzip":
+            with gzip.GzipFile(
+                fileobj=target, mode="wb", compresslevel=9, mtime=0
+            ) as compressed:
+                shutil.copyfileobj(source, compressed, chunk_size)
+        elif encoding == "zstd":
+            compressor = zstandard.ZstdCompressor(level=19)
+            compressor.copy_stream(source, target, write_size=chunk_size)
+        else:
+            raise ValueError(f"Unsupported encoding {encoding}")
+    return file_digest(target_location)
+
+
+def accepted_encodings(header: str):
+    """Map each coding in an Accept-Encoding header to its q-value"""
+    accepted = {}
+    for item in header.split(","):
+        coding, _, params = item.strip().partition(";")
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        quality = 1.0
+        for param in params.split(";"):
+            name, _, value = param.strip().partition("=")
+            if name.lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        accepted[coding] = quality
+    return accepted
+
+
+def negotiate_encoding(header: str, variants: dict):
+    """Pick the best encoding from {encoding: size}, None for the identity"""
+    if not header:
+        return None
+    accepted = accepted_encodings(header)
+    identity_quality = accepted.get("identity", accepted.get("*", 1.0))
+    candidates = []
+    for encoding, size in variants.items():
+        quality = accepted.get(encoding, accepted.get("*", 0.0))
+        if quality > 0 and quality >= identity_quality:
+            candidates.append((-quality, size, encoding))
+    if not candidates:
+        return None
+    return min(candidates)[2]
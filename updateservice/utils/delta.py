@@ -0,0 +1,114 @@
+"""Binary deltas between two package files
+
+The delta is an xz stream of operations rebuilding the target from the
+source: b"C" + offset (8 bytes) + length (4 bytes) copies from the source,
+b"I" + length (4 bytes) + data inserts new bytes. The stream starts with the
+header b"USD1" + source size + target size, both 8 bytes big endian.
+
+Files are split into content defined chunks, so data shifted by an insertion
+still matches the source.
+"""
+import hashlib
+import lzma
+import mmap
+import re
+import struct
+
+MAGIC = b"USD1"
+HEADER = struct.Struct(">4sQQ")
+COPY = struct.Struct(">cQI")
+INSERT = struct.Struct(">cI")
+
+# matches at roughly one position in 8 KiB of random data
+boundary_marker = re.compile(rb"\x00[\x00-\x07]")
+min_chunk_size = 2 * 1024
+max_chunk_size = 64 * 1024
+
+
+class InvalidDeltaError(Exception):
+    pass
+
+
+def chunk_boundaries(data):
+    size = len(data)
+    position = 0
+    while position < size:
+        marker = boundary_marker.search(data, position + min_chunk_size)
+        if marker is None or marker.end() - position > max_chunk_size:
+            cut = min(position + max_chunk_size, size)
+        else:
+            cut = marker.end()
+        yield position, cut
+        position = cut
+
+
+def map_file(f):
+    if f.seek(0, 2) == 0:
+        return b""
+    return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+def delta_operations(source, target):
+    index = {}
+    for start, end in chunk_boundaries(source):
+        index.setdefault(hashlib.sha1(source[start:end]).digest(), start)
+    copy = None
+    for start, end in chunk_boundaries(target):
+        chunk = target[start:end]
+        offset = index.get(hashlib.sha1(chunk).digest())
+        if offset is not None and source[offset : offset + len(chunk)] == chunk:
+            if copy is not None and copy[0] + copy[1] == offset:
+                copy = (copy[0], copy[1] + len(chunk))
+                continue
+            if copy is not None:
+                yield COPY.pack(b"C", *copy)
+            copy = (offset, len(chunk))
+        else:
+            if copy is not None:
+                yield COPY.pack(b"C", *copy)
+                copy = None
+            yield INSERT.pack(b"I", len(chunk)) + chunk
+    if copy is not None:
+        yield COPY.pack(b"C", *copy)
+
+
+def make_delta(source_location: str, target_location: str, delta_location: str):
+    with open(source_location, "rb") as source_file, open(
+        target_location, "rb"
+    ) as target_file:
+        source, target = map_file(source_file), map_file(target_file)
+        with lzma.open(delta_location, "wb") as delta:
+            delta.write(HEADER.pack(MAGIC, len(source), len(target)))
+            for operation in delta_operations(source, target):
+                delta.write(operation)
+
+
+def read_exact(f, size: int):
+    data = f.read(size)
+    if len(data) != size:
+        raise InvalidDeltaError("Truncated delta")
+    return data
+
+
+def apply_delta(source_location: str, delta_location: str, target_location: str):
+    with open(source_location, "rb") as source_file, lzma.open(
+        delta_location, "rb"
+    ) as delta, open(target_location, "wb") as target:
+        source = map_file(source_file)
+        magic, source_size, target_size = HEADER.unpack(read_exact(delta, HEADER.size))
+        if magic != MAGIC or source_size != len(source):
+            raise InvalidDeltaError("Delta does not match the source file")
+        while True:
+            kind = delta.read(1)
+            if not kind:
+                break
+            if kind == b"C":
+                _, offset, length = COPY.unpack(kind + read_exact(delta, COPY.size - 1))
+                target.write(source[offset : offset + length])
+            elif kind == b"I":
+                _, length = INSERT.unpack(kind + read_exact(delta, INSERT.size - 1))
+                target.write(read_exact(delta, length))
+            else:
+                raise InvalidDeltaError("Unknown delta operation")
+        if target.tell() != target_size:
+            raise InvalidDeltaError("Delta produced a file of the wrong size")
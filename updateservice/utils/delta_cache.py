@@ -0,0 +1,61 @@
+import os
+import uuid
+
+from updateservice.settings import setting
+from updateservice.utils.delta import make_delta
+
+
+class DeltaCache:
+    """Generated deltas on disk keyed by source and target hash
+
+    Only the files live here. Which pairs are stored, not worth a delta or
+    evicted, and when they were last served, is kept in the deltas table.
+    """
+
+    def __init__(self, max_size: int, directory: str = None):
+        self.max_size = max_size
+        self._directory = directory
+
+    @property
+    def directory(self):
+        return self._directory or os.path.join(os.getcwd(), "Storage", "deltas")
+
+    def location(self, source_hash: str, target_hash: str):
+        return os.path.join(self.directory, f"{source_hash}_{target_hash}.delta")
+
+    def get(self, source_hash: str, target_hash: str):
+        location = self.location(source_hash, target_hash)
+        if not os.path.exists(location):
+            return None
+        return location
+
+    def generate(
+        self,
+        source_hash: str,
+        target_hash: str,
+        source_location: str,
+        target_location: str,
+    ):
+        """Size of the stored delta, None when it is not smaller than the target"""
+        os.makedirs(self.directory, exist_ok=True)
+        temp_location = os.path.join(self.directory, f".{uuid.uuid4().hex}.part")
+        try:
+            make_delta(source_location, target_location, temp_location)
+            size = os.stat(temp_location).st_size
+            if size >= os.stat(target_location).st_size:
+                os.remove(temp_location)
+                return None
+            os.replace(temp_location, self.location(source_hash, target_hash))
+        except BaseException:
+            if os.path.exists(temp_location):
+                os.remove(temp_location)
+            raise
+        return size
+
+    def remove(self, source_hash: str, target_hash: str):
+        location = self.location(source_hash, target_hash)
+        if os.path.exists(location):
+            os.remove(location)
+
+
+delta_cache = DeltaCache(max_size=setting["delta_cache_max_size"])
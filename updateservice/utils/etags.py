@@ -0,0 +1,15 @@
+from fastapi import Request, Response
+
+from updateservice.utils.file_responses import etag_matches
+
+
+def generation_etag(application_id: int, generation: int) -> str:
+    return f'"{application_id}-{generation}"'
+
+
+def not_modified(request: Request, etag: str):
+    """304 response when the client already holds etag, None otherwise"""
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None and etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers={"etag": etag})
+    return None
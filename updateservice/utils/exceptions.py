@@ -33,6 +33,33 @@ class InvalidGroupIdError(InvalidIdError):
         InvalidIdError.__init__(self, message)
 
 
+class InvalidPackageVersionError(InvalidIdError):
+    def __init__(self, version):
+        message = f"The package with the version {version} does not exist"
+        InvalidIdError.__init__(self, message)
+
+
+class InvalidUploadIdError(InvalidIdError):
+    def __init__(self):
+        message = "The upload session with the id requested does not exist"
+        InvalidIdError.__init__(self, message)
+
+
+class BlobNotFoundError(Exception):
+    def __init__(self):
+        self.message = "No stored file matches this hash and size"
+
+
+class DirectUploadUnavailableError(Exception):
+    def __init__(self):
+        self.message = "Direct uploads need an object storage backend"
+
+
+class UploadNotReceivedError(Exception):
+    def __init__(self):
+        self.message = "The storage backend has not received the upload"
+
+
 class TokenNotFound(Exception):
     def __init__(self):
         self.message = f"Could not find this token in data base"
@@ -80,3 +107,14 @@ class NotAssignedError(Exception):
 class ApplicationAssignedError(Exception):
     def __init__(self):
         self.message = f"Can not delete groups with apllications assigned to it"
+
+
+class UploadOffsetError(Exception):
+    def __init__(self, offset):
+        self.offset = offset
+        self.message = f"Upload offset does not match, expected offset {offset}"
+
+
+class UploadSizeError(Exception):
+    def __init__(self, size):
+        self.message = f"Upload does not match the declared size of {size} bytes"
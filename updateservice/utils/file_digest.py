@@ -0,0 +1,16 @@
+import hashlib
+
+from updateservice.settings import setting
+
+chunk_size = setting["upload_chunk_size"]
+
+
+def file_digest(location: str):
+    """Size and sha256 hexdigest of a file, read in chunks"""
+    digest = hashlib.sha256()
+    size = 0
+    with open(location, "rb") as f:
+        while chunk := f.read(chunk_size):
+            size += len(chunk)
+            digest.update(chunk)
+    return size, digest.hexdigest()
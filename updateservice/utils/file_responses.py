@@ -0,0 +1,225 @@
+import os
+import uuid
+from mimetypes import guess_type
+from urllib.parse import quote
+
+import aiofiles
+import anyio
+from fastapi import Request
+from fastapi.responses import FileResponse, Response, StreamingResponse
+
+from updateservice.settings import setting
+
+chunk_size = setting["upload_chunk_size"]
+sendfile_enabled = setting["download_sendfile"]
+max_ranges = 16
+
+
+class RangeNotSatisfiableError(Exception):
+    pass
+
+
+def parse_byte_ranges(range_header: str, size: int):
+    """Parse a Range header into inclusive (start, end) pairs
+
+    Returns None when the header should be ignored and the full file served.
+    """
+    unit, _, ranges_spec = range_header.partition("=")
+    if unit.strip().lower() != "bytes" or not ranges_spec:
+        return None
+    ranges = []
+    for range_spec in ranges_spec.split(","):
+        start, dash, end = range_spec.strip().partition("-")
+        if not dash:
+            return None
+        try:
+            if start:
+                start = int(start)
+                end = int(end) if end else size - 1
+            else:
+                suffix = int(end)
+                if suffix == 0:
+                    continue
+                start, end = max(size - suffix, 0), size - 1
+        except ValueError:
+            return None
+        if start >= size:
+            continue
+        if end < start:
+            return None
+        ranges.append((start, min(end, size - 1)))
+    if len(ranges) > max_ranges:
+        return None
+    if not ranges:
+        raise RangeNotSatisfiableError
+    return ranges
+
+
+def etag_matches(header: str, etag: str) -> bool:
+    candidates = [candidate.strip() for candidate in header.split(",")]
+    weak_etag = f"W/{etag}"
+    return "*" in candidates or etag in candidates or weak_etag in candidates
+
+
+def content_disposition(filename: str) -> str:
+    quoted_filename = quote(filename)
+    if quoted_filename != filename:
+        return f"attachment; filename*=utf-8''{quoted_filename}"
+    return f'attachment; filename="{filename}"'
+
+
+async def read_range(location: str, start: int, end: int):
+    async with aiofiles.open(location, "rb") as f:
+        await f.seek(start)
+        remaining = end - start + 1
+        while remaining > 0:
+            chunk = await f.read(min(chunk_size, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+
+
+class SendfileResponse(FileResponse):
+    """FileResponse that hands the transfer to the server when it supports it
+
+    Uses the ASGI zero-copy send extension (os.sendfile in the server) or the
+    path send extension, otherwise streams the file in large chunks.
+    """
+
+    def __init__(self, path: str, offset: int = 0, count: int = None, **kwargs):
+        super().__init__(path, **kwargs)
+        self.offset = offset
+        self.count = count
+
+    async def __call__(self, scope, receive, send):
+        if self.stat_result is None:
+            self.stat_result = await anyio.to_thread.run_sync(os.stat, self.path)
+            self.set_stat_headers(self.stat_result)
+        count = self.count
+        if count is None:
+            count = self.stat_result.st_size - self.offset
+        await send(
+            {
+                "type": "http.response.start",
+                "status": self.status_code,
+                "headers": self.raw_headers,
+            }
+        )
+        extensions = scope.get("extensions") or {}
+        if self.send_header_only or count <= 0:
+            await send({"type": "http.response.body", "body": b""})
+        elif sendfile_enabled and "http.response.zerocopysend" in extensions:
+            with open(self.path, "rb") as file:
+                await send(
+                    {
+                        "type": "http.response.zerocopysend",
+                        "file": file,
+                        "offset": self.offset,
+                        "count": count,
+                    }
+                )
+        elif (
+            sendfile_enabled
+            and "http.response.pathsend" in extensions
+            and self.offset == 0
+            and self.count is None
+        ):
+            await send(
+                {"type": "http.response.pathsend", "path": os.path.abspath(self.path)}
+            )
+        else:
+            end = self.offset + count - 1
+            async for chunk in read_range(self.path, self.offset, end):
+                await send(
+                    {"type": "http.response.body", "body": chunk, "more_body": True}
+                )
+            await send({"type": "http.response.body", "body": b""})
+        if self.background is not None:
+            await self.background()
+
+
+async def read_multipart_ranges(location: str, parts):
+    for part_header, start, end in parts:
+        yield part_header
+        async for chunk in read_range(location, start, end):
+            yield chunk
+        yield b"\r\n"
+
+
+def package_file_response(
+    request: Request,
+    location: str,
+    filename: str,
+    file_hash: str = None,
+    variant=None,
+):
+    """SendfileResponse with a strong ETag, 304 revalidation and byte ranges
+
+    variant is a (location, encoding, hash) precompressed representation to
+    serve instead of the file itself.
+    """
+    headers = {"accept-ranges": "bytes", "vary": "accept-encoding"}
+    if variant is not None:
+        location, encoding, file_hash = variant
+        headers["content-encoding"] = encoding
+    etag = f'"{file_hash}"' if file_hash else None
+    if etag is not None:
+        headers["etag"] = etag
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match is not None and etag_matches(if_none_match, etag):
+            return Response(status_code=304, headers=headers)
+
+    range_header = request.headers.get("range")
+    if_range = request.headers.get("if-range")
+    if range_header is None or (if_range is not None and if_range != etag):
+        return SendfileResponse(location, filename=filename, headers=headers)
+
+    size = os.stat(location).st_size
+    try:
+        ranges = parse_byte_ranges(range_header, size)
+    except RangeNotSatisfiableError:
+        headers["content-range"] = f"bytes */{size}"
+        return Response(status_code=416, headers=headers)
+    if ranges is None:
+        return SendfileResponse(location, filename=filename, headers=headers)
+
+    media_type = guess_type(filename)[0] or "application/octet-stream"
+    headers["content-disposition"] = content_disposition(filename)
+    if len(ranges) == 1:
+        start, end = ranges[0]
+        headers["content-range"] = f"bytes {start}-{end}/{size}"
+        headers["content-length"] = str(end - start + 1)
+        return SendfileResponse(
+            location,
+            offset=start,
+            count=end - start + 1,
+            status_code=206,
+            headers=headers,
+            media_type=media_type,
+        )
+
+    boundary = uuid.uuid4().hex
+    parts = []
+    content_length = len(f"--{boundary}--\r\n")
+    for start, end in ranges:
+        part_header = (
+            f"--{boundary}\r\n"
+            f"Content-Type: {media_type}\r\n"
+            f"Content-Range: bytes {start}-{end}/{size}\r\n\r\n"
+        ).encode()
+        parts.append((part_header, start, end))
+        content_length += len(part_header) + end - start + 1 + 2
+
+    async def multipart_body():
+        async for chunk in read_multipart_ranges(location, parts):
+            yield chunk
+        yield f"--{boundary}--\r\n".encode()
+
+    headers["content-length"] = str(content_length)
+    return StreamingResponse(
+        multipart_body(),
+        status_code=206,
+        headers=headers,
+        media_type=f"multipart/byteranges; boundary={boundary}",
+    )
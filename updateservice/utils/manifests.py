@@ -0,0 +1,43 @@
+import os
+import uuid
+
+
+class ManifestStore:
+    """Static JSON update manifests on disk, replaced atomically
+
+    The directory can be served as is by a web server or a CDN.
+    """
+
+    def __init__(self, directory: str = None):
+        self._directory = directory
+
+    @property
+    def directory(self):
+        return self._directory or os.path.join(os.getcwd(), "Storage", "manifests")
+
+    def application_location(self, application_id: int):
+        return os.path.join(self.directory, "applications", f"{application_id}.json")
+
+    def group_location(self, group_id: int):
+        return os.path.join(self.directory, "groups", f"{group_id}.json")
+
+    def write(self, location: str, content: str):
+        os.makedirs(os.path.dirname(location), exist_ok=True)
+        temp_location = os.path.join(
+            os.path.dirname(location), f".{uuid.uuid4().hex}.part"
+        )
+        try:
+            with open(temp_location, "w") as f:
+                f.write(content)
+            os.replace(temp_location, location)
+        except BaseException:
+            if os.path.exists(temp_location):
+                os.remove(temp_location)
+            raise
+
+    def remove(self, location: str):
+        if os.path.exists(location):
+            os.remove(location)
+
+
+manifest_store = ManifestStore()
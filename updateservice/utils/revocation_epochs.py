@@ -0,0 +1,61 @@
+import asyncio
+import datetime
+import time
+
+from updateservice.settings import setting
+
+
+class RevocationEpochTable:
+    """In-memory per-user revocation epochs and recently revoked token ids"""
+
+    def __init__(self, refresh_interval: float, token_lifetime: int):
+        self.refresh_interval = refresh_interval
+        self.token_lifetime = datetime.timedelta(seconds=token_lifetime)
+        # rows written by nodes with a slightly late clock are still picked up
+        self.watermark_overlap = datetime.timedelta(seconds=30)
+        self.watermark = None
+        self._epochs = {}
+        self._revoked_jti = {}
+        self._refreshed_at = None
+        self.refresh_lock = asyncio.Lock()
+
+    def is_stale(self) -> bool:
+        if self._refreshed_at is None:
+            return True
+        return time.monotonic() - self._refreshed_at >= self.refresh_interval
+
+    def mark_refreshed(self, watermark: datetime.datetime):
+        self._refreshed_at = time.monotonic()
+        if watermark is not None:
+            self.watermark = watermark
+        self._prune_revoked_jti()
+
+    def set_epoch(self, user_id: int, epoch: int):
+        if epoch > self._epochs.get(user_id, 0):
+            self._epochs[user_id] = epoch
+
+    def revoke_jti(self, jti: str, revoked_at: datetime.datetime):
+        self._revoked_jti[jti] = revoked_at
+
+    def is_valid(self, user_id: int, epoch: int, jti: str = None) -> bool:
+        if epoch < self._epochs.get(user_id, 0):
+            return False
+        return jti is None or jti not in self._revoked_jti
+
+    def clear(self):
+        self.watermark = None
+        self._epochs.clear()
+        self._revoked_jti.clear()
+        self._refreshed_at = None
+
+    def _prune_revoked_jti(self):
+        oldest = datetime.datetime.utcnow() - self.token_lifetime
+        expired = [jti for jti, at in self._revoked_jti.items() if at < oldest]
+        for jti in expired:
+            del self._revoked_jti[jti]
+
+
+revocation_epochs = RevocationEpochTable(
+    refresh_interval=setting["revocation_refresh_interval"],
+    token_lifetime=setting["token_lifetime"],
+)
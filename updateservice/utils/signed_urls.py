@@ -0,0 +1,31 @@
+import hashlib
+import hmac
+import time
+
+from updateservice.settings import setting
+
+download_secret = setting["secret_key"].encode()
+
+
+def download_signature(
+    application_id: int, package_id: int, file_hash: str, expires: int
+) -> str:
+    message = f"{application_id}:{package_id}:{file_hash}:{expires}".encode()
+    return hmac.new(download_secret, message, hashlib.sha256).hexdigest()
+
+
+def sign_download_url(application_id: int, package_id: int, file_hash: str):
+    expires = int(time.time()) + setting["download_url_ttl"]
+    signature = download_signature(application_id, package_id, file_hash, expires)
+    url = (
+        f"/v1/downloads/applications/{application_id}/packages/{package_id}/file"
+        f"?hash={file_hash}&expires={expires}&signature={signature}"
+    )
+    return url, expires
+
+
+def verify_download_signature(
+    application_id: int, package_id: int, file_hash: str, expires: int, signature: str
+) -> bool:
+    expected = download_signature(application_id, package_id, file_hash, expires)
+    return hmac.compare_digest(expected, signature)
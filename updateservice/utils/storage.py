@@ -0,0 +1,226 @@
+import asyncio
+import os
+import tempfile
+import time
+from contextlib import asynccontextmanager
+from datetime import timedelta
+
+import aiofiles.os
+
+from updateservice.settings import setting
+from updateservice.utils.compression import encoding_suffixes
+from updateservice.utils.file_responses import content_disposition
+
+
+def blob_key(file_hash: str, encoding: str = None):
+    suffix = encoding_suffixes[encoding] if encoding else ""
+    return f"blobs/{file_hash[:2]}/{file_hash}{suffix}"
+
+
+def upload_key(upload_id: str):
+    return f"uploads/{upload_id}"
+
+
+class LocalStorage:
+    """Blobs on the local filesystem under Storage/, served by the API itself"""
+
+    redirects = False
+
+    def __init__(self, root: str = None):
+        self._root = root
+
+    @property
+    def root(self):
+        return self._root or os.path.join(os.getcwd(), "Storage")
+
+    def path(self, key: str):
+        return os.path.join(self.root, *key.split("/"))
+
+    async def exists(self, key: str) -> bool:
+        return os.path.exists(self.path(key))
+
+    async def size(self, key: str):
+        try:
+            return os.stat(self.path(key)).st_size
+        except FileNotFoundError:
+            return None
+
+    async def store(self, key: str, temp_location: str, content_encoding: str = None):
+        location = self.path(key)
+        os.makedirs(os.path.dirname(location), exist_ok=True)
+        await aiofiles.os.replace(temp_location, location)
+
+    async def move(self, source_key: str, key: str):
+        location = self.path(key)
+        os.makedirs(os.path.dirname(location), exist_ok=True)
+        await aiofiles.os.replace(self.path(source_key), location)
+
+    async def delete(self, key: str):
+        location = self.path(key)
+        if os.path.exists(location):
+            await aiofiles.os.remove(location)
+
+    @asynccontextmanager
+    async def local_copy(self, key: str):
+        yield self.path(key)
+
+    async def list_keys(self, prefix: str):
+        """(key, size) of every object under prefix"""
+        return await asyncio.to_thread(self._list_keys, prefix)
+
+    def _list_keys(self, prefix: str):
+        keys = []
+        for directory, _, filenames in os.walk(self.path(prefix)):
+            for filename in filenames:
+                location = os.path.join(directory, filename)
+                key = os.path.relpath(location, self.root).replace(os.sep, "/")
+                keys.append((key, os.stat(location).st_size))
+        return keys
+
+    async def presigned_url(self, key: str, filename: str):
+        return None
+
+    async def presigned_put_url(self, key: str):
+        return None
+
+
+class S3Storage:
+    """Blobs in an S3 compatible bucket, downloads redirect to presigned URLs
+
+    Presigned URLs are cached and handed out again while at least half of
+    their lifetime is left.
+    """
+
+    redirects = True
+
+    def __init__(
+        self,
+        bucket: str,
+        url_ttl: int,
+        endpoint: str = None,
+        access_key: str = None,
+        secret_key: str = None,
+        secure: bool = False,
+        client=None,
+    ):
+        if client is None:
+            from minio import Minio
+
+            client = Minio(endpoint, access_key, secret_key, secure=secure)
+        self.client = client
+        self.bucket = bucket
+        self.url_ttl = url_ttl
+        self.max_cached_urls = 10000
+        self._urls = {}
+
+    async def exists(self, key: str) -> bool:
+        return await self.size(key) is not None
+
+    async def size(self, key: str):
+        try:
+            stat_result = await asyncio.to_thread(
+                self.client.stat_object, self.bucket, key
+            )
+        except Exception as e:
+            if getattr(e, "code", None) in ("NoSuchKey", "NoSuchObject"):
+                return None
+            raise
+        return stat_result.size
+
+    async def store(self, key: str, temp_location: str, content_encoding: str = None):
+        metadata = {"Content-Encoding": content_encoding} if content_encoding else None
+        await asyncio.to_thread(
+            self.client.fput_object,
+            self.bucket,
+            key,
+            temp_location,
+            metadata=metadata,
+        )
+        await aiofiles.os.remove(temp_location)
+
+    async def move(self, source_key: str, key: str):
+        from minio.commonconfig import CopySource
+
+        await asyncio.to_thread(
+            self.client.copy_object,
+            self.bucket,
+            key,
+            CopySource(self.bucket, source_key),
+        )
+        await asyncio.to_thread(self.client.remove_object, self.bucket, source_key)
+
+    async def delete(self, key: str):
+        await asyncio.to_thread(self.client.remove_object, self.bucket, key)
+        for cached in [cached for cached in self._urls if cached[0] == key]:
+            del self._urls[cached]
+
+    @asynccontextmanager
+    async def local_copy(self, key: str):
+        handle, location = tempfile.mkstemp(suffix=".blob")
+        os.close(handle)
+        try:
+            await asyncio.to_thread(self.client.fget_object, self.bucket, key, location)
+            yield location
+        finally:
+            if os.path.exists(location):
+                os.remove(location)
+
+    async def list_keys(self, prefix: str):
+        objects = await asyncio.to_thread(
+            lambda: list(
+                self.client.list_objects(self.bucket, prefix=prefix, recursive=True)
+            )
+        )
+        return [(item.object_name, item.size) for item in objects]
+
+    async def presigned_url(self, key: str, filename: str):
+        cached = self._urls.get((key, filename))
+        if cached is not None and cached[1] - time.monotonic() > self.url_ttl / 2:
+            return cached[0]
+        if not await self.exists(key):
+            return None
+        url = await asyncio.to_thread(
+            self.client.presigned_get_object,
+            self.bucket,
+            key,
+            expires=timedelta(seconds=self.url_ttl),
+            response_headers={
+                "response-content-disposition": content_disposition(filename)
+            },
+        )
+        if len(self._urls) >= self.max_cached_urls:
+            now = time.monotonic()
+            self._urls = {k: v for k, v in self._urls.items() if v[1] > now}
+            if len(self._urls) >= self.max_cached_urls:
+                self._urls.clear()
+        self._urls[(key, filename)] = (url, time.monotonic() + self.url_ttl)
+        return url
+
+    async def presigned_put_url(self, key: str):
+        return await asyncio.to_thread(
+            self.client.presigned_put_object,
+            self.bucket,
+            key,
+            expires=timedelta(seconds=self.url_ttl),
+        )
+
+
+def build_storage(settings: dict):
+    if settings["storage_backend"] == "s3":
+        return S3Storage(
+            bucket=settings["storage_bucket"],
+            url_ttl=settings["presigned_url_ttl"],
+            endpoint=settings["endpoint"],
+            access_key=settings["my_access_key"],
+            secret_key=settings["my_secret_key"],
+            secure=settings["storage_secure"],
+        )
+    return LocalStorage()
+
+
+storage = build_storage(setting)
+
+
+def get_storage():
+    """The configured backend, looked up on every use so tests can swap it"""
+    return storage
@@ -1,18 +1,36 @@
+import datetime
+
 import jwt
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 from jwt import PyJWTError
 
-from updateservice.repositories.tokens_repo import CheckTokenRepo
+from updateservice.models.schema_tokens import TokenIntrospectResult
+from updateservice.repositories.tokens_repo import (
+    CheckTokenRepo,
+    IntrospectTokenRepo,
+    RevocationEpochRepo,
+)
 from updateservice.repositories.user_repo import UserLoginRepo
 from updateservice.settings import setting
 from updateservice.utils.exceptions import TokenDeletedError
+from updateservice.utils.revocation_epochs import revocation_epochs
+from updateservice.utils.token_cache import decoded_token_cache
 
 jwt_secret = setting["secret_key"]
+stateless_tokens = setting["stateless_tokens"]
+
+
+def decode_token(encoded_token: str) -> dict:
+    decoded_token = decoded_token_cache.get(encoded_token)
+    if decoded_token is None:
+        decoded_token = jwt.decode(encoded_token, jwt_secret, algorithms="HS256")
+        decoded_token_cache.set(encoded_token, decoded_token)
+    return decoded_token
 
 
 class UpdateUserLogin(UserLoginRepo):
-    def __init__(self, db_session: UserLoginRepo = Depends(UserLoginRepo)):
+    def __init__(self, db_session: UserLoginRepo = Depends(UserLoginRepo.dependency)):
         self.db_session = db_session
 
     async def update_user_last_login(self, user_id: int):
@@ -23,7 +41,7 @@ class UpdateUserLogin(UserLoginRepo):
 
 
 class CheckTokenStatus(CheckTokenRepo):
-    def __init__(self, db_session: CheckTokenRepo = Depends(CheckTokenRepo)):
+    def __init__(self, db_session: CheckTokenRepo = Depends(CheckTokenRepo.dependency)):
         self.db_session = db_session
 
     async def check_if_token_is_deleted(self, user_id: int, token: str, deleted: bool):
@@ -36,10 +54,63 @@ class CheckTokenStatus(CheckTokenRepo):
             raise HTTPException(status_code=401, detail=e.message)
 
 
+class TokenIntrospection(IntrospectTokenRepo):
+    def __init__(
+        self,
+        db_session: IntrospectTokenRepo = Depends(IntrospectTokenRepo.dependency),
+        epochs: RevocationEpochRepo = Depends(RevocationEpochRepo.dependency),
+    ):
+        self.db_session = db_session
+        self.epochs = epochs
+
+    async def introspect_tokens(self, tokens: list):
+        claims = {}
+        for token in set(tokens):
+            try:
+                claims[token] = decode_token(token)
+            except PyJWTError:
+                continue
+        if any(claim.get("epoch") is not None for claim in claims.values()):
+            await self.epochs.refresh_if_stale()
+        stateful_tokens = [
+            token
+            for token, claim in claims.items()
+            if not stateless_tokens or claim.get("epoch") is None
+        ]
+        statuses = {}
+        if stateful_tokens:
+            statuses = await self.db_session.tokens_status(stateful_tokens)
+        return [
+            self.token_result(token, claims.get(token), statuses) for token in tokens
+        ]
+
+    def token_result(self, token: str, claim: dict, statuses: dict):
+        inactive = TokenIntrospectResult(active=False)
+        if claim is None or claim.get("user_id") is None:
+            return inactive
+        user_id = claim["user_id"]
+        token_epoch = claim.get("epoch")
+        if token_epoch is not None and not revocation_epochs.is_valid(
+            user_id, token_epoch, claim.get("jti")
+        ):
+            return inactive
+        if not stateless_tokens or token_epoch is None:
+            status = statuses.get(token)
+            if status is None or status.deleted or status.user_id != user_id:
+                return inactive
+        exp = claim.get("exp")
+        return TokenIntrospectResult(
+            active=True,
+            user_id=user_id,
+            exp=datetime.datetime.utcfromtimestamp(exp) if exp is not None else None,
+        )
+
+
 async def check_token_authentication(
     credentials: HTTPAuthorizationCredentials = Depends(HTTPBearer()),
     user: UpdateUserLogin = Depends(UpdateUserLogin),
     check: CheckTokenStatus = Depends(CheckTokenStatus),
+    epochs: RevocationEpochRepo = Depends(RevocationEpochRepo.dependency),
 ):
 
     credentials_exception = HTTPException(
@@ -50,15 +121,27 @@ async def check_token_authentication(
     encoded_token = credentials.credentials
 
     try:
-        decoded_token = jwt.decode(encoded_token, jwt_secret, algorithms="HS256")
+        decoded_token = decode_token(encoded_token)
         if decoded_token is None:
             raise credentials_exception
         user_id = decoded_token["user_id"]
-        token = encoded_token
-        deleted = False
-        check_status = await check.check_if_token_is_deleted(user_id, token, deleted)
-        if not check_status:
-            raise credentials_exception
+        token_epoch = decoded_token.get("epoch")
+        if token_epoch is not None:
+            await epochs.refresh_if_stale()
+            if not revocation_epochs.is_valid(
+                user_id, token_epoch, decoded_token.get("jti")
+            ):
+                raise HTTPException(
+                    status_code=401, detail="The token you have used was revoked"
+                )
+        if not stateless_tokens or token_epoch is None:
+            token = encoded_token
+            deleted = False
+            check_status = await check.check_if_token_is_deleted(
+                user_id, token, deleted
+            )
+            if not check_status:
+                raise credentials_exception
         await user.update_user_last_login(user_id)
     except jwt.ExpiredSignatureError:
         raise HTTPException(status_code=401, detail="Token has expired")
@@ -0,0 +1,99 @@
+import time
+from collections import OrderedDict
+
+from updateservice.settings import setting
+from updateservice.utils.token_digest import token_digest
+
+
+class TokenStatusCache:
+    """Bounded TTL + LRU cache of token status keyed by token digest"""
+
+    def __init__(self, max_size: int, ttl: float):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+
+    def get(self, token: str):
+        key = token_digest(token)
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, token: str, value):
+        if self.max_size <= 0:
+            return
+        key = token_digest(token)
+        self._entries[key] = (time.monotonic() + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def evict(self, token: str):
+        self._entries.pop(token_digest(token), None)
+
+    def clear(self):
+        self._entries.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def stats(self) -> dict:
+        return {"size": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+
+token_status_cache = TokenStatusCache(
+    max_size=setting["token_cache_size"], ttl=setting["token_cache_ttl"]
+)
+
+
+class DecodedTokenCache:
+    """LRU cache of verified JWT claims keyed by the raw token, honouring exp"""
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+
+    def get(self, token: str):
+        claims = self._entries.get(token)
+        if claims is None:
+            self.misses += 1
+            return None
+        exp = claims.get("exp")
+        if exp is not None and exp <= time.time():
+            del self._entries[token]
+            self.misses += 1
+            return None
+        self._entries.move_to_end(token)
+        self.hits += 1
+        return claims
+
+    def set(self, token: str, claims: dict):
+        if self.max_size <= 0:
+            return
+        self._entries[token] = claims
+        self._entries.move_to_end(token)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def clear(self):
+        self._entries.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def stats(self) -> dict:
+        return {"size": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+
+decoded_token_cache = DecodedTokenCache(max_size=setting["jwt_cache_size"])
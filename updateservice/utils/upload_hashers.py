@@ -0,0 +1,48 @@
+import time
+from collections import OrderedDict
+
+from updateservice.settings import setting
+
+
+class UploadHasherCache:
+    """Running sha256 per upload session, bounded and dropped after the TTL
+
+    An entry is only valid while its offset matches the session. Sessions
+    whose hasher was dropped are hashed from the part file on finalize.
+    """
+
+    def __init__(self, max_size: int, ttl: float):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries = OrderedDict()
+
+    def pop(self, upload_id: str):
+        """(offset, hasher) of the session, (None, None) when not cached"""
+        entry = self._entries.pop(upload_id, None)
+        if entry is None or entry[0] <= time.monotonic():
+            return None, None
+        return entry[1], entry[2]
+
+    def set(self, upload_id: str, offset: int, hasher):
+        if self.max_size <= 0:
+            return
+        now = time.monotonic()
+        self._entries[upload_id] = (now + self.ttl, offset, hasher)
+        self._entries.move_to_end(upload_id)
+        # entries are ordered by their last write, expired ones come first
+        while self._entries and (
+            len(self._entries) > self.max_size
+            or next(iter(self._entries.values()))[0] <= now
+        ):
+            self._entries.popitem(last=False)
+
+    def discard(self, upload_id: str):
+        self._entries.pop(upload_id, None)
+
+    def __len__(self):
+        return len(self._entries)
+
+
+upload_hashers = UploadHasherCache(
+    max_size=setting["upload_hasher_cache_size"], ttl=setting["upload_session_ttl"]
+)
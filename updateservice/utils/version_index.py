@@ -0,0 +1,116 @@
+import asyncio
+import bisect
+import time
+from collections import namedtuple
+
+from updateservice.settings import setting
+from updateservice.utils.versions import parse_version
+
+VersionEntry = namedtuple("VersionEntry", "semver id hash size version url")
+
+
+class VersionIndex:
+    """In-memory per-application packages with a file, sorted by version
+
+    Applications are loaded on first use and reloaded after refresh_interval
+    so changes made by other processes are picked up. Unknown applications
+    are remembered until their refresh too. Writes in this process update the
+    loaded applications in place.
+    """
+
+    def __init__(self, refresh_interval: float):
+        self.refresh_interval = refresh_interval
+        self._entries = {}
+        self._loaded_at = {}
+        # writes made while an application is being read from the database
+        self._pending = {}
+        self.refresh_lock = asyncio.Lock()
+
+    def is_stale(self, application_id: int) -> bool:
+        loaded_at = self._loaded_at.get(application_id)
+        if loaded_at is None:
+            return True
+        return time.monotonic() - loaded_at >= self.refresh_interval
+
+    def is_known(self, application_id: int) -> bool:
+        return self._entries.get(application_id) is not None
+
+    def begin_load(self, application_id: int):
+        """Record in-process writes until load or abort_load"""
+        self._pending[application_id] = []
+
+    def load(self, application_id: int, packages):
+        entries = [entry for entry in map(package_entry, packages) if entry]
+        self._entries[application_id] = sorted(entries)
+        self._loaded_at[application_id] = time.monotonic()
+        # the rows may have been read before these writes were committed
+        for package_id, package in self._pending.pop(application_id, []):
+            if package is None:
+                self.remove_package(application_id, package_id)
+            else:
+                self.update_package(application_id, package)
+
+    def load_unknown(self, application_id: int):
+        """Remember that the application does not exist until the next refresh"""
+        self._entries[application_id] = None
+        self._loaded_at[application_id] = time.monotonic()
+        self._pending.pop(application_id, None)
+
+    def abort_load(self, application_id: int):
+        self._pending.pop(application_id, None)
+
+    def latest_above(self, application_id: int, semver: tuple):
+        """Newest entry above semver, None when semver is already the newest"""
+        entries = self._entries.get(application_id) or []
+        position = bisect.bisect_right(entries, semver, key=lambda e: e.semver)
+        if position == len(entries):
+            return None
+        return entries[-1]
+
+    def update_package(self, application_id: int, package):
+        pending = self._pending.get(application_id)
+        if pending is not None:
+            pending.append((package.id, package))
+        entries = self._entries.get(application_id)
+        if entries is None:
+            return
+        self._remove(entries, package.id)
+        entry = package_entry(package)
+        if entry is not None:
+            bisect.insort(entries, entry)
+
+    def remove_package(self, application_id: int, package_id: int):
+        pending = self._pending.get(application_id)
+        if pending is not None:
+            pending.append((package_id, None))
+        entries = self._entries.get(application_id)
+        if entries is not None:
+            self._remove(entries, package_id)
+
+    def drop(self, application_id: int):
+        self._entries.pop(application_id, None)
+        self._loaded_at.pop(application_id, None)
+
+    def clear(self):
+        self._entries.clear()
+        self._loaded_at.clear()
+        self._pending.clear()
+
+    @staticmethod
+    def _remove(entries: list, package_id: int):
+        for position, entry in enumerate(entries):
+            if entry.id == package_id:
+                del entries[position]
+                return
+
+
+def package_entry(package):
+    semver = parse_version(package.version)
+    if semver is None or package.hash is None:
+        return None
+    return VersionEntry(
+        semver, package.id, package.hash, package.size, package.version, package.url
+    )
+
+
+version_index = VersionIndex(refresh_interval=setting["version_index_refresh_interval"])
@@ -0,0 +1,11 @@
+import re
+
+version_pattern = re.compile(r"^(\d{1,9})\.(\d{1,9})\.(\d{1,9})$")
+
+
+def parse_version(version: str):
+    """(major, minor, patch) of an X.Y.Z version, None for anything else"""
+    match = version_pattern.match(version or "")
+    if match is None:
+        return None
+    return tuple(int(part) for part in match.groups())